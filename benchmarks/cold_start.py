@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""Measure the cold start of the MCP server: process start to the first tools/list response.
+
+Every MCP client session starts a new server process, so this is latency
+users see whenever a session opens. Exits with status 1 when the median
+of the runs exceeds the budget, so it can guard against regressions in CI:
+
+    python benchmarks/cold_start.py --runs 5 --budget 2.5
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+# Median seconds from process start to the tools/list response allowed by default
+DEFAULT_BUDGET = 3.0
+
+
+async def measure_once(env):
+    """Start a server process and return the seconds until tools/list answered."""
+    params = StdioServerParameters(command=sys.executable, args=["-m", "prometheus_mcp_server.main"], env=env)
+    started = time.perf_counter()
+    async with stdio_client(params) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            result = await session.list_tools()
+            elapsed = time.perf_counter() - started
+    if not result.tools:
+        raise RuntimeError("Server listed no tools")
+    return elapsed
+
+
+def benchmark_env():
+    """Return the environment of the measured server, pointed at an unused local port."""
+    env = dict(os.environ)
+    env.setdefault("PROMETHEUS_URL", "http://127.0.0.1:9")
+    env["PROMETHEUS_MCP_TRANSPORT"] = "stdio"
+    env["PROMETHEUS_MCP_METRICS_PORT"] = "0"
+    # Keep background refreshes from competing with startup for the CPU
+    env["PROMETHEUS_METRIC_INDEX_REFRESH_INTERVAL"] = "0"
+    env["PROMETHEUS_METADATA_TTL"] = "0"
+    return env
+
+
+async def run(runs, budget):
+    env = benchmark_env()
+    timings = []
+    for _ in range(runs):
+        timings.append(await measure_once(env))
+    median = statistics.median(timings)
+    print(f"cold start over {runs} runs: median {median:.3f}s, min {min(timings):.3f}s, "
+          f"max {max(timings):.3f}s, budget {budget:.3f}s")
+    return median <= budget
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="number of server processes to start")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET,
+                        help="maximum median seconds from process start to the tools/list response")
+    args = parser.parse_args()
+    if not asyncio.run(run(args.runs, args.budget)):
+        print("cold start exceeds the budget", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
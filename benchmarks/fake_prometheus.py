@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+"""Serve synthetic Prometheus API responses of configurable size and latency for benchmarks.
+
+Answers the endpoints the MCP server uses (query, query_range, targets,
+metadata, label values, series, TSDB status, rules and alerts) with
+deterministic data, so benchmark runs are comparable without a real
+Prometheus. Prints its base URL on the first line of stdout once listening:
+
+    python benchmarks/fake_prometheus.py --series 200 --latency 5
+"""
+
+import argparse
+import json
+import math
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+METRIC = "bench_metric"
+# Fixed "now" so that responses do not change between runs
+NOW = 1700000000.0
+
+
+class Dataset:
+    """Synthetic series, targets and metadata of a fake Prometheus."""
+
+    def __init__(self, series=200, labels=4, metrics=500, targets=500):
+        self.series = series
+        self.labels = labels
+        self.metrics = metrics
+        self.targets = targets
+
+    def series_labels(self, i):
+        labels = {"__name__": METRIC, "job": f"job-{i % 10}", "instance": f"host-{i}:9100"}
+        for k in range(self.labels):
+            labels[f"label_{k}"] = f"value-{i % (k + 2)}"
+        return labels
+
+    @staticmethod
+    def value(i, t):
+        return f"{50 + 40 * math.sin(i + t / 600):.4f}"
+
+    def vector(self, params):
+        t = parse_time(params.get("time", NOW))
+        return {"resultType": "vector",
+                "result": [{"metric": self.series_labels(i), "value": [t, self.value(i, t)]} for i in range(self.series)]}
+
+    def matrix(self, params):
+        start, end = parse_time(params["start"]), parse_time(params["end"])
+        step = parse_step(params["step"])
+        times = [start + n * step for n in range(int((end - start) // step) + 1)]
+        return {"resultType": "matrix",
+                "result": [{"metric": self.series_labels(i), "values": [[t, self.value(i, t)] for t in times]}
+                           for i in range(self.series)]}
+
+    def metric_names(self, params=None):
+        return [METRIC] + [f"bench_metric_{k}_total" for k in range(self.metrics - 1)]
+
+    def label_names(self, params=None):
+        return ["__name__", "instance", "job"] + [f"label_{k}" for k in range(self.labels)]
+
+    def metadata(self, params=None):
+        return {name: [{"type": "counter", "help": f"Synthetic metric {name}", "unit": ""}]
+                for name in self.metric_names()}
+
+    def active_targets(self, params=None):
+        return {
+            "activeTargets": [
+                {
+                    "discoveredLabels": {"__address__": f"host-{i}:9100", "job": f"job-{i % 10}"},
+                    "labels": {"instance": f"host-{i}:9100", "job": f"job-{i % 10}"},
+                    "scrapePool": f"job-{i % 10}",
+                    "scrapeUrl": f"http://host-{i}:9100/metrics",
+                    "lastError": "connection refused" if i % 20 == 0 else "",
+                    "lastScrape": "2023-11-14T22:13:05.000Z",
+                    "lastScrapeDuration": 0.012,
+                    "health": "down" if i % 20 == 0 else "up",
+                }
+                for i in range(self.targets)
+            ],
+            "droppedTargets": [],
+        }
+
+    def series_list(self, params=None):
+        return [self.series_labels(i) for i in range(self.series)]
+
+    def tsdb_status(self, params=None):
+        return {
+            "headStats": {"numSeries": self.series * self.metrics, "numLabelPairs": self.series * 4},
+            "seriesCountByMetricName": [{"name": name, "value": self.series} for name in self.metric_names()[:10]],
+            "labelValueCountByLabelName": [{"name": "instance", "value": self.series}],
+            "seriesCountByLabelValuePair": [{"name": "job=job-0", "value": self.series // 10}],
+        }
+
+    def rules(self, params=None):
+        return {"groups": [{"name": "bench", "file": "bench.yml", "interval": 30, "rules": [
+            {"type": "recording", "name": "job:bench_metric:avg", "health": "ok",
+             "query": f"avg by (job) ({METRIC})"},
+        ]}]}
+
+    def alerts(self, params=None):
+        return {"alerts": []}
+
+
+def parse_time(value):
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def parse_step(step):
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, "d": 86400}
+    for unit in ("ms", "s", "m", "h", "d"):
+        if step.endswith(unit) and step[:-len(unit)].replace(".", "", 1).isdigit():
+            return float(step[:-len(unit)]) * units[unit]
+    return float(step)
+
+
+def create_server(dataset, host="127.0.0.1", port=0, latency=0.0):
+    """Create the HTTP server; responses are rendered once per distinct request and then reused."""
+    routes = {
+        "/api/v1/query": dataset.vector,
+        "/api/v1/query_range": dataset.matrix,
+        "/api/v1/label/__name__/values": dataset.metric_names,
+        "/api/v1/labels": dataset.label_names,
+        "/api/v1/metadata": dataset.metadata,
+        "/api/v1/targets": dataset.active_targets,
+        "/api/v1/series": dataset.series_list,
+        "/api/v1/status/tsdb": dataset.tsdb_status,
+        "/api/v1/rules": dataset.rules,
+        "/api/v1/alerts": dataset.alerts,
+    }
+    rendered = {}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written separately, which Nagle's algorithm would delay
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            route = routes.get(url.path)
+            if route is None:
+                self.respond(404, {"status": "error", "error": f"unknown endpoint {url.path}"})
+                return
+            key = (url.path, url.query)
+            with lock:
+                body = rendered.get(key)
+            if body is None:
+                params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+                body = json.dumps({"status": "success", "data": route(params)}).encode()
+                with lock:
+                    rendered[key] = body
+            if latency:
+                time.sleep(latency)
+            self.respond(200, body)
+
+        def respond(self, status, body):
+            if not isinstance(body, bytes):
+                body = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="port to listen on, 0 for any free port")
+    parser.add_argument("--series", type=int, default=200, help="series returned by queries")
+    parser.add_argument("--labels", type=int, default=4, help="extra labels per series")
+    parser.add_argument("--metrics", type=int, default=500, help="metric names")
+    parser.add_argument("--targets", type=int, default=500, help="scrape targets")
+    parser.add_argument("--latency", type=float, default=0.0, help="milliseconds added to every response")
+    args = parser.parse_args()
+    server = create_server(Dataset(args.series, args.labels, args.metrics, args.targets),
+                           args.host, args.port, args.latency / 1000)
+    host, port = server.server_address[:2]
+    print(f"http://{host}:{port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
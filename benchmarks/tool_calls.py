@@ -0,0 +1,318 @@
+#!/usr/bin/env python
+"""Benchmark MCP tool calls end to end against a local fake Prometheus.
+
+Starts benchmarks/fake_prometheus.py, then drives the server's tools through
+an MCP client session, either over stdio to a server process or in-process
+over memory streams. Reports per scenario the p50/p99 latency, throughput
+and bytes of tool results serialized, and the peak RSS of the server.
+
+Right before each scenario, the Prometheus request behind it is fetched
+straight from the fake Prometheus the same number of times. p50 latency and
+throughput are compared with the stored baseline as ratios to that raw fetch,
+so machine speed cancels out; absolute timings and p99 are informational.
+The run exits with status 1 on a regression beyond the tolerance:
+
+    python benchmarks/tool_calls.py --update-baseline
+    python benchmarks/tool_calls.py --mode stdio --tolerance 0.3
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from fake_prometheus import METRIC, NOW
+
+BASELINE = Path(__file__).with_name("baselines.json")
+MODES = ("inprocess", "stdio")
+STEP = 15
+
+
+def rfc3339(timestamp):
+    # Numeric strings would be decoded as numbers by the MCP argument parser
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def scenarios(points):
+    """Return (name, tool, arguments, upstream) of every benchmarked tool call.
+
+    upstream is the (path, params) of the Prometheus request the tool's result is
+    built from, which is fetched directly for the raw fetch time.
+    """
+    start = NOW - (points - 1) * STEP
+    instant = {"query": METRIC, "time": rfc3339(NOW)}
+    window = {"query": METRIC, "start": rfc3339(start), "end": rfc3339(NOW), "step": f"{STEP}s"}
+    query = ("/api/v1/query", instant)
+    query_range = ("/api/v1/query_range", window)
+    return [
+        ("execute_query", "execute_query", dict(instant, use_cache=False), query),
+        ("execute_query_cached", "execute_query", instant, query),
+        ("execute_query_projected", "execute_query",
+         dict(instant, use_cache=False, keep_labels=["job", "instance"], sort="desc", limit=10), query),
+        ("execute_range_query", "execute_range_query", dict(window, use_cache=False), query_range),
+        ("execute_range_query_stats", "execute_range_query", dict(window, use_cache=False, output="stats"),
+         query_range),
+        ("get_targets_summary", "get_targets", {"summary": True}, ("/api/v1/targets", {})),
+        ("search_metrics", "search_metrics", {"query": "bench_metric_1"}, ("/api/v1/label/__name__/values", {})),
+        ("get_metric_metadata", "get_metric_metadata", {"metric": METRIC}, ("/api/v1/metadata", {})),
+    ]
+
+
+def selected(args):
+    """Return the scenarios chosen with --scenario, or all of them."""
+    return [scenario for scenario in scenarios(args.points) if not args.scenario or scenario[0] in args.scenario]
+
+
+def server_env(url):
+    """Return the environment of the benchmarked server, pointed at the fake Prometheus."""
+    env = dict(os.environ)
+    env["PROMETHEUS_URL"] = url
+    env["PROMETHEUS_MCP_TRANSPORT"] = "stdio"
+    env["PROMETHEUS_MCP_METRICS_PORT"] = "0"
+    # Measure the server, not the client-side rate limit
+    env["PROMETHEUS_RATE_LIMIT"] = "0"
+    return env
+
+
+@contextlib.contextmanager
+def fake_prometheus(args):
+    """Run the fake Prometheus in its own process, so it does not count towards the server's time or memory."""
+    command = [sys.executable, str(Path(__file__).with_name("fake_prometheus.py")),
+               "--series", str(args.series), "--labels", str(args.labels),
+               "--targets", str(args.targets), "--latency", str(args.latency)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    try:
+        yield process.stdout.readline().strip()
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+async def measure(call, iterations, concurrency, warmup=3):
+    """Await call() repeatedly, return latency percentiles and throughput."""
+    for _ in range(warmup):
+        await call()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def timed():
+        async with semaphore:
+            started = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(timed() for _ in range(iterations)))
+    elapsed = time.perf_counter() - started
+    return {
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "throughput": round(iterations / elapsed, 1),
+    }
+
+
+async def run_scenario(session, tool, arguments, iterations, concurrency):
+    """Call one tool repeatedly, return latency percentiles, throughput and result size."""
+    sizes = []
+
+    async def call():
+        result = await session.call_tool(tool, arguments)
+        if result.isError:
+            raise RuntimeError(f"{tool} failed: {result.content[0].text}")
+        sizes.append(sum(len(item.text.encode()) for item in result.content if item.type == "text"))
+
+    results = await measure(call, iterations, concurrency)
+    results["bytes"] = max(sizes)
+    return results
+
+
+async def fetch_upstream(client, path, params, iterations, concurrency):
+    """Fetch a Prometheus request straight from the fake Prometheus, return latency percentiles and throughput."""
+    async def call():
+        response = await client.get(path, params=params)
+        response.raise_for_status()
+
+    return await measure(call, iterations, concurrency)
+
+
+async def run_all(session, url, args):
+    results = {}
+    async with httpx.AsyncClient(base_url=url) as client:
+        for name, tool, arguments, (path, params) in selected(args):
+            # Measured right before the tool calls, so both see the machine in the same state
+            fetch = await fetch_upstream(client, path, params, args.iterations, args.concurrency)
+            values = await run_scenario(session, tool, arguments, args.iterations, args.concurrency)
+            values["fetch_p50_ms"] = fetch["p50_ms"]
+            values["fetch_throughput"] = fetch["throughput"]
+            # Relative to the raw fetch, latency and throughput hold across machines
+            values["p50_ratio"] = round(values["p50_ms"] / fetch["p50_ms"], 3)
+            values["throughput_ratio"] = round(values["throughput"] / fetch["throughput"], 3)
+            results[name] = values
+            print(f"  {name:28} p50 {values['p50_ms']:9.3f}ms ({values['p50_ratio']:6.2f}x fetch)  "
+                  f"p99 {values['p99_ms']:9.3f}ms  {values['throughput']:8.1f}/s  {values['bytes']:9d} bytes",
+                  flush=True)
+    return results
+
+
+def child_peak_rss_mb(marker="prometheus_mcp_server"):
+    """Return the peak RSS of the server child process, from /proc (Linux only)."""
+    for entry in Path("/proc").iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+            parent = int(stat.rsplit(")", 1)[1].split()[1])
+            if parent != os.getpid() or marker not in (entry / "cmdline").read_text():
+                continue
+            for line in (entry / "status").read_text().splitlines():
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+        except (OSError, ValueError, IndexError):
+            continue
+    return None
+
+
+def own_peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+async def run_stdio(url, args):
+    params = StdioServerParameters(command=sys.executable, args=["-m", "prometheus_mcp_server.main"],
+                                   env=server_env(url))
+    # The server's log output is written where a client would keep it, not to the terminal
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stderr(devnull):
+        async with stdio_client(params) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                results = await run_all(session, url, args)
+                peak = child_peak_rss_mb()
+    return {"peak_rss_mb": peak, "scenarios": results}
+
+
+async def run_inprocess(url, args):
+    os.environ.update(server_env(url))
+    # Imported only now, as the server reads its configuration on import
+    from mcp.shared.memory import create_connected_server_and_client_session
+
+    from prometheus_mcp_server.logging_config import setup_logging, stop_logging
+    from prometheus_mcp_server.server import mcp
+
+    with open(os.devnull, "w") as devnull:
+        # Logged as by the real server, but not to the terminal
+        setup_logging(stream=devnull)
+        try:
+            async with create_connected_server_and_client_session(mcp._mcp_server) as session:
+                results = await run_all(session, url, args)
+        finally:
+            stop_logging()
+    return {"peak_rss_mb": own_peak_rss_mb(), "scenarios": results}
+
+
+def compare(results, baseline, tolerance, bytes_tolerance):
+    """Return the regressions of results against a baseline."""
+    regressions = []
+    for mode, measured in results.items():
+        expected = baseline.get(mode)
+        if expected is None:
+            continue
+        peak, peak_baseline = measured["peak_rss_mb"], expected.get("peak_rss_mb")
+        if peak is not None and peak_baseline and peak > peak_baseline * (1 + tolerance):
+            regressions.append(f"{mode}: peak RSS {peak}MB > baseline {peak_baseline}MB")
+        for name, values in measured["scenarios"].items():
+            reference = expected["scenarios"].get(name)
+            # Baselines recorded before ratios were measured have nothing comparable
+            if reference is None or "p50_ratio" not in reference:
+                continue
+            # Absolute timings depend on the machine, only their ratios to the raw fetch are compared.
+            # p99 of a hundred calls is one or two outliers, too noisy to gate on
+            if values["p50_ratio"] > reference["p50_ratio"] * (1 + tolerance):
+                regressions.append(f"{mode}/{name}: p50_ratio {values['p50_ratio']} > baseline {reference['p50_ratio']}")
+            if values["throughput_ratio"] < reference["throughput_ratio"] / (1 + tolerance):
+                regressions.append(f"{mode}/{name}: throughput_ratio {values['throughput_ratio']} "
+                                   f"< baseline {reference['throughput_ratio']}")
+            if values["bytes"] > reference["bytes"] * (1 + bytes_tolerance):
+                regressions.append(f"{mode}/{name}: {values['bytes']} bytes > baseline {reference['bytes']}")
+    return regressions
+
+
+def settings(args):
+    """Return the workload settings a baseline is only comparable under."""
+    return {name: getattr(args, name) for name in
+            ("series", "labels", "targets", "points", "latency", "iterations", "concurrency")}
+
+
+async def run(args):
+    results = {}
+    with fake_prometheus(args) as url:
+        for mode in MODES if args.mode == "both" else (args.mode,):
+            print(f"{mode}:", flush=True)
+            results[mode] = await (run_stdio(url, args) if mode == "stdio" else run_inprocess(url, args))
+            print(f"  peak RSS {results[mode]['peak_rss_mb']}MB", flush=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=MODES + ("both",), default="both")
+    parser.add_argument("--scenario", action="append", help="run only this scenario (repeatable)")
+    parser.add_argument("--iterations", type=int, default=100, help="measured calls per scenario")
+    parser.add_argument("--concurrency", type=int, default=4, help="calls in flight at once")
+    parser.add_argument("--series", type=int, default=200, help="series returned by queries")
+    parser.add_argument("--labels", type=int, default=4, help="extra labels per series")
+    parser.add_argument("--targets", type=int, default=500, help="scrape targets")
+    parser.add_argument("--points", type=int, default=240, help="samples per series of range queries")
+    parser.add_argument("--latency", type=float, default=2.0, help="milliseconds the fake Prometheus adds per response")
+    parser.add_argument("--baseline", type=Path, default=BASELINE, help="baseline file")
+    parser.add_argument("--update-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="allowed relative slowdown of p50 latency and throughput against the raw fetch, "
+                             "and of peak RSS")
+    parser.add_argument("--bytes-tolerance", type=float, default=0.05,
+                        help="allowed relative growth of tool result sizes")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.update_baseline:
+        stored = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        if stored.get("settings") != settings(args):
+            stored = {"settings": settings(args), "modes": {}}
+        stored["modes"].update(results)
+        args.baseline.write_text(json.dumps(stored, indent=2) + "\n")
+        print(f"baseline written to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"no baseline at {args.baseline}, run with --update-baseline to record one")
+        return
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get("settings") != settings(args):
+        print("baseline was recorded with different settings, not compared", file=sys.stderr)
+        return
+    regressions = compare(results, baseline["modes"], args.tolerance, args.bytes_tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+    print("no regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+from prometheus_mcp_server.logging_config import get_logger
+
+logger = get_logger()
+
+DEFAULT_BACKEND = "default"
+ALL_BACKENDS = "all"
+
+
+@dataclass
+class Backend:
+    """A named Prometheus backend, served by one or more HA replicas."""
+    name: str
+    url: str
+    # Optional credentials
+    username: Optional[str] = None
+    password: Optional[str] = None
+    token: Optional[str] = None
+    # Optional Org ID for multi-tenant setups
+    org_id: Optional[str] = None
+    # Maximum estimated samples a query may load on this backend, 0 for no backend-specific budget
+    max_samples: int = 0
+
+
+def replica_urls(url: str) -> List[str]:
+    """Split a comma-separated list of replica URLs, dropping trailing slashes."""
+    return [part.strip().rstrip("/") for part in url.split(",") if part.strip()]
+
+
+def parse_backends(environ: Mapping[str, str] = os.environ) -> Dict[str, Backend]:
+    """Read the named backends listed in PROMETHEUS_BACKENDS.
+
+    Each name N is configured through PROMETHEUS_BACKEND_<N>_URL (comma-separated
+    HA replicas), _USERNAME, _PASSWORD, _TOKEN, _ORG_ID and _MAX_SAMPLES, with N upper-cased
+    and dashes replaced by underscores.
+
+    Returns:
+        Backends keyed by name, in the listed order
+
+    Raises:
+        ValueError: If a name is reserved or a backend has no URL
+    """
+    backends: Dict[str, Backend] = {}
+    for name in (part.strip() for part in environ.get("PROMETHEUS_BACKENDS", "").split(",")):
+        if not name:
+            continue
+        if name in (DEFAULT_BACKEND, ALL_BACKENDS):
+            raise ValueError(f"Backend name '{name}' is reserved")
+        prefix = f"PROMETHEUS_BACKEND_{name.upper().replace('-', '_')}_"
+        url = environ.get(prefix + "URL", "")
+        if not replica_urls(url):
+            raise ValueError(f"Backend '{name}' has no URL, set {prefix}URL")
+        backends[name] = Backend(
+            name=name,
+            url=url,
+            username=environ.get(prefix + "USERNAME", ""),
+            password=environ.get(prefix + "PASSWORD", ""),
+            token=environ.get(prefix + "TOKEN", ""),
+            org_id=environ.get(prefix + "ORG_ID", ""),
+            max_samples=int(environ.get(prefix + "MAX_SAMPLES") or 0),
+        )
+    return backends
+
+
+@dataclass
+class _ReplicaState:
+    latency: Optional[float] = None
+    failures: int = 0
+    unhealthy_until: float = 0.0
+    requests: int = 0
+
+
+class ReplicaTracker:
+    """Track latency and health of replica URLs to pick the fastest healthy one.
+
+    Latency is an exponentially weighted moving average of successful requests.
+    A failed replica is skipped for a cooldown that doubles with consecutive
+    failures, and is only used again before that if no replica is healthy.
+    """
+
+    def __init__(
+        self,
+        alpha: float = 0.3,
+        cooldown: float = 5.0,
+        max_cooldown: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.alpha = alpha
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._clock = clock
+        self._replicas: Dict[str, _ReplicaState] = {}
+
+    def order(self, urls: List[str]) -> List[str]:
+        """Return urls ordered for reads: healthy replicas fastest first, unmeasured ones before measured."""
+        if len(urls) < 2:
+            return list(urls)
+        now = self._clock()
+
+        def rank(url):
+            state = self._replicas.get(url) or _ReplicaState()
+            healthy = state.unhealthy_until <= now
+            return (not healthy, -1.0 if state.latency is None else state.latency)
+
+        return sorted(urls, key=rank)
+
+    def success(self, url: str, seconds: float) -> None:
+        """Record a successful request and its latency."""
+        state = self._replicas.setdefault(url, _ReplicaState())
+        state.requests += 1
+        state.failures = 0
+        state.unhealthy_until = 0.0
+        if state.latency is None:
+            state.latency = seconds
+        else:
+            state.latency += self.alpha * (seconds - state.latency)
+
+    def failure(self, url: str) -> None:
+        """Record a failed request and take the replica out of rotation for a while."""
+        state = self._replicas.setdefault(url, _ReplicaState())
+        state.requests += 1
+        state.failures += 1
+        cooldown = min(self.cooldown * 2 ** (state.failures - 1), self.max_cooldown)
+        state.unhealthy_until = self._clock() + cooldown
+        logger.warning("Prometheus replica marked unhealthy", url=url, failures=state.failures, cooldown=cooldown)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return the latency and health of every replica seen so far."""
+        now = self._clock()
+        return {
+            url: {
+                "latency_ms": None if state.latency is None else round(state.latency * 1000, 3),
+                "healthy": state.unhealthy_until <= now,
+                "failures": state.failures,
+                "requests": state.requests,
+            }
+            for url, state in self._replicas.items()
+        }
+
+
+def merge_backend_results(results: Dict[str, Dict[str, Any]], label: str) -> Dict[str, Any]:
+    """Merge query results from several backends into one result.
+
+    Every series gets a label naming its backend, so identical series from
+    different backends stay distinct. Scalars become one vector sample per backend.
+
+    Args:
+        results: Query result data keyed by backend name
+        label: Name of the label identifying the backend
+
+    Returns:
+        Merged result with resultType vector or matrix
+
+    Raises:
+        ValueError: If the results have different types or are strings
+    """
+    result_types = {data["resultType"] for data in results.values()}
+    if len(result_types) > 1:
+        raise ValueError(f"Backends returned different result types: {', '.join(sorted(result_types))}")
+    result_type = result_types.pop() if result_types else "vector"
+    if result_type == "string":
+        raise ValueError("String results cannot be merged across backends")
+
+    merged = []
+    for name, data in results.items():
+        if result_type == "scalar":
+            merged.append({"metric": {label: name}, "value": data["result"]})
+            continue
+        for series in data["result"]:
+            merged.append(dict(series, metric=dict(series["metric"], **{label: name})))
+    return {"resultType": "vector" if result_type == "scalar" else result_type, "result": merged}
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+import orjson
+
+
+def make_cache_key(endpoint: str, params: Optional[Dict[str, Any]] = None) -> Tuple[Hashable, ...]:
+    """Build a hashable cache key from a Prometheus endpoint and its query parameters."""
+    if not params:
+        return (endpoint,)
+    return (endpoint,) + tuple(sorted((name, str(value)) for name, value in params.items() if value is not None))
+
+
+def estimate_size(value: Any) -> int:
+    """Estimate the memory footprint of a cached value from its JSON encoding."""
+    return len(orjson.dumps(value, default=str))
+
+
+class SizeMeasurement:
+    """Body bytes of the responses a value about to be cached is decoded from.
+
+    Measuring is cheaper than estimate_size(), which encodes the whole value
+    again. The measurement is only exact if the entire value came from
+    responses read while it was active.
+    """
+
+    __slots__ = ("bytes", "exact")
+
+    def __init__(self):
+        self.bytes = 0
+        self.exact = True
+
+    @property
+    def size(self) -> Optional[int]:
+        """Return the measured size, or None if it does not cover the whole value."""
+        return self.bytes if self.exact and self.bytes else None
+
+
+# Measurement of the value fetched on the current cache miss; child tasks share it
+_measurement: ContextVar[Optional[SizeMeasurement]] = ContextVar("cache_size_measurement", default=None)
+
+
+@contextmanager
+def measure_size() -> Iterator[SizeMeasurement]:
+    """Measure the responses read within the block, including by tasks it starts."""
+    measurement = SizeMeasurement()
+    token = _measurement.set(measurement)
+    try:
+        yield measurement
+    finally:
+        _measurement.reset(token)
+
+
+def record_response_size(size: int) -> None:
+    """Add the body length of a response to the active measurement, if any."""
+    measurement = _measurement.get()
+    if measurement is not None:
+        measurement.bytes += size
+
+
+def mark_size_inexact() -> None:
+    """Note that part of the value being measured did not come from a response read for it."""
+    measurement = _measurement.get()
+    if measurement is not None:
+        measurement.exact = False
+
+
+@dataclass
+class _CacheEntry:
+    value: Any
+    expires_at: float
+    size: int
+
+
+class ResultCache:
+    """In-process LRU cache with per-entry TTLs and a total memory bound.
+
+    Entries are evicted least-recently-used first once the estimated size of
+    all cached values exceeds ``max_bytes``. Expired entries are dropped lazily
+    when they are looked up or when space is needed.
+    """
+
+    def __init__(self, max_bytes: int, clock: Callable[[], float] = time.monotonic):
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, _CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss or expired entry."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= self._clock():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def set(self, key: Hashable, value: Any, ttl: float, size: Optional[int] = None) -> bool:
+        """Store a value for ttl seconds.
+
+        Args:
+            size: Size of the value in bytes, such as the length of the response it was
+                decoded from; estimated from its JSON encoding if None
+
+        Returns:
+            False if the value is larger than the whole cache and was not stored
+        """
+        if ttl <= 0:
+            return False
+        if size is None:
+            size = estimate_size(value)
+        if size > self.max_bytes:
+            return False
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _CacheEntry(value=value, expires_at=self._clock() + ttl, size=size)
+        self._bytes += size
+        self._evict()
+        return True
+
+    def clear(self) -> None:
+        """Drop every entry without touching the counters."""
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss/eviction counters and current occupancy."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _evict(self) -> None:
+        if self._bytes <= self.max_bytes:
+            return
+        now = self._clock()
+        for key in [key for key, entry in self._entries.items() if entry.expires_at <= now]:
+            self._remove(key)
+            self.expirations += 1
+        while self._bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
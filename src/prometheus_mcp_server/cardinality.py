@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+
+import asyncio
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from prometheus_mcp_server.json_codec import dumps
+from prometheus_mcp_server.logging_config import get_logger
+from prometheus_mcp_server.time_utils import format_timestamp
+
+logger = get_logger()
+
+Fetcher = Callable[..., Awaitable[Any]]
+
+# Rough JSON size of one sample ([<timestamp>, "<value>"]) in a query response
+SAMPLE_BYTES = 32
+
+
+class SelectorCardinality:
+    """Series count and label value distribution of the series matching one selector."""
+
+    def __init__(self, series: List[Dict[str, str]], limit: int):
+        self.series = len(series)
+        # Prometheus stops at the limit, so the count is only a lower bound then
+        self.truncated = limit > 0 and self.series >= limit
+        self.metrics: Counter = Counter()
+        self.labels: Dict[str, Counter] = {}
+        label_bytes = 0
+        for labels in series:
+            label_bytes += len(dumps({name: value for name, value in labels.items() if name != "__name__"}))
+            for name, value in labels.items():
+                if name == "__name__":
+                    self.metrics[value] += 1
+                else:
+                    self.labels.setdefault(name, Counter())[value] += 1
+        self.label_bytes = label_bytes
+
+    def estimated_bytes(self, samples_per_series: int = 1) -> int:
+        """Estimate the JSON size of a query result over these series."""
+        return self.label_bytes + self.series * (SAMPLE_BYTES * samples_per_series + 20)
+
+    def summary(self, topk: int) -> Dict[str, Any]:
+        """Return the series count, the largest metrics and the labels with the most values."""
+        labels = sorted(self.labels.items(), key=lambda item: (-len(item[1]), item[0]))
+        return {
+            "series": self.series,
+            "truncated": self.truncated,
+            "estimatedBytes": self.estimated_bytes(),
+            "metrics": [{"metric": name, "series": count} for name, count in self.metrics.most_common(topk)],
+            "labels": [
+                {
+                    "label": name,
+                    "values": len(values),
+                    "topValues": [{"value": value, "series": count} for value, count in values.most_common(topk)],
+                }
+                for name, values in labels[:topk]
+            ],
+        }
+
+
+class CardinalityCache:
+    """Cached cardinality figures of each backend.
+
+    The TSDB status (head series per metric, label and label pair) is fetched
+    once per backend and refreshed in the background for every backend that
+    has been asked about. Selector and label value analyses are kept for ``ttl``
+    seconds in a bounded LRU.
+    """
+
+    def __init__(
+        self,
+        fetch: Fetcher,
+        ttl: float = 300.0,
+        series_limit: int = 10000,
+        lookback: float = 3600.0,
+        status_limit: int = 50,
+        max_entries: int = 256,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._fetch = fetch
+        self.ttl = ttl
+        self.series_limit = series_limit
+        self.lookback = lookback
+        self.status_limit = status_limit
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = asyncio.Lock()
+        self._refresh_tasks: Dict[Optional[str], asyncio.Task] = {}
+        self.clear()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def clear(self) -> None:
+        """Forget every cached analysis."""
+        # Backend name -> (loaded at, TSDB status)
+        self._status: Dict[Optional[str], Tuple[float, Dict[str, Any]]] = {}
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    async def tsdb_status(self, backend: Optional[str] = None) -> Dict[str, Any]:
+        """Return the TSDB status of a backend, loading it on first use.
+
+        Once the TTL has passed the previous status is still returned while
+        a background refresh replaces it.
+        """
+        cached = self._status.get(backend)
+        if cached is None:
+            self.misses += 1
+            async with self._lock:
+                if backend not in self._status:
+                    await self._load_status(backend)
+            return self._status[backend][1]
+        self.hits += 1
+        task = self._refresh_tasks.get(backend)
+        if self._clock() - cached[0] >= self.ttl and (task is None or task.done()):
+            self._refresh_tasks[backend] = asyncio.create_task(self._refresh_quietly(backend))
+        return cached[1]
+
+    async def selector(
+        self,
+        selector: str,
+        backend: Optional[str] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> SelectorCardinality:
+        """Analyze the series matching a selector between start and end (default: the lookback window)."""
+        key = ("series", backend, selector, start, end)
+
+        async def load():
+            window_end = end if end is not None else time.time()
+            window_start = start if start is not None else window_end - self.lookback
+            params = {"match[]": selector, "start": format_timestamp(window_start), "end": format_timestamp(window_end)}
+            if self.series_limit > 0:
+                params["limit"] = self.series_limit
+            series = await self._fetch("series", params=params, backend=backend)
+            if self.series_limit > 0:
+                # Older Prometheus versions ignore the limit parameter
+                series = series[:self.series_limit]
+            return SelectorCardinality(series, self.series_limit)
+
+        return await self._cached(key, load)
+
+    async def series_count(self, selector: str, backend: Optional[str] = None) -> Tuple[int, bool]:
+        """Return the number of series matching a selector and whether it was capped at the series limit."""
+        analysis = await self.selector(selector, backend)
+        return analysis.series, analysis.truncated
+
+    async def series_upper_bound(self, metric: Optional[str], backend: Optional[str] = None) -> Optional[int]:
+        """Bound the series of a metric from the cached TSDB status, without a request per metric.
+
+        The status lists the metrics with the most series. A metric missing from
+        a full list has at most as many series as the smallest one listed, and
+        none if the list was not cut off. Selectors without a metric name are
+        bounded by all head series.
+
+        Returns:
+            The bound, or None if the status has no series counts to bound it with
+        """
+        status = await self.tsdb_status(backend)
+        total = status.get("headStats", {}).get("numSeries")
+        counts = status.get("seriesCountByMetricName") or []
+        if metric is None or not counts:
+            return total
+        for entry in counts:
+            if entry["name"] == metric:
+                return entry["value"]
+        if self.status_limit > 0 and len(counts) >= self.status_limit:
+            return min(entry["value"] for entry in counts)
+        return 0
+
+    async def label_values(self, label: str, selector: Optional[str] = None,
+                           backend: Optional[str] = None) -> List[str]:
+        """Return the values of a label, optionally only on series matching a selector."""
+        key = ("label", backend, label, selector)
+
+        async def load():
+            params = {"match[]": selector} if selector else None
+            return await self._fetch(f"label/{label}/values", params=params, backend=backend)
+
+        return await self._cached(key, load)
+
+    async def run(self, interval: float) -> None:
+        """Refresh the TSDB status of every backend seen so far, every interval seconds, until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            for backend in list(self._status):
+                await self._refresh_quietly(backend)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return lookup counters and the number of cached analyses."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "entries": len(self._entries) + len(self._status),
+        }
+
+    async def _cached(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        cached = self._entries.get(key)
+        if cached is not None and self._clock() - cached[0] < self.ttl:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        value = await load()
+        self._entries[key] = (self._clock(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+    async def _load_status(self, backend: Optional[str]) -> None:
+        params = {"limit": self.status_limit} if self.status_limit > 0 else None
+        status = await self._fetch("status/tsdb", params=params, backend=backend)
+        self._status[backend] = (self._clock(), status)
+        self.refreshes += 1
+        logger.info("TSDB status refreshed", backend=backend,
+                    series=status.get("headStats", {}).get("numSeries"))
+
+    async def _refresh_quietly(self, backend: Optional[str]) -> None:
+        try:
+            await self._load_status(backend)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("TSDB status refresh failed", backend=backend, error=str(e),
+                           error_type=type(e).__name__)
+
+
+def status_overview(status: Dict[str, Any], topk: int) -> Dict[str, Any]:
+    """Condense a TSDB status response into the largest metrics, labels and label pairs."""
+    head = status.get("headStats", {})
+
+    def top(entries, key):
+        return [{key: entry["name"], "series" if key != "label" else "values": entry["value"]}
+                for entry in (entries or [])[:topk]]
+
+    return {
+        "totalSeries": head.get("numSeries"),
+        "labelPairs": head.get("numLabelPairs"),
+        "topMetrics": top(status.get("seriesCountByMetricName"), "metric"),
+        "topLabels": top(status.get("labelValueCountByLabelName"), "label"),
+        "topLabelPairs": top(status.get("seriesCountByLabelValuePair"), "pair"),
+    }
@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from prometheus_mcp_server.json_codec import dumps, loads
+from prometheus_mcp_server.logging_config import get_logger
+
+logger = get_logger()
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS entries (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        expires_at REAL,
+        used_at REAL NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS entries_used_at ON entries (used_at)",
+    "CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at)",
+)
+
+# Hits only record their access time when the last one is older than this (seconds),
+# so reads of popular entries rarely need the write lock
+_TOUCH_INTERVAL = 60.0
+
+
+class DiskCache:
+    """Cache of JSON values in a SQLite file that several server processes can share.
+
+    Entries stored with a TTL expire after it, entries stored without one only
+    leave the cache when it is full, least-recently-used first once the stored
+    values exceed ``max_bytes``. The database runs in WAL mode, so processes
+    read while another one writes, and every write is a single transaction, so
+    a process that dies never leaves a partial entry behind.
+
+    Database errors are logged and counted, and the lookup is treated as a miss:
+    a locked, full or corrupt file costs an upstream request, never a tool call.
+
+    stats() never touches the database, so it is safe to call from the event
+    loop. The occupancy it reports is the file's as of this process's last
+    write, or as of the last refresh_occupancy() call.
+    """
+
+    def __init__(self, path: str, max_bytes: int, clock: Callable[[], float] = time.time, timeout: float = 5.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        # Wall clock time: expiry times are compared across processes
+        self._clock = clock
+        self._timeout = timeout
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.errors = 0
+        # Entries and bytes in the file shared by all processes, as last seen by this one
+        self.entries = 0
+        self.bytes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self._timeout, isolation_level=None, check_same_thread=False)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                for statement in _SCHEMA:
+                    conn.execute(statement)
+                self.entries, self.bytes = self._occupancy(conn)
+            except sqlite3.Error:
+                conn.close()
+                raise
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _occupancy(conn: sqlite3.Connection) -> Tuple[int, int]:
+        entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return entries, size
+
+    def _failed(self, action: str, error: Exception) -> None:
+        self.errors += 1
+        logger.warning("Disk cache failed", action=action, path=self.path, error=str(error))
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the stored value for key, or None on a miss, an expired entry or an error."""
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT value, size, expires_at, used_at FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                value, size, expires_at, used_at = row
+                now = self._clock()
+                if expires_at is not None and expires_at <= now:
+                    if conn.execute("DELETE FROM entries WHERE key = ? AND expires_at <= ?", (key, now)).rowcount:
+                        self.entries = max(self.entries - 1, 0)
+                        self.bytes = max(self.bytes - size, 0)
+                    self.expirations += 1
+                    self.misses += 1
+                    return None
+                if now - used_at >= _TOUCH_INTERVAL:
+                    conn.execute("UPDATE entries SET used_at = ? WHERE key = ?", (now, key))
+                data = loads(value)
+            except (sqlite3.Error, ValueError) as e:
+                self._failed("get", e)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return data
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Store a value for ttl seconds, or until it is evicted if ttl is None.
+
+        Returns:
+            False if the value was not stored: a TTL of 0, a value larger than
+            the whole cache or a database error
+        """
+        if ttl is not None and ttl <= 0:
+            return False
+        data = dumps(value)
+        size = len(data)
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            try:
+                conn = self._connect()
+                now = self._clock()
+                # Take the write lock up front: the eviction below depends on the total just computed
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO entries (key, value, size, expires_at, used_at) VALUES (?, ?, ?, ?, ?)",
+                        (key, data, size, None if ttl is None else now + ttl, now),
+                    )
+                    occupancy = self._evict(conn, key, now)
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+            except sqlite3.Error as e:
+                self._failed("set", e)
+                return False
+            self.entries, self.bytes = occupancy
+            self.writes += 1
+            return True
+
+    def _evict(self, conn: sqlite3.Connection, key: str, now: float) -> Tuple[int, int]:
+        """Drop expired entries, then least recently used ones until the file fits, returning its occupancy."""
+        self.expirations += conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,)).rowcount
+        entries, total = self._occupancy(conn)
+        if total <= self.max_bytes:
+            return entries, total
+        victims = []
+        for victim, size in conn.execute("SELECT key, size FROM entries WHERE key != ? ORDER BY used_at", (key,)):
+            victims.append((victim,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+        conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+        self.evictions += len(victims)
+        return entries - len(victims), total
+
+    def refresh_occupancy(self) -> None:
+        """Read the entries and bytes of the file, including other processes' writes.
+
+        Queries the database, so call it from a worker thread.
+        """
+        with self._lock:
+            try:
+                self.entries, self.bytes = self._occupancy(self._connect())
+            except sqlite3.Error as e:
+                self._failed("stats", e)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/write/eviction counters and the last seen occupancy, without touching the database."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "errors": self.errors,
+            "entries": self.entries,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "path": self.path,
+        }
+
+    def clear(self) -> None:
+        """Remove every entry, for all processes sharing the file."""
+        with self._lock:
+            try:
+                self._connect().execute("DELETE FROM entries")
+                self.entries, self.bytes = 0, 0
+            except sqlite3.Error as e:
+                self._failed("clear", e)
+
+    def close(self) -> None:
+        """Close the database connection; the next call opens it again."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+
+import csv
+import hashlib
+import math
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+EXPORT_FORMATS = ("csv", "arrow", "parquet")
+
+# Rows per Arrow record batch / Parquet row group chunk, bounding the memory used while writing
+CHUNK_ROWS = 65536
+
+_EXTENSIONS = {"csv": "csv", "arrow": "arrow", "parquet": "parquet"}
+
+
+def validate_export_format(fmt: str) -> None:
+    """Check an export format before any query is sent.
+
+    Raises:
+        ValueError: If the format is unknown
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}', expected one of {', '.join(EXPORT_FORMATS)}")
+
+
+def export_path(directory: str, query: str, params: Dict[str, Any], fmt: str) -> Path:
+    """Return the file path in the export directory for a query's result.
+
+    The name only depends on the query and its parameters, so exporting the
+    same query again replaces its file instead of adding another one.
+    """
+    digest = hashlib.sha1(repr((query, sorted(params.items()))).encode()).hexdigest()[:16]
+    return Path(directory) / f"range-{digest}.{_EXTENSIONS[fmt]}"
+
+
+def prune_exports(directory: str, max_files: int, max_age: float, now: Optional[float] = None) -> int:
+    """Delete old exports so the export directory does not grow without bound.
+
+    Exports older than max_age seconds are deleted, then the least recently
+    written ones beyond max_files; 0 disables either limit. Partial files left
+    by interrupted exports are deleted once older than max_age. Only files
+    named like exports are considered.
+
+    Returns:
+        Number of files deleted
+    """
+    now = time.time() if now is None else now
+    exports, partials = [], []
+    for path in Path(directory).glob("range-*"):
+        try:
+            modified = path.stat().st_mtime
+        except FileNotFoundError:
+            continue
+        (partials if path.name.endswith(".partial") else exports).append((modified, path))
+    exports.sort(reverse=True)
+    removed = 0
+    for index, (modified, path) in enumerate(exports + partials):
+        expired = max_age > 0 and now - modified > max_age
+        excess = max_files > 0 and index >= max_files and index < len(exports)
+        if expired or excess:
+            try:
+                path.unlink()
+                removed += 1
+            except FileNotFoundError:
+                # Another process pruned it first
+                pass
+    return removed
+
+
+def label_columns(result: List[Dict[str, Any]]) -> List[str]:
+    """Return the label names of all series, __name__ first and the others sorted."""
+    names = set()
+    for series in result:
+        names.update(series["metric"])
+    return sorted(names, key=lambda name: (name != "__name__", name))
+
+
+class _Stats:
+    """Sample count, time range and value range of the written samples."""
+
+    def __init__(self):
+        self.samples = 0
+        self.start = math.inf
+        self.end = -math.inf
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, samples: List[List[Any]]) -> None:
+        if not samples:
+            return
+        self.samples += len(samples)
+        self.start = min(self.start, samples[0][0])
+        self.end = max(self.end, samples[-1][0])
+        for _, value in samples:
+            number = float(value)
+            if math.isfinite(number):
+                if number < self.min:
+                    self.min = number
+                if number > self.max:
+                    self.max = number
+
+    def summary(self) -> Dict[str, Any]:
+        def finite(value):
+            return value if math.isfinite(value) else None
+        return {"samples": self.samples, "start": finite(self.start), "end": finite(self.end),
+                "min": finite(self.min), "max": finite(self.max)}
+
+
+def _write_csv(result: List[Dict[str, Any]], path: Path, labels: List[str], stats: _Stats) -> None:
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["timestamp", "value"] + labels)
+        for series in result:
+            samples = series["values"]
+            stats.add(samples)
+            label_values = [series["metric"].get(name, "") for name in labels]
+            writer.writerows([timestamp, value] + label_values for timestamp, value in samples)
+
+
+def _chunks(result: List[Dict[str, Any]], labels: List[str], chunk_rows: int,
+            stats: _Stats) -> Iterator[Tuple[List[int], List[float], Dict[str, List[str]]]]:
+    """Yield columns of at most chunk_rows samples, splitting long series across chunks."""
+    timestamps: List[int] = []
+    values: List[float] = []
+    columns: Dict[str, List[str]] = {name: [] for name in labels}
+    for series in result:
+        samples = series["values"]
+        stats.add(samples)
+        offset = 0
+        while offset < len(samples):
+            part = samples[offset:offset + chunk_rows - len(timestamps)]
+            offset += len(part)
+            timestamps.extend(round(timestamp * 1000) for timestamp, _ in part)
+            values.extend(float(value) for _, value in part)
+            for name in labels:
+                columns[name].extend([series["metric"].get(name)] * len(part))
+            if len(timestamps) >= chunk_rows:
+                yield timestamps, values, columns
+                timestamps, values, columns = [], [], {name: [] for name in labels}
+    if timestamps:
+        yield timestamps, values, columns
+
+
+def _pyarrow(fmt: str):
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        if fmt == "parquet":
+            import pyarrow.parquet
+    except ImportError as e:
+        raise ValueError(
+            f"Exporting to {fmt} requires pyarrow, install it with: pip install 'prometheus_mcp_server[export]'"
+        ) from e
+    return pyarrow
+
+
+def _write_arrow(result: List[Dict[str, Any]], path: Path, fmt: str, labels: List[str], stats: _Stats,
+                 chunk_rows: int) -> None:
+    pa = _pyarrow(fmt)
+    # Plain string columns: the IPC file format cannot change dictionaries between batches
+    schema = pa.schema(
+        [pa.field("timestamp", pa.timestamp("ms", tz="UTC")), pa.field("value", pa.float64())]
+        + [pa.field(name, pa.string()) for name in labels]
+    )
+    if fmt == "parquet":
+        writer = pa.parquet.ParquetWriter(str(path), schema)
+        sink = None
+    else:
+        sink = pa.OSFile(str(path), "wb")
+        writer = pa.ipc.new_file(sink, schema)
+    try:
+        for timestamps, values, columns in _chunks(result, labels, chunk_rows, stats):
+            arrays = [pa.array(timestamps, pa.timestamp("ms", tz="UTC")), pa.array(values, pa.float64())]
+            arrays += [pa.array(columns[name], pa.string()) for name in labels]
+            writer.write_batch(pa.record_batch(arrays, schema=schema))
+    finally:
+        writer.close()
+        if sink is not None:
+            sink.close()
+
+
+def export_matrix(result: List[Dict[str, Any]], path: Path, fmt: str, chunk_rows: int = CHUNK_ROWS) -> Dict[str, Any]:
+    """Write the samples of a matrix to a file, one row per sample with a column per label.
+
+    Series are written one after another in chunks of at most chunk_rows
+    samples, so no second copy of the whole result is built. The file is
+    written under a temporary name and renamed when complete, so readers
+    never see a partial file.
+
+    Args:
+        result: Series of a matrix result
+        path: File to write
+        fmt: 'csv', 'arrow' (Arrow IPC file, memory-mappable) or 'parquet'
+        chunk_rows: Maximum samples per Arrow record batch
+
+    Returns:
+        Summary with the file path and URI, size in bytes, columns, series and
+        sample counts, time range and value range
+
+    Raises:
+        ValueError: If the format is unknown or its library is not installed
+    """
+    validate_export_format(fmt)
+    labels = label_columns(result)
+    stats = _Stats()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Unique per export, so concurrent exports of the same query never write to one file
+    partial = path.with_name(f"{path.name}.{uuid.uuid4().hex[:8]}.partial")
+    try:
+        if fmt == "csv":
+            _write_csv(result, partial, labels, stats)
+        else:
+            _write_arrow(result, partial, fmt, labels, stats, chunk_rows)
+        os.replace(partial, path)
+    finally:
+        if partial.exists():
+            partial.unlink()
+    return dict(
+        format=fmt,
+        path=str(path),
+        uri=path.resolve().as_uri(),
+        bytes=path.stat().st_size,
+        columns=["timestamp", "value"] + labels,
+        series=len(result),
+        **stats.summary(),
+    )
@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from prometheus_mcp_server.logging_config import get_logger
+from prometheus_mcp_server.range_split import is_retryable
+
+logger = get_logger()
+
+
+def is_overloaded(error: Exception) -> bool:
+    """Check whether a failed request signals that Prometheus is overloaded."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in (429, 503)
+    return isinstance(error, httpx.TimeoutException)
+
+
+def backoff_delay(attempt: int, base: float, maximum: float) -> float:
+    """Return a random retry delay with exponential backoff and full jitter.
+
+    Args:
+        attempt: Number of the retry, starting at 1
+        base: Upper bound of the first delay in seconds, doubled on every retry
+        maximum: Upper bound of any delay in seconds
+    """
+    return random.uniform(0, min(maximum, base * 2 ** (attempt - 1)))
+
+
+def _remaining(deadline: Optional[float]) -> Optional[float]:
+    if deadline is None:
+        return None
+    return deadline - asyncio.get_running_loop().time()
+
+
+class AdaptiveLimiter:
+    """Token bucket and concurrency limit for one backend, adapted to how it copes.
+
+    Both limits shrink multiplicatively when the backend answers 429/503,
+    times out or responds slower than ``latency_threshold``, and grow back
+    additively with every healthy response, up to the configured maximum.
+    Callers waiting for a token or a slot give up once their deadline passes.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        rate: float = 0.0,
+        burst: Optional[float] = None,
+        latency_threshold: float = 10.0,
+        min_concurrency: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.limit = float(self.max_concurrency)
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.latency_threshold = latency_threshold
+        self._clock = clock
+        self._tokens = self.burst
+        self._refilled_at = clock()
+        self._condition = asyncio.Condition()
+        self.in_flight = 0
+        self.queued = 0
+        self.rejected = 0
+        self.overloads = 0
+        self.retries = 0
+        self.hedges = 0
+
+    @asynccontextmanager
+    async def slot(self, deadline: Optional[float] = None) -> AsyncIterator[None]:
+        """Hold a token and a concurrency slot for the duration of a request.
+
+        Args:
+            deadline: Event loop time after which waiting is abandoned
+
+        Raises:
+            TimeoutError: If no slot became free before the deadline
+        """
+        self.queued += 1
+        try:
+            await self._take_token(deadline)
+            await self._acquire(deadline)
+        except TimeoutError:
+            self.rejected += 1
+            raise
+        finally:
+            self.queued -= 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self.in_flight -= 1
+                self._condition.notify()
+
+    def record_success(self, seconds: float) -> None:
+        """Adapt the limits to a successful request and its latency."""
+        if seconds > self.latency_threshold:
+            self._decrease("slow response")
+            return
+        self.limit = min(self.max_concurrency, self.limit + 1 / max(self.limit, 1.0))
+        if self.max_rate > 0:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+    def record_hedge(self) -> None:
+        """Count a request hedged to another replica."""
+        self.hedges += 1
+
+    def record_failure(self, error: Exception) -> None:
+        """Adapt the limits to a failed request."""
+        if is_overloaded(error):
+            self._decrease(type(error).__name__)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the current limits, queue length and counters."""
+        return {
+            "concurrency_limit": int(self.limit),
+            "rate_limit": round(self.rate, 3) if self.max_rate > 0 else None,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "overloads": self.overloads,
+            "retries": self.retries,
+            "hedges": self.hedges,
+        }
+
+    def _decrease(self, reason: str) -> None:
+        self.overloads += 1
+        self.limit = max(float(self.min_concurrency), self.limit / 2)
+        if self.max_rate > 0:
+            self.rate = max(self.max_rate * 0.05, self.rate / 2)
+        logger.warning("Prometheus backpressure, reducing request limits", reason=reason,
+                       concurrency_limit=int(self.limit), rate_limit=self.rate if self.max_rate > 0 else None)
+
+    async def _take_token(self, deadline: Optional[float]) -> None:
+        if self.max_rate <= 0:
+            return
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+        self._tokens -= 1
+        wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        remaining = _remaining(deadline)
+        if remaining is not None and wait > remaining:
+            self._tokens += 1
+            raise TimeoutError("Deadline exceeded while waiting for the Prometheus rate limit")
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def _acquire(self, deadline: Optional[float]) -> None:
+        async with self._condition:
+            while self.in_flight >= int(self.limit):
+                remaining = _remaining(deadline)
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("Deadline exceeded while waiting for a Prometheus request slot")
+                try:
+                    await asyncio.wait_for(self._condition.wait(), remaining)
+                except asyncio.TimeoutError:
+                    raise TimeoutError("Deadline exceeded while waiting for a Prometheus request slot") from None
+            self.in_flight += 1
+
+
+async def hedged(replicas: List[str], send: Callable[[str], Awaitable[Any]], hedge_delay: float = 0.0,
+                 on_hedge: Optional[Callable[[], None]] = None) -> Any:
+    """Send a request to replicas in order until one succeeds, hedging slow ones.
+
+    The next replica is tried right away when one fails with a transient error,
+    and also, without cancelling the slow one, when no replica answered within
+    hedge_delay seconds. The first successful response wins.
+
+    Args:
+        replicas: Replica URLs, preferred first
+        send: Coroutine function sending the request to one replica
+        hedge_delay: Seconds to wait before hedging to the next replica, 0 to never hedge
+        on_hedge: Called whenever a hedged request is started
+
+    Returns:
+        The first successful response
+    """
+    remaining = list(replicas)
+    pending = set()
+    errors: List[Exception] = []
+
+    def start() -> None:
+        pending.add(asyncio.ensure_future(send(remaining.pop(0))))
+
+    start()
+    try:
+        while pending:
+            timeout = hedge_delay if remaining and hedge_delay > 0 else None
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                if on_hedge is not None:
+                    on_hedge()
+                start()
+                continue
+            for task in done:
+                error = task.exception()
+                if error is None:
+                    return task.result()
+                if not is_retryable(error):
+                    raise error
+                errors.append(error)
+            if remaining:
+                start()
+        raise errors[-1]
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+
+from typing import Any
+
+import httpx
+
+from prometheus_mcp_server.logging_config import get_logger
+
+logger = get_logger()
+
+
+def http2_available() -> bool:
+    """Check whether the optional HTTP/2 support for httpx is installed.
+
+    Returns:
+        True if the ``h2`` package can be imported
+    """
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def create_http_client(config: Any) -> httpx.AsyncClient:
+    """Create a pooled, keep-alive async HTTP client for Prometheus requests.
+
+    Args:
+        config: PrometheusConfig holding pool limits, timeouts and HTTP/2 preference
+
+    Returns:
+        Configured httpx.AsyncClient instance
+    """
+    http2 = config.http2 and http2_available()
+    if config.http2 and not http2:
+        logger.warning("HTTP/2 requested but the 'h2' package is not installed, falling back to HTTP/1.1")
+
+    limits = httpx.Limits(
+        max_connections=config.max_connections,
+        max_keepalive_connections=config.max_keepalive_connections,
+        keepalive_expiry=config.keepalive_expiry,
+    )
+    timeout = httpx.Timeout(config.timeout, connect=config.connect_timeout)
+
+    logger.info(
+        "Prometheus HTTP client created",
+        http2=http2,
+        max_connections=config.max_connections,
+        max_keepalive_connections=config.max_keepalive_connections,
+        timeout=config.timeout,
+    )
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
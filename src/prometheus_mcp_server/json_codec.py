@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+
+from typing import Any, Optional, Tuple
+
+import httpx
+import orjson
+
+
+def loads(data: Any) -> Any:
+    """Decode JSON from bytes, bytearray, memoryview or str with orjson."""
+    return orjson.loads(data)
+
+
+def dumps(value: Any) -> str:
+    """Encode a value as compact JSON text with orjson."""
+    return orjson.dumps(value, default=_default, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+
+def _default(value: Any) -> Any:
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+
+def _content_length(response: httpx.Response) -> Optional[int]:
+    # Content-Length is the encoded size, so it only sizes the buffer for identity encoding
+    if response.headers.get("content-encoding", "identity") != "identity":
+        return None
+    try:
+        return int(response.headers["content-length"])
+    except (KeyError, ValueError):
+        return None
+
+
+async def read_json(response: httpx.Response) -> Tuple[Any, int]:
+    """Stream a response body into a single buffer and decode it with orjson.
+
+    Unlike ``response.json()`` this never holds a decoded ``str`` copy of the
+    body next to the raw bytes, and the buffer is preallocated when the body
+    size is known so it is not repeatedly grown while chunks arrive.
+
+    Returns:
+        The decoded value and the length of the body in bytes, after content decoding
+    """
+    size = _content_length(response)
+    buffer = bytearray(size or 0)
+    view = memoryview(buffer)
+    offset = 0
+    async for chunk in response.aiter_bytes():
+        end = offset + len(chunk)
+        if end > len(buffer):
+            view.release()
+            buffer[offset:] = chunk
+            view = memoryview(buffer)
+        else:
+            view[offset:end] = chunk
+        offset = end
+    try:
+        return orjson.loads(view[:offset]), offset
+    finally:
+        view.release()
+
@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Return a module that is only executed on first attribute access.
+
+    Keeps heavy dependencies such as numpy off the startup path of every
+    session; they are loaded by the first tool call that needs them.
+
+    Args:
+        name: Absolute module name
+
+    Returns:
+        The module, already loaded if it was imported before
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
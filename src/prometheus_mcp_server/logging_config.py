@@ -1,52 +1,228 @@
 #!/usr/bin/env python
 
+import atexit
+import json
 import logging
+import os
+import queue
 import sys
-from typing import Any, Dict
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, TextIO
 
 import structlog
 
+from prometheus_mcp_server.json_codec import dumps
 
-def setup_logging() -> structlog.BoundLogger:
+# Writer installed by setup_logging
+_writer: Optional["LogWriter"] = None
+_atexit_registered = False
+
+
+class LogWriter:
+    """Bounded queue of log lines that a background thread writes to a stream.
+
+    Lines queued while the thread is writing are written together, with one
+    flush per batch. Lines arriving while the queue is full are dropped instead
+    of blocking the caller.
+    """
+
+    _STOP = object()
+
+    def __init__(self, stream: TextIO, max_size: int = 10000, batch_size: int = 1000):
+        self.stream = stream
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(max(max_size, 0))
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def put(self, line: str) -> None:
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self) -> None:
+        """Write out the queued lines and stop the thread."""
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = self._STOP in batch
+            lines = [line for line in batch if line is not self._STOP]
+            if lines:
+                try:
+                    self.stream.write("\n".join(lines) + "\n")
+                    self.stream.flush()
+                except (OSError, ValueError):
+                    # The stream was closed, e.g. by the client at shutdown
+                    pass
+            if stop:
+                return
+
+
+class QueueLogger:
+    """structlog logger that hands rendered lines to the writer installed by setup_logging."""
+
+    def msg(self, message: str) -> None:
+        writer = _writer
+        if writer is not None:
+            writer.put(message)
+
+    log = debug = info = warn = warning = error = err = critical = exception = fatal = failure = msg
+
+
+_queue_logger = QueueLogger()
+
+
+class EventRateLimiter:
+    """Processor that passes at most rate debug and info events of each kind per second.
+
+    Events are told apart by their message. Dropped events are counted, and the
+    next event of the same kind that is logged reports the count under
+    'suppressed'. Warnings and errors are never dropped.
+    """
+
+    def __init__(self, rate: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self._clock = clock
+        # Event message -> [window start, events passed, events dropped]
+        self._windows: Dict[str, List[float]] = {}
+
+    def __call__(self, logger: Any, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+        if self.rate <= 0 or method_name not in ("debug", "info"):
+            return event_dict
+        event = event_dict.get("event")
+        now = self._clock()
+        window = self._windows.get(event)
+        if window is None or now - window[0] >= 1.0:
+            if window is not None and window[2]:
+                event_dict["suppressed"] = int(window[2])
+            self._windows[event] = [now, 1, 0]
+            return event_dict
+        if window[1] < self.rate:
+            window[1] += 1
+            return event_dict
+        window[2] += 1
+        raise structlog.DropEvent
+
+
+def truncate_query(value: str, max_length: int) -> str:
+    """Shorten a query to max_length characters, noting its full length."""
+    if max_length <= 0 or len(value) <= max_length:
+        return value
+    return f"{value[:max_length]}...({len(value)} chars)"
+
+
+class QueryTruncator:
+    """Processor that shortens the 'query' field and the query in 'params' to a maximum length."""
+
+    def __init__(self, max_length: int):
+        self.max_length = max_length
+
+    def __call__(self, logger: Any, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+        query = event_dict.get("query")
+        if isinstance(query, str):
+            event_dict["query"] = truncate_query(query, self.max_length)
+        params = event_dict.get("params")
+        if isinstance(params, dict) and isinstance(params.get("query"), str):
+            event_dict["params"] = dict(params, query=truncate_query(params["query"], self.max_length))
+        return event_dict
+
+
+def _serialize(event_dict: Dict[str, Any], **kwargs: Any) -> str:
+    try:
+        return dumps(event_dict)
+    except TypeError:
+        # orjson rejects some values the standard encoder accepts, such as non-string keys
+        return json.dumps(event_dict, default=str)
+
+
+def setup_logging(stream: Optional[TextIO] = None) -> structlog.BoundLogger:
     """Configure structured JSON logging for the MCP server.
-    
+
+    Events below the level set with PROMETHEUS_MCP_LOG_LEVEL are discarded
+    before they are built. Enabled events are rendered to JSON with orjson and
+    queued for a background thread that writes them to the stream, so tool
+    calls never wait for the stream, e.g. a client reading stderr slowly.
+
+    Args:
+        stream: Stream the log lines are written to (default: stderr)
+
     Returns:
         Configured structlog logger instance
     """
-    # Configure structlog to use standard library logging
+    global _writer, _atexit_registered
+    level = logging.getLevelName(os.environ.get("PROMETHEUS_MCP_LOG_LEVEL", "INFO").strip().upper())
+    if not isinstance(level, int):
+        level = logging.INFO
+    rate_limit = int(os.environ.get("PROMETHEUS_MCP_LOG_RATE_LIMIT", "20"))
+    max_query_length = int(os.environ.get("PROMETHEUS_MCP_LOG_MAX_QUERY_LENGTH", "500"))
+    queue_size = int(os.environ.get("PROMETHEUS_MCP_LOG_QUEUE_SIZE", "10000"))
+
     structlog.configure(
         processors=[
-            # Add timestamp to every log record
             structlog.stdlib.add_log_level,
+            # Drop repetitive events before any work is spent on them
+            EventRateLimiter(rate_limit),
+            QueryTruncator(max_query_length),
+            # Add timestamp to every log record
             structlog.processors.TimeStamper(fmt="iso"),
             # Add structured context
             structlog.processors.StackInfoRenderer(),
             structlog.processors.format_exc_info,
             # Convert to JSON
-            structlog.processors.JSONRenderer()
+            structlog.processors.JSONRenderer(serializer=_serialize),
         ],
-        wrapper_class=structlog.stdlib.BoundLogger,
-        logger_factory=structlog.stdlib.LoggerFactory(),
+        # Calls below the level are no-ops, so their events are never built
+        wrapper_class=structlog.make_filtering_bound_logger(level),
+        # Rendered lines go straight to the queue: no stdlib log records or caller lookups
+        logger_factory=lambda *args: _queue_logger,
         context_class=dict,
         cache_logger_on_first_use=True,
     )
-    
-    # Configure standard library logging to output to stderr
-    logging.basicConfig(
-        format="%(message)s",
-        stream=sys.stderr,
-        level=logging.INFO,
-    )
-    
+
+    stop_logging()
+    _writer = LogWriter(stream or sys.stderr, queue_size)
+    _writer.start()
+    if not _atexit_registered:
+        # Write out what is still queued when the process exits
+        atexit.register(stop_logging)
+        _atexit_registered = True
+
     # Create and return the logger
     logger = structlog.get_logger("prometheus_mcp_server")
     return logger
 
 
+def stop_logging() -> None:
+    """Write out the queued log lines and stop the writer installed by setup_logging."""
+    global _writer
+    writer, _writer = _writer, None
+    if writer is not None:
+        writer.stop()
+
+
+def dropped_records() -> int:
+    """Return the number of log lines dropped because the queue was full."""
+    return _writer.dropped if _writer is not None else 0
+
+
 def get_logger() -> structlog.BoundLogger:
     """Get the configured logger instance.
-    
+
     Returns:
         Configured structlog logger instance
     """
-    return structlog.get_logger("prometheus_mcp_server") 
\ No newline at end of file
+    return structlog.get_logger("prometheus_mcp_server")
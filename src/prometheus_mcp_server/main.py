@@ -1,14 +1,17 @@
 #!/usr/bin/env python
 import sys
-import dotenv
-from prometheus_mcp_server.server import mcp, config
+import anyio
+from prometheus_mcp_server.server import mcp, config, env_file_loaded, server_lifespan, tool_calls
+from prometheus_mcp_server.query_cost import GUARD_MODES
+from prometheus_mcp_server.sse_transport import SessionManager, create_sse_app, serve_sse
 from prometheus_mcp_server.logging_config import setup_logging, get_logger
 
 # Initialize structured logging
 logger = setup_logging()
 
 def setup_environment():
-    if dotenv.load_dotenv():
+    # The .env file was already loaded when the server module read its configuration
+    if env_file_loaded:
         logger.info("Environment configuration loaded", source=".env file")
     else:
         logger.info("Environment configuration loaded", source="environment variables", note="No .env file found")
@@ -21,6 +24,14 @@ def setup_environment():
             example="http://your-prometheus-server:9090"
         )
         return False
+
+    if config.query_guard not in GUARD_MODES:
+        logger.error(
+            "Invalid configuration",
+            error=f"PROMETHEUS_QUERY_GUARD must be one of {', '.join(GUARD_MODES)}",
+            value=config.query_guard,
+        )
+        return False
     
     # Determine authentication method
     auth_method = "none"
@@ -45,10 +56,24 @@ def run_server():
         logger.error("Environment setup failed, exiting")
         sys.exit(1)
     
-    logger.info("Starting Prometheus MCP Server", transport="stdio")
-    
-    # Run the server with the stdio transport
-    mcp.run(transport="stdio")
+    if config.transport not in ("stdio", "sse"):
+        logger.error("Unsupported transport", transport=config.transport, expected="stdio or sse")
+        sys.exit(1)
+
+    logger.info("Starting Prometheus MCP Server", transport=config.transport)
+
+    if config.transport == "sse":
+        run_sse_server()
+    else:
+        # Run the server with the stdio transport
+        mcp.run(transport="stdio")
+
+def run_sse_server():
+    """Serve many concurrent MCP clients over HTTP with Server-Sent Events"""
+    sessions = SessionManager(config.max_sessions, config.drain_timeout, tool_calls)
+    # Shared resources live as long as the HTTP server, not a single client session
+    app = create_sse_app(mcp.run_session, sessions, lifespan=lambda app: server_lifespan(mcp))
+    anyio.run(serve_sse, app, sessions, config.host, config.port, mcp.settings.log_level)
 
 if __name__ == "__main__":
     run_server()
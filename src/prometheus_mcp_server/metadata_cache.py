@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from prometheus_mcp_server.logging_config import get_logger
+
+logger = get_logger()
+
+Fetcher = Callable[..., Awaitable[Any]]
+
+
+class MetadataCache:
+    """Local copy of the full ``/api/v1/metadata`` response, keyed by metric name.
+
+    The whole endpoint is fetched in one request and lookups are answered from
+    memory. Once the TTL has passed, lookups keep serving the previous copy
+    while a single background refresh replaces it (stale-while-revalidate), so
+    only the very first lookup ever waits for Prometheus.
+    """
+
+    def __init__(self, fetch: Fetcher, ttl: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        self._fetch = fetch
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.clear()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def clear(self) -> None:
+        """Forget the cached metadata so the next lookup reloads it."""
+        self.metadata: Dict[str, List[Dict[str, str]]] = {}
+        self.loaded_at: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    @property
+    def stale(self) -> bool:
+        return self.loaded_at is None or self._clock() - self.loaded_at >= self.ttl
+
+    async def ensure_loaded(self) -> None:
+        """Load the metadata on first use and schedule a background refresh once it is stale."""
+        if not self.loaded:
+            async with self._lock:
+                if not self.loaded:
+                    await self._load()
+            return
+        if self.stale and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.create_task(self._refresh_quietly())
+
+    async def refresh(self) -> None:
+        """Fetch the full metadata and replace the cached copy."""
+        async with self._lock:
+            await self._load()
+
+    async def run(self, interval: float) -> None:
+        """Refresh the metadata every interval seconds until cancelled."""
+        while True:
+            await self._refresh_quietly()
+            await asyncio.sleep(interval)
+
+    def get(self, metric: str) -> List[Dict[str, str]]:
+        """Return the metadata entries for one metric, an empty list if it is unknown."""
+        entries = self.metadata.get(metric)
+        if entries is None:
+            self.misses += 1
+            return []
+        self.hits += 1
+        return entries
+
+    def get_many(self, metrics: List[str]) -> Dict[str, List[Dict[str, str]]]:
+        """Return the metadata entries for several metrics, keyed by metric name."""
+        return {metric: self.get(metric) for metric in metrics}
+
+    def stats(self) -> Dict[str, Any]:
+        """Return lookup counters and the size of the cached metadata."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "entries": len(self.metadata),
+            "age_seconds": None if self.loaded_at is None else round(self._clock() - self.loaded_at, 3),
+        }
+
+    async def _load(self) -> None:
+        self.metadata = await self._fetch("metadata")
+        self.loaded_at = self._clock()
+        self.refreshes += 1
+        logger.info("Metric metadata cache refreshed", metric_count=len(self.metadata))
+
+    async def _refresh_quietly(self) -> None:
+        try:
+            await self.refresh()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Metric metadata refresh failed", error=str(e), error_type=type(e).__name__)
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+
+import asyncio
+import re
+import time
+from bisect import bisect_left
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from prometheus_mcp_server.logging_config import get_logger
+from prometheus_mcp_server.metadata_cache import MetadataCache
+from prometheus_mcp_server.time_utils import format_timestamp
+
+logger = get_logger()
+
+SEARCH_MODES = ("auto", "prefix", "substring", "fuzzy")
+
+Fetcher = Callable[..., Awaitable[Any]]
+
+
+class MetricIndex:
+    """In-memory index of metric names and their label names.
+
+    Names are kept in a sorted array for prefix lookups with binary search;
+    substring and fuzzy (in-order subsequence) matching scan the lowercased
+    names. The index is refreshed incrementally: between full refreshes only
+    names that received samples since the previous refresh are requested,
+    and the sorted arrays are only rebuilt when the set of names changed.
+    Type, help and unit are read from the shared metadata cache when given.
+    """
+
+    def __init__(
+        self,
+        fetch: Fetcher,
+        full_refresh_interval: float = 3600.0,
+        clock: Callable[[], float] = time.time,
+        metadata: Optional[MetadataCache] = None,
+    ):
+        self._fetch = fetch
+        self.metadata = metadata
+        self.full_refresh_interval = full_refresh_interval
+        self._clock = clock
+        self._lock = asyncio.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        """Forget all indexed data so the next lookup reloads it."""
+        self.names: List[str] = []
+        self.labels: Dict[str, List[str]] = {}
+        self._name_set: Set[str] = set()
+        self._keys: List[str] = []
+        self._sorted: List[str] = []
+        self.loaded_at: Optional[float] = None
+        self.full_refreshed_at: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    async def ensure_loaded(self, metadata: bool = False) -> None:
+        """Load metric names, and optionally metadata, if they were never loaded."""
+        if not self.loaded:
+            async with self._lock:
+                if not self.loaded:
+                    self._set_names(await self._fetch("label/__name__/values"))
+                    self.loaded_at = self.full_refreshed_at = self._clock()
+        if metadata and self.metadata is not None:
+            await self.metadata.ensure_loaded()
+
+    async def refresh(self) -> bool:
+        """Refresh the index, incrementally when a full refresh is not due.
+
+        Returns:
+            True if the set of metric names changed
+        """
+        async with self._lock:
+            now = self._clock()
+            if self.full_refreshed_at is None or now - self.full_refreshed_at >= self.full_refresh_interval:
+                changed = self._set_names(await self._fetch("label/__name__/values"))
+                self.full_refreshed_at = now
+                self.loaded_at = now
+                logger.info("Metric index refreshed", mode="full", metric_count=len(self.names), changed=changed)
+                return changed
+
+            # Only names with samples since the last refresh can be new
+            recent = await self._fetch("label/__name__/values", params={"start": format_timestamp(self.loaded_at)})
+            new_names = [name for name in recent if name not in self._name_set]
+            self.loaded_at = now
+            if not new_names:
+                logger.debug("Metric index refreshed", mode="incremental", new_metrics=0)
+                return False
+
+            self._set_names(self.names + new_names)
+            logger.info("Metric index refreshed", mode="incremental", new_metrics=len(new_names))
+            return True
+
+    async def run(self, interval: float) -> None:
+        """Refresh the index every interval seconds until cancelled."""
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Metric index refresh failed", error=str(e), error_type=type(e).__name__)
+            await asyncio.sleep(interval)
+
+    async def label_names(self, names: List[str]) -> Dict[str, List[str]]:
+        """Return label names for the given metrics, fetching the ones not indexed yet."""
+        missing = [name for name in names if name not in self.labels]
+        results = await asyncio.gather(*(
+            self._fetch("labels", params={"match[]": name}) for name in missing
+        ))
+        for name, labels in zip(missing, results):
+            self.labels[name] = [label for label in labels if label != "__name__"]
+        return {name: self.labels[name] for name in names}
+
+    def search(self, query: str, mode: str = "auto") -> List[str]:
+        """Find metric names matching query.
+
+        Args:
+            query: Case-insensitive search string
+            mode: 'prefix', 'substring', 'fuzzy', or 'auto' for prefix matches
+                followed by substring and fuzzy matches
+
+        Returns:
+            Matching metric names, best matches first
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}', expected one of {', '.join(SEARCH_MODES)}")
+        query = query.lower()
+        if not query:
+            return list(self._sorted)
+        if mode == "prefix":
+            return self._prefix(query)
+        if mode == "substring":
+            return [name for key, name in zip(self._keys, self._sorted) if query in key]
+        if mode == "fuzzy":
+            return self._fuzzy(query)
+
+        matches = self._prefix(query)
+        seen = set(matches)
+        for name in [name for key, name in zip(self._keys, self._sorted) if query in key] + self._fuzzy(query):
+            if name not in seen:
+                seen.add(name)
+                matches.append(name)
+        return matches
+
+    def describe(self, name: str) -> Dict[str, Any]:
+        """Return the indexed information for a metric name."""
+        entry: Dict[str, Any] = {"name": name}
+        entries = self.metadata.metadata.get(name) if self.metadata is not None else None
+        if entries:
+            entry.update({key: entries[0].get(key, "") for key in ("type", "help", "unit")})
+        if name in self.labels:
+            entry["labels"] = self.labels[name]
+        return entry
+
+    def _prefix(self, query: str) -> List[str]:
+        start = bisect_left(self._keys, query)
+        end = bisect_left(self._keys, query + "\uffff", lo=start)
+        return self._sorted[start:end]
+
+    def _fuzzy(self, query: str) -> List[str]:
+        # Characters of the query in order, as close together as possible
+        pattern = re.compile(".*?".join(re.escape(char) for char in query))
+        scored = []
+        for key, name in zip(self._keys, self._sorted):
+            match = pattern.search(key)
+            if match:
+                scored.append((match.end() - match.start(), len(key), name))
+        scored.sort()
+        return [name for _, _, name in scored]
+
+    def _set_names(self, names: List[str]) -> bool:
+        if self.loaded and len(names) == len(self.names) and set(names) == self._name_set:
+            return False
+        self.names = list(names)
+        self._name_set = set(names)
+        self._sorted = sorted(self._name_set, key=str.lower)
+        self._keys = [name.lower() for name in self._sorted]
+        self.labels = {name: labels for name, labels in self.labels.items() if name in self._name_set}
+        return True
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from prometheus_mcp_server.lazy_import import lazy_import
+from prometheus_mcp_server.summarize import matrix_arrays, matrix_stats
+
+# Loaded on first use, not at server startup
+np = lazy_import("numpy")
+
+SORT_ORDERS = ("asc", "desc")
+
+
+def validate_projection(
+    keep_labels: Optional[List[str]] = None,
+    drop_labels: Optional[List[str]] = None,
+    sort: Optional[str] = None,
+    limit: Optional[int] = None,
+    sample_limit: Optional[int] = None,
+) -> None:
+    """Check result projection options before any query is sent.
+
+    Raises:
+        ValueError: If the options are inconsistent or out of range
+    """
+    if keep_labels is not None and drop_labels is not None:
+        raise ValueError("keep_labels and drop_labels cannot be combined")
+    if sort is not None and sort not in SORT_ORDERS:
+        raise ValueError(f"Unknown sort order '{sort}', expected one of {', '.join(SORT_ORDERS)}")
+    if limit is not None and limit < 1:
+        raise ValueError("limit must be at least 1")
+    if sample_limit is not None and sample_limit < 1:
+        raise ValueError("sample_limit must be at least 1")
+
+
+def _series_samples(series: Dict[str, Any]) -> int:
+    return len(series["values"]) if "values" in series else 1
+
+
+def _ranking(result_type: str, result: List[Dict[str, Any]], stat: str) -> np.ndarray:
+    """Return the value each series is sorted by: its sample for vectors, a statistic for matrices."""
+    if result_type == "vector":
+        return np.array([series["value"][1] for series in result], dtype=np.str_).astype(np.float64)
+    values, lengths = matrix_arrays(result)
+    return matrix_stats(values, lengths)[stat]
+
+
+def _order(ranking: np.ndarray, sort: str) -> List[int]:
+    """Return series indices by value, series without a value last in either order."""
+    missing = np.isnan(ranking)
+    keys = np.where(missing, 0.0, ranking if sort == "asc" else -ranking)
+    return np.lexsort((keys, missing)).tolist()
+
+
+def project_result(
+    data: Dict[str, Any],
+    keep_labels: Optional[List[str]] = None,
+    drop_labels: Optional[List[str]] = None,
+    sort: Optional[str] = None,
+    limit: Optional[int] = None,
+    sample_limit: Optional[int] = None,
+    stat: str = "avg",
+) -> Dict[str, Any]:
+    """Select, order, cap and relabel the series of a query result.
+
+    Series are sorted by value (matrices by ``stat``), cut to ``limit`` series
+    and then to ``sample_limit`` samples in total; the series that reaches the
+    sample limit keeps its most recent samples and later series are dropped.
+    Labels are projected only on the series returned. The input is never
+    modified, so cached results can be projected: untouched sample lists are
+    shared, not copied.
+
+    Args:
+        data: Prometheus query data with resultType and result
+        keep_labels: Labels kept on each series, all others (including __name__) dropped
+        drop_labels: Labels removed from each series
+        sort: Order series by value, 'asc' or 'desc'
+        limit: Maximum number of series returned
+        sample_limit: Maximum number of samples returned over all series
+        stat: Statistic matrix series are sorted by: min, max, avg, p95 or last
+
+    Returns:
+        The data with the projected result, and under 'truncated' the series and
+        sample totals if anything was cut off
+    """
+    result_type, result = data["resultType"], data["result"]
+    if result_type not in ("matrix", "vector") or not any(
+        option is not None for option in (keep_labels, drop_labels, sort, limit, sample_limit)
+    ):
+        return data
+
+    order = _order(_ranking(result_type, result, stat), sort) if sort and result else range(len(result))
+    selected = []
+    total_samples = sum(_series_samples(series) for series in result)
+    returned_samples = 0
+    for index in order:
+        if limit is not None and len(selected) >= limit:
+            break
+        series = result[index]
+        samples = _series_samples(series)
+        if sample_limit is not None and returned_samples + samples > sample_limit:
+            remaining = sample_limit - returned_samples
+            if remaining > 0 and "values" in series:
+                selected.append({"metric": series["metric"], "values": series["values"][-remaining:]})
+                returned_samples += remaining
+            break
+        selected.append(series)
+        returned_samples += samples
+
+    if keep_labels is not None or drop_labels is not None:
+        selected = [dict(series, metric=_project_labels(series["metric"], keep_labels, drop_labels))
+                    for series in selected]
+
+    projected = dict(data, result=selected)
+    if len(selected) < len(result) or returned_samples < total_samples:
+        projected["truncated"] = {
+            "returnedSeries": len(selected),
+            "totalSeries": len(result),
+            "returnedSamples": returned_samples,
+            "totalSamples": total_samples,
+        }
+    return projected
+
+
+def _project_labels(metric: Dict[str, str], keep_labels: Optional[List[str]],
+                    drop_labels: Optional[List[str]]) -> Dict[str, str]:
+    if keep_labels is not None:
+        return {name: metric[name] for name in keep_labels if name in metric}
+    return {name: value for name, value in metric.items() if name not in drop_labels}
@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+
+import math
+import re
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Mapping, Optional, Tuple
+
+from prometheus_mcp_server.time_utils import parse_duration
+
+GUARD_MODES = ("reject", "adjust")
+
+# Identifiers followed by a parenthesized label list rather than an expression
+_GROUPING_KEYWORDS = {"by", "without", "on", "ignoring", "group_left", "group_right"}
+# Aggregation operators, which may be followed by a grouping clause before their parentheses
+_AGGREGATIONS = {
+    "sum", "min", "max", "avg", "group", "stddev", "stdvar", "count", "count_values",
+    "bottomk", "topk", "quantile", "limitk", "limit_ratio",
+}
+# Identifiers that are never metric names
+_KEYWORDS = {"and", "or", "unless", "bool", "offset", "inf", "nan", "atan2"} | _GROUPING_KEYWORDS
+
+_IDENTIFIER_RE = re.compile(r"[a-zA-Z_:][a-zA-Z0-9_:]*")
+# Numbers, including hex and exponents, and durations
+_NUMBER_RE = re.compile(r"[0-9.][0-9a-zA-Z.]*")
+
+# Resolution of subqueries that do not set one, Prometheus' default evaluation interval
+DEFAULT_SUBQUERY_RESOLUTION = 60.0
+
+# Steps chosen when a range query is widened, so adjusted queries share step-aligned cache entries
+_ROUND_STEPS = (1, 2, 5, 10, 15, 30, 60, 120, 300, 600, 900, 1800, 3600, 7200, 10800, 21600, 43200, 86400)
+
+
+@dataclass
+class SelectorUse:
+    """A vector selector in a PromQL expression and how many samples each evaluation reads from it."""
+    selector: str
+    metric: Optional[str]
+    # Range of a range vector selector in seconds, None for instant vector selectors
+    range_seconds: Optional[float] = None
+    # Inner evaluations per outer evaluation when the selector sits inside subqueries
+    subquery_factor: int = 1
+
+    def samples_per_series(self, scrape_interval: float) -> int:
+        """Return the samples read from each matching series in one evaluation."""
+        samples = 1 if self.range_seconds is None else max(1, math.ceil(self.range_seconds / scrape_interval))
+        return samples * self.subquery_factor
+
+
+def _skip_string(query: str, i: int) -> int:
+    quote = query[i]
+    i += 1
+    while i < len(query) and query[i] != quote:
+        i += 2 if query[i] == "\\" and quote != "`" else 1
+    return i + 1
+
+
+def _skip_braces(query: str, i: int, opening: str, closing: str) -> int:
+    """Return the index after the bracket closing the one at i, skipping string literals."""
+    depth = 0
+    while i < len(query):
+        char = query[i]
+        if char in "\"'`":
+            i = _skip_string(query, i)
+            continue
+        if char == opening:
+            depth += 1
+        elif char == closing:
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return i
+
+
+def _skip_space(query: str, i: int) -> int:
+    while i < len(query):
+        if query[i].isspace():
+            i += 1
+        elif query[i] == "#":
+            newline = query.find("\n", i)
+            i = len(query) if newline < 0 else newline + 1
+        else:
+            break
+    return i
+
+
+def _parse_range(text: str) -> Tuple[Optional[float], Optional[float], bool]:
+    """Parse the inside of [...] into (range, subquery resolution, is subquery)."""
+    if ":" not in text:
+        return _duration(text), None, False
+    range_text, resolution_text = text.split(":", 1)
+    return _duration(range_text), _duration(resolution_text), True
+
+
+def _duration(text: str) -> Optional[float]:
+    try:
+        return parse_duration(text.strip())
+    except ValueError:
+        return None
+
+
+def parse_selectors(query: str) -> List[SelectorUse]:
+    """Find the vector selectors of a PromQL expression with their ranges and subquery factors.
+
+    This is a scanner rather than a full parser: it recognizes metric names,
+    label matchers, range and subquery brackets and skips functions, keywords,
+    grouping label lists, strings, numbers and durations. It is only meant to
+    estimate query cost, not to validate queries.
+    """
+    selectors: List[SelectorUse] = []
+    # Index of the first selector inside each open parenthesis
+    groups: List[int] = []
+    i = _skip_space(query, 0)
+    while i < len(query):
+        char = query[i]
+        if char in "\"'`":
+            i = _skip_string(query, i)
+        elif char == "(":
+            groups.append(len(selectors))
+            i += 1
+        elif char == ")":
+            group_start = groups.pop() if groups else 0
+            i += 1
+            following = _skip_space(query, i)
+            if following < len(query) and query[following] == "[":
+                end = _skip_braces(query, following, "[", "]")
+                range_seconds, resolution, subquery = _parse_range(query[following + 1:end - 1])
+                if subquery and range_seconds:
+                    factor = max(1, math.ceil(range_seconds / (resolution or DEFAULT_SUBQUERY_RESOLUTION)))
+                    for selector in selectors[group_start:]:
+                        selector.subquery_factor *= factor
+                i = end
+            continue
+        elif char == "{":
+            end = _skip_braces(query, i, "{", "}")
+            selectors.append(SelectorUse(query[i:end], None))
+            i = _range_suffix(query, end, selectors)
+        elif char == "@":
+            # @ <timestamp> or @ start() / end()
+            i = _skip_space(query, i + 1)
+            match = _IDENTIFIER_RE.match(query, i) or _NUMBER_RE.match(query, i)
+            i = match.end() if match else i
+            continue
+        elif _IDENTIFIER_RE.match(query, i):
+            match = _IDENTIFIER_RE.match(query, i)
+            name = match.group()
+            following = _skip_space(query, match.end())
+            next_char = query[following] if following < len(query) else ""
+            if name.lower() in _GROUPING_KEYWORDS and next_char == "(":
+                i = _skip_braces(query, following, "(", ")")
+            elif name.lower() == "offset":
+                # The duration after offset is not a selector
+                i = _skip_space(query, following + (1 if next_char == "-" else 0))
+                duration = _NUMBER_RE.match(query, i)
+                i = duration.end() if duration else i
+            elif next_char == "(" or name.lower() in _KEYWORDS or _is_grouped_aggregation(query, name, following):
+                i = match.end()
+            else:
+                end = following
+                if next_char == "{":
+                    end = _skip_braces(query, following, "{", "}")
+                    selectors.append(SelectorUse(query[i:match.end()] + query[following:end], name))
+                else:
+                    end = match.end()
+                    selectors.append(SelectorUse(name, name))
+                i = _range_suffix(query, end, selectors)
+            continue
+        elif _NUMBER_RE.match(query, i):
+            i = _NUMBER_RE.match(query, i).end()
+        else:
+            i += 1
+        i = _skip_space(query, i)
+    return selectors
+
+
+def _is_grouped_aggregation(query: str, name: str, following: int) -> bool:
+    if name.lower() not in _AGGREGATIONS:
+        return False
+    keyword = _IDENTIFIER_RE.match(query, following)
+    return keyword is not None and keyword.group().lower() in ("by", "without")
+
+
+def _range_suffix(query: str, i: int, selectors: List[SelectorUse]) -> int:
+    """Attach a [range] or [range:resolution] following a selector, return the index after it."""
+    following = _skip_space(query, i)
+    if following >= len(query) or query[following] != "[":
+        return i
+    end = _skip_braces(query, following, "[", "]")
+    range_seconds, resolution, subquery = _parse_range(query[following + 1:end - 1])
+    selector = selectors[-1]
+    if subquery:
+        if range_seconds:
+            selector.subquery_factor *= max(1, math.ceil(range_seconds / (resolution or DEFAULT_SUBQUERY_RESOLUTION)))
+    else:
+        selector.range_seconds = range_seconds
+    return end
+
+
+def evaluations(start: float, end: float, step: float) -> int:
+    """Return the number of steps a range query evaluates."""
+    return int((end - start) // step) + 1 if end >= start else 0
+
+
+@dataclass
+class CostEstimate:
+    """Estimated number of samples a query loads."""
+    per_evaluation: int
+    evaluations: int
+    # True if every selector was counted with the series API, not bounded from the TSDB status
+    exact: bool
+
+    @property
+    def samples(self) -> int:
+        return self.per_evaluation * self.evaluations
+
+
+SeriesCounter = Callable[[SelectorUse], Awaitable[int]]
+
+
+async def estimate_cost(
+    selectors: List[SelectorUse],
+    evaluation_count: int,
+    scrape_interval: float,
+    upper_bound: SeriesCounter,
+    series_count: SeriesCounter,
+    budget: int,
+) -> CostEstimate:
+    """Estimate the samples a query loads, counting series only as precisely as needed.
+
+    Series are first bounded from the cached TSDB status, which costs no
+    request per query. Only when that bound exceeds the budget are the
+    selectors counted with the series API.
+    """
+    async def per_evaluation(count: SeriesCounter) -> int:
+        total = 0
+        for selector in selectors:
+            total += await count(selector) * selector.samples_per_series(scrape_interval)
+        return total
+
+    estimate = CostEstimate(await per_evaluation(upper_bound), evaluation_count, exact=False)
+    if estimate.samples <= budget or not selectors:
+        return estimate
+    return CostEstimate(await per_evaluation(series_count), evaluation_count, exact=True)
+
+
+def widened_step(start: float, end: float, step: float, per_evaluation: int, budget: int) -> Optional[float]:
+    """Return a step, at least step, that keeps a range query within budget.
+
+    The minimum step is rounded up to a common step width (15s, 1m, 5m, ...)
+    or to whole days.
+
+    Returns:
+        The new step, or None if even a single evaluation exceeds the budget
+    """
+    if per_evaluation <= 0 or evaluations(start, end, step) * per_evaluation <= budget:
+        return step
+    max_evaluations = budget // per_evaluation
+    if max_evaluations < 1:
+        return None
+    if max_evaluations == 1:
+        minimum = math.floor(end - start) + 1
+    else:
+        minimum = math.ceil((end - start) / (max_evaluations - 1))
+    rounded = next((candidate for candidate in _ROUND_STEPS if candidate >= minimum), None)
+    if rounded is None:
+        rounded = math.ceil(minimum / 86400) * 86400
+    return max(step, float(rounded))
+
+
+def query_budget(budgets: List[int]) -> int:
+    """Combine the global, per-tool and per-backend sample budgets: the smallest one set (non-zero) wins."""
+    active = [budget for budget in budgets if budget and budget > 0]
+    return min(active) if active else 0
+
+
+def parse_tool_budgets(environ: Mapping[str, str], tools: List[str]) -> Dict[str, int]:
+    """Read PROMETHEUS_MAX_SAMPLES_<TOOL> budgets, e.g. PROMETHEUS_MAX_SAMPLES_EXECUTE_RANGE_QUERY."""
+    budgets = {}
+    for tool in tools:
+        value = environ.get(f"PROMETHEUS_MAX_SAMPLES_{tool.upper()}")
+        if value:
+            budgets[tool] = int(value)
+    return budgets
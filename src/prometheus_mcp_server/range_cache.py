@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from prometheus_mcp_server.lazy_import import lazy_import
+
+# Loaded on first use, not at server startup
+np = lazy_import("numpy")
+
+# Rough memory cost of a series' labels and bookkeeping, on top of its sample arrays
+_SERIES_BYTES = 200
+# Rough memory cost of one value string referenced from a sample array
+_VALUE_BYTES = 56
+
+SeriesKey = Tuple[Tuple[str, str], ...]
+Fetcher = Callable[[float, float], Awaitable[List[Dict[str, Any]]]]
+
+
+def series_key(metric: Dict[str, str]) -> SeriesKey:
+    """Build a hashable identity for a series from its label set."""
+    return tuple(sorted(metric.items()))
+
+
+def to_millis(timestamp: float) -> int:
+    """Convert Unix seconds to integer milliseconds, the precision Prometheus uses."""
+    return int(round(float(timestamp) * 1000))
+
+
+def from_millis(millis: int) -> Any:
+    """Convert integer milliseconds back to the Unix seconds form Prometheus returns."""
+    return millis // 1000 if millis % 1000 == 0 else millis / 1000
+
+
+def missing_ranges(extents: List[Tuple[int, int]], start: int, end: int, step: int) -> List[Tuple[int, int]]:
+    """Work out which step-aligned windows of [start, end] are not covered by extents.
+
+    Args:
+        extents: Sorted, non-overlapping (start, end) windows already cached, in milliseconds
+        start: Aligned start of the requested range in milliseconds
+        end: Aligned end of the requested range in milliseconds
+        step: Step width in milliseconds
+
+    Returns:
+        Sorted list of (start, end) windows that still have to be fetched
+    """
+    missing = []
+    cursor = start
+    for extent_start, extent_end in extents:
+        if extent_end < cursor:
+            continue
+        if extent_start > end:
+            break
+        if extent_start > cursor:
+            missing.append((cursor, min(extent_start - step, end)))
+        cursor = max(cursor, extent_end + step)
+        if cursor > end:
+            break
+    if cursor <= end:
+        missing.append((cursor, end))
+    return missing
+
+
+def merge_extents(extents: List[Tuple[int, int]], step: int) -> List[Tuple[int, int]]:
+    """Sort extents and merge the ones that overlap or touch on the step grid."""
+    merged: List[Tuple[int, int]] = []
+    for extent_start, extent_end in sorted(extents):
+        if merged and extent_start <= merged[-1][1] + step:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], extent_end))
+        else:
+            merged.append((extent_start, extent_end))
+    return merged
+
+
+class CompactSeries:
+    """Samples of one series held in sorted NumPy arrays.
+
+    Timestamps are integer milliseconds. Values are kept as the strings
+    Prometheus returned, in an object array, so cached samples render back
+    without parsing or formatting a single number.
+    """
+
+    __slots__ = ("metric", "timestamps", "values")
+
+    def __init__(self, metric: Dict[str, str], timestamps: np.ndarray, values: np.ndarray):
+        self.metric = metric
+        self.timestamps = timestamps
+        self.values = values
+
+    @classmethod
+    def from_values(cls, metric: Dict[str, str], samples: List[List[Any]], start: int, end: int) -> "CompactSeries":
+        """Build from Prometheus ``[timestamp, "value"]`` pairs, keeping samples within [start, end] ms."""
+        timestamps = np.rint(np.array([timestamp for timestamp, _ in samples], dtype=np.float64) * 1000).astype(np.int64)
+        values = np.array([value for _, value in samples], dtype=object)
+        inside = (timestamps >= start) & (timestamps <= end)
+        return cls(metric, timestamps[inside], values[inside])
+
+    @property
+    def nbytes(self) -> int:
+        return self.timestamps.nbytes + self.values.nbytes + len(self.values) * _VALUE_BYTES
+
+    def merge(self, other: "CompactSeries") -> None:
+        """Merge samples from other, keeping existing samples for duplicate timestamps."""
+        timestamps = np.concatenate((self.timestamps, other.timestamps))
+        values = np.concatenate((self.values, other.values))
+        # np.unique returns the first occurrence of each timestamp, in sorted order
+        timestamps, first = np.unique(timestamps, return_index=True)
+        self.timestamps, self.values = timestamps, values[first]
+
+    def window(self, start: int, end: int) -> "CompactSeries":
+        """Return the samples within [start, end] ms without copying them."""
+        low, high = np.searchsorted(self.timestamps, [start, end + 1])
+        return CompactSeries(self.metric, self.timestamps[low:high], self.values[low:high])
+
+    def to_values(self) -> List[List[Any]]:
+        """Render samples back to Prometheus ``[timestamp, "value"]`` pairs."""
+        if (self.timestamps % 1000).any():
+            timestamps = [from_millis(millis) for millis in self.timestamps.tolist()]
+        else:
+            timestamps = (self.timestamps // 1000).tolist()
+        return list(map(list, zip(timestamps, self.values.tolist())))
+
+
+class _RangeEntry:
+    """Cached samples and covered time windows for one (query, step) pair."""
+
+    def __init__(self):
+        self.extents: List[Tuple[int, int]] = []
+        self.series: Dict[SeriesKey, CompactSeries] = {}
+        self.size = 0
+
+    def add(self, result: List[Dict[str, Any]], start: int, end: int, step: int) -> None:
+        for series in result:
+            key = series_key(series["metric"])
+            incoming = CompactSeries.from_values(series["metric"], series.get("values", []), start, end)
+            existing = self.series.get(key)
+            if existing is None:
+                self.series[key] = incoming
+                self.size += _SERIES_BYTES + incoming.nbytes
+            else:
+                self.size -= existing.nbytes
+                existing.merge(incoming)
+                self.size += existing.nbytes
+        self.extents = merge_extents(self.extents + [(start, end)], step)
+
+
+class IncrementalRangeCache:
+    """Per-(query, step) sample cache that only fetches the missing time windows.
+
+    Modelled on the Thanos/Cortex query-frontend results cache: requests are
+    aligned to the step grid, previously fetched windows ("extents") are kept
+    per query and step, and only the gaps between them are requested from
+    Prometheus. Samples newer than ``max_freshness`` seconds are never cached
+    because late scrapes and rule evaluations may still change them.
+    """
+
+    def __init__(self, max_bytes: int, max_freshness: float = 60.0, clock: Callable[[], float] = time.time):
+        self.max_bytes = max_bytes
+        self.max_freshness = max_freshness
+        self._clock = clock
+        self._entries: "OrderedDict[Tuple[str, int], _RangeEntry]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def query(
+        self, query: str, start: float, end: float, step: float, fetch: Fetcher, namespace: Hashable = None
+    ) -> List[Dict[str, Any]]:
+        """Return the matrix for a step-aligned range, fetching only uncached windows.
+
+        Args:
+            query: PromQL expression
+            start: Step-aligned range start in Unix seconds
+            end: Step-aligned range end in Unix seconds
+            step: Step width in seconds
+            fetch: Coroutine function fetching the matrix result for a (start, end) window in seconds
+            namespace: Keeps samples of the same query apart, e.g. per backend
+
+        Returns:
+            Matrix result in Prometheus API format
+        """
+        start_ms, end_ms, step_ms = to_millis(start), to_millis(end), to_millis(step)
+        key = (namespace, query, step_ms)
+        entry = self._entries.get(key)
+        extents = entry.extents if entry is not None else []
+        missing = missing_ranges(extents, start_ms, end_ms, step_ms)
+
+        if not missing:
+            self.hits += 1
+        elif len(missing) == 1 and missing[0] == (start_ms, end_ms):
+            self.misses += 1
+        else:
+            self.partial_hits += 1
+
+        fetched = await asyncio.gather(*(fetch(window_start / 1000, window_end / 1000) for window_start, window_end in missing))
+
+        # Only windows that ended before the freshness horizon are safe to keep.
+        # Re-read the entry: concurrent queries may have updated or evicted it meanwhile.
+        horizon = to_millis(self._clock() - self.max_freshness)
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+        else:
+            entry = _RangeEntry()
+        fresh = _RangeEntry()
+        for (window_start, window_end), result in zip(missing, fetched):
+            cacheable_end = min(window_end, window_start + (horizon - window_start) // step_ms * step_ms)
+            if cacheable_end >= window_start:
+                entry.add(result, window_start, cacheable_end, step_ms)
+            if cacheable_end < window_end:
+                fresh.add(result, max(window_start, cacheable_end + step_ms), window_end, step_ms)
+
+        self._store(key, entry)
+        if missing == [(start_ms, end_ms)]:
+            # Nothing came from the cache: the fetched matrix already is the answer
+            return fetched[0]
+        return self._assemble(entry, fresh, start_ms, end_ms)
+
+    def clear(self) -> None:
+        """Drop every cached entry without touching the counters."""
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss/eviction counters and current occupancy."""
+        return {
+            "hits": self.hits,
+            "partial_hits": self.partial_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+    def _store(self, key: Tuple[str, int], entry: _RangeEntry) -> None:
+        if not entry.extents or entry.size > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.evictions += 1
+
+    @staticmethod
+    def _assemble(entry: _RangeEntry, fresh: _RangeEntry, start: int, end: int) -> List[Dict[str, Any]]:
+        result = []
+        for key in list(entry.series) + [key for key in fresh.series if key not in entry.series]:
+            cached: Optional[CompactSeries] = entry.series.get(key)
+            series = cached.window(start, end) if cached is not None else fresh.series[key]
+            if cached is not None and key in fresh.series:
+                series.merge(fresh.series[key])
+            if not len(series.timestamps):
+                continue
+            result.append({"metric": series.metric, "values": series.to_values()})
+        return result
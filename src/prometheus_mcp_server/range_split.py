@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+import httpx
+
+from prometheus_mcp_server.logging_config import get_logger
+from prometheus_mcp_server.range_cache import from_millis, series_key, to_millis
+
+logger = get_logger()
+
+# Prometheus rejects range queries returning more points than this per series
+MAX_POINTS_PER_SERIES = 11000
+
+Shard = Tuple[float, float]
+ShardFetcher = Callable[[float, float], Awaitable[List[Dict[str, Any]]]]
+
+
+def split_range(start: float, end: float, step: float, interval: float, max_points: int = MAX_POINTS_PER_SERIES) -> List[Shard]:
+    """Split a range query into shards that each stay within a time interval and point limit.
+
+    Shard boundaries fall on multiples of the interval (e.g. day boundaries) so that
+    repeated queries produce the same shards, while every shard keeps evaluating on
+    the original ``start + k * step`` grid. Consecutive shards do not overlap.
+
+    Args:
+        start: Range start in Unix seconds
+        end: Range end in Unix seconds
+        step: Step width in seconds
+        interval: Maximum shard length in seconds, 0 to only split on the point limit
+        max_points: Maximum number of points per series in a single shard
+
+    Returns:
+        List of (start, end) shards in Unix seconds
+    """
+    start_ms, end_ms, step_ms = to_millis(start), to_millis(end), to_millis(step)
+    if step_ms <= 0 or end_ms <= start_ms:
+        return [(start, end)]
+
+    shard_ms = (max_points - 1) * step_ms
+    if interval > 0:
+        shard_ms = min(shard_ms, to_millis(interval))
+    shard_ms = max(shard_ms, step_ms)
+
+    shards = []
+    cursor = start_ms
+    while cursor <= end_ms:
+        boundary = (cursor // shard_ms + 1) * shard_ms
+        # Last grid point before the next boundary, capped by the point limit
+        shard_end = cursor + (boundary - 1 - cursor) // step_ms * step_ms
+        shard_end = min(shard_end, cursor + (max_points - 1) * step_ms, end_ms)
+        shards.append((from_millis(cursor), from_millis(shard_end)))
+        cursor = shard_end + step_ms
+    return shards
+
+
+def merge_matrices(results: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Stitch matrix results from consecutive shards into one matrix.
+
+    Series are matched on their full label set, samples are ordered by timestamp,
+    and samples duplicated at shard boundaries are kept only once.
+    """
+    metrics: Dict[Any, Dict[str, str]] = {}
+    samples: Dict[Any, Dict[int, Any]] = {}
+    for result in results:
+        for series in result:
+            key = series_key(series["metric"])
+            if key not in metrics:
+                metrics[key] = series["metric"]
+                samples[key] = {}
+            series_samples = samples[key]
+            for timestamp, value in series.get("values", []):
+                series_samples.setdefault(to_millis(timestamp), [timestamp, value])
+    return [
+        {"metric": metrics[key], "values": [series_samples[millis] for millis in sorted(series_samples)]}
+        for key, series_samples in samples.items()
+    ]
+
+
+def is_retryable(error: Exception) -> bool:
+    """Check whether a failed shard request is worth retrying."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+async def fetch_shards(
+    shards: List[Shard],
+    fetch: ShardFetcher,
+    concurrency: int = 4,
+    retries: int = 2,
+    retry_backoff: float = 0.2,
+) -> List[Dict[str, Any]]:
+    """Fetch shards concurrently and stitch their matrices back together in order.
+
+    Args:
+        shards: (start, end) windows to fetch
+        fetch: Coroutine function returning the matrix result for one shard
+        concurrency: Maximum number of shards fetched at the same time
+        retries: Number of retries for a shard failing with a transient error
+        retry_backoff: Base delay in seconds, doubled on every retry
+
+    Returns:
+        Merged matrix result
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch_shard(shard: Shard) -> List[Dict[str, Any]]:
+        attempt = 0
+        while True:
+            async with semaphore:
+                try:
+                    return await fetch(*shard)
+                except Exception as e:
+                    if attempt >= retries or not is_retryable(e):
+                        raise
+                    logger.warning("Range query shard failed, retrying",
+                                   shard_start=shard[0], shard_end=shard[1], attempt=attempt + 1,
+                                   error=str(e), error_type=type(e).__name__)
+            await asyncio.sleep(retry_backoff * (2 ** attempt))
+            attempt += 1
+
+    results = await asyncio.gather(*(fetch_shard(shard) for shard in shards))
+    return merge_matrices(results)
@@ -0,0 +1,309 @@
+#!/usr/bin/env python
+
+import asyncio
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from prometheus_mcp_server.logging_config import get_logger
+from prometheus_mcp_server.time_utils import parse_duration
+
+logger = get_logger()
+
+Fetcher = Callable[..., Awaitable[Any]]
+
+RULE_TYPES = ("recording", "alerting")
+ALERT_STATES = ("firing", "pending", "inactive")
+
+_TOKEN_RE = re.compile(r"""
+    (?P<space>\s+|\#[^\n]*)
+  | (?P<string>"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|`[^`]*`)
+  | (?P<word>[a-zA-Z0-9_:.]+)
+  | (?P<op>==|!=|=~|!~|>=|<=|[-+*/%^<>=(){}\[\],@!])
+""", re.VERBOSE)
+_DURATION_RE = re.compile(r"^(?:\d+(?:ms|[smhdwy]))+$")
+_IDENTIFIER_RE = re.compile(r"^[a-zA-Z_:][a-zA-Z0-9_:]*$")
+_CLOSING = {"(": ")", "{": "}", "[": "]"}
+
+# Keywords followed by a parenthesized list of label names, whose order does not matter
+_GROUPING_KEYWORDS = {"by", "without", "on", "ignoring", "group_left", "group_right"}
+_AGGREGATIONS = {
+    "sum", "min", "max", "avg", "group", "stddev", "stdvar", "count", "count_values",
+    "bottomk", "topk", "quantile", "limitk", "limit_ratio",
+}
+
+# A token, or a bracket with the items inside it
+Item = Union[str, Tuple[str, list]]
+
+
+def _tokenize(expr: str) -> List[str]:
+    tokens = []
+    position = 0
+    while position < len(expr):
+        match = _TOKEN_RE.match(expr, position)
+        if match is None:
+            raise ValueError(f"Unexpected character {expr[position]!r} at position {position}")
+        if match.lastgroup != "space":
+            tokens.append(match.group())
+        position = match.end()
+    return tokens
+
+
+def _parse(tokens: List[str], i: int, closing: Optional[str]) -> Tuple[List[Item], int]:
+    """Group tokens into nested brackets, returning the items and the index after the closing bracket."""
+    items: List[Item] = []
+    while i < len(tokens):
+        token = tokens[i]
+        if token in _CLOSING:
+            children, i = _parse(tokens, i + 1, _CLOSING[token])
+            items.append((token, children))
+            continue
+        if token == closing:
+            return items, i + 1
+        if token in (")", "}", "]"):
+            raise ValueError(f"Unbalanced {token!r}")
+        items.append(token)
+        i += 1
+    if closing is not None:
+        raise ValueError(f"Missing {closing!r}")
+    return items, i
+
+
+def _canonical_token(token: str) -> str:
+    if _DURATION_RE.match(token):
+        seconds = parse_duration(token)
+        return f"{int(seconds)}s" if seconds == int(seconds) else f"{seconds}s"
+    if token[0] == "'":
+        return '"' + token[1:-1].replace("\\'", "'").replace('"', '\\"') + '"'
+    if token[0] == "`":
+        return '"' + token[1:-1].replace("\\", "\\\\").replace('"', '\\"') + '"'
+    return token
+
+
+def _split_commas(items: List[Item]) -> List[List[Item]]:
+    parts: List[List[Item]] = [[]]
+    for item in items:
+        if item == ",":
+            parts.append([])
+        else:
+            parts[-1].append(item)
+    return [part for part in parts if part]
+
+
+def _join_commas(parts: List[List[Item]]) -> List[Item]:
+    joined: List[Item] = []
+    for part in parts:
+        if joined:
+            joined.append(",")
+        joined.extend(part)
+    return joined
+
+
+def _flatten(items: List[Item]) -> List[str]:
+    tokens = []
+    for item in items:
+        if isinstance(item, tuple):
+            tokens.append(item[0])
+            tokens.extend(_flatten(item[1]))
+            tokens.append(_CLOSING[item[0]])
+        else:
+            tokens.append(item)
+    return tokens
+
+
+def _label_list(group: Item) -> Item:
+    """Sort and deduplicate a parenthesized list of label names."""
+    labels = sorted({" ".join(_flatten(part)) for part in _split_commas(group[1])})
+    return ("(", _join_commas([[label] for label in labels]))
+
+
+def _is_group(item: Item, opening: str) -> bool:
+    return isinstance(item, tuple) and item[0] == opening
+
+
+def _normalize(items: List[Item]) -> List[Item]:
+    items = [(item[0], _normalize(item[1])) if isinstance(item, tuple) else _canonical_token(item) for item in items]
+    normalized: List[Item] = []
+    i = 0
+    while i < len(items):
+        item = items[i]
+        following = items[i + 1:i + 4]
+        if isinstance(item, str) and item.lower() in _AGGREGATIONS and len(following) >= 3 \
+                and _is_group(following[0], "(") and isinstance(following[1], str) \
+                and following[1].lower() in ("by", "without") and _is_group(following[2], "("):
+            # sum(x) by (job) is the same as sum by (job) (x)
+            normalized += [item.lower(), following[1].lower(), _label_list(following[2]), following[0]]
+            i += 4
+            continue
+        if isinstance(item, str) and item.lower() in _GROUPING_KEYWORDS and following \
+                and _is_group(following[0], "("):
+            normalized += [item.lower(), _label_list(following[0])]
+            i += 2
+            continue
+        if isinstance(item, str) and item.lower() in _AGGREGATIONS and following \
+                and (_is_group(following[0], "(") or str(following[0]).lower() in ("by", "without")):
+            item = item.lower()
+        if _is_group(item, "{"):
+            matchers = sorted(_split_commas(item[1]), key=lambda part: " ".join(_flatten(part)))
+            if not matchers and normalized and isinstance(normalized[-1], str) \
+                    and _IDENTIFIER_RE.match(normalized[-1]):
+                # metric{} is the same as metric
+                i += 1
+                continue
+            item = ("{", _join_commas(matchers))
+        normalized.append(item)
+        i += 1
+    return normalized
+
+
+def normalize_expr(expr: str) -> str:
+    """Return a canonical form of a PromQL expression for comparing expressions.
+
+    Whitespace and comments are dropped, strings use double quotes, durations
+    are converted to seconds, label matchers and grouping labels are sorted,
+    trailing ``by``/``without`` clauses are moved in front of the aggregated
+    expression and redundant outer parentheses are removed. Expressions that
+    differ in any other way are considered different.
+
+    Raises:
+        ValueError: If the expression cannot be tokenized or its brackets are unbalanced
+    """
+    items, _ = _parse(_tokenize(expr), 0, None)
+    items = _normalize(items)
+    while len(items) == 1 and _is_group(items[0], "("):
+        items = items[0][1]
+    return " ".join(_flatten(items))
+
+
+class RuleIndex:
+    """The rules of one backend, with recording rules indexed by their normalized expression."""
+
+    def __init__(self, groups: List[Dict[str, Any]]):
+        self.rules: List[Dict[str, Any]] = []
+        self.recordings: Dict[str, Dict[str, Any]] = {}
+        for group in groups:
+            for rule in group.get("rules") or []:
+                entry = dict(rule, group=group.get("name"), file=group.get("file"), interval=group.get("interval"))
+                self.rules.append(entry)
+                # Rules adding labels record different series than their expression returns
+                if rule.get("type") != "recording" or rule.get("health", "ok") != "ok" or rule.get("labels"):
+                    continue
+                try:
+                    key = normalize_expr(rule["query"])
+                except ValueError:
+                    continue
+                self.recordings.setdefault(key, entry)
+
+    def find(
+        self,
+        rule_type: Optional[str] = None,
+        name: Optional[str] = None,
+        group: Optional[str] = None,
+        health: Optional[str] = None,
+        state: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Return the rules of a type, whose name contains a text, in a group, with a health or alert state."""
+        name = name.lower() if name else None
+        return [
+            rule for rule in self.rules
+            if (rule_type is None or rule.get("type") == rule_type)
+            and (name is None or name in rule.get("name", "").lower())
+            and (group is None or rule.get("group") == group)
+            and (health is None or rule.get("health") == health)
+            and (state is None or rule.get("state") == state)
+        ]
+
+    def recording_rule(self, query: str) -> Optional[Dict[str, Any]]:
+        """Return the healthy recording rule whose expression matches a query after normalization."""
+        return self.recordings.get(normalize_expr(query))
+
+
+class RuleCache:
+    """Cached rule index of each backend.
+
+    Rules are fetched from ``/api/v1/rules`` once per backend. Once the TTL has
+    passed, the previous index keeps being served while a background refresh
+    replaces it.
+    """
+
+    def __init__(self, fetch: Fetcher, ttl: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self._fetch = fetch
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = asyncio.Lock()
+        self._refresh_tasks: Dict[Optional[str], asyncio.Task] = {}
+        self.clear()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def clear(self) -> None:
+        """Forget every cached rule index."""
+        # Backend name -> (loaded at, rule index)
+        self._indexes: Dict[Optional[str], Tuple[float, RuleIndex]] = {}
+
+    async def index(self, backend: Optional[str] = None) -> RuleIndex:
+        """Return the rule index of a backend, loading it on first use."""
+        cached = self._indexes.get(backend)
+        if cached is None:
+            self.misses += 1
+            async with self._lock:
+                if backend not in self._indexes:
+                    await self._load(backend)
+            return self._indexes[backend][1]
+        self.hits += 1
+        task = self._refresh_tasks.get(backend)
+        if self._clock() - cached[0] >= self.ttl and (task is None or task.done()):
+            self._refresh_tasks[backend] = asyncio.create_task(self._refresh_quietly(backend))
+        return cached[1]
+
+    async def run(self, interval: float) -> None:
+        """Refresh the rules of every backend seen so far, every interval seconds, until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            for backend in list(self._indexes):
+                await self._refresh_quietly(backend)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return lookup counters and the number of indexed rules."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "entries": sum(len(index.rules) for _, index in self._indexes.values()),
+        }
+
+    async def _load(self, backend: Optional[str]) -> None:
+        data = await self._fetch("rules", backend=backend)
+        index = RuleIndex(data.get("groups") or [])
+        self._indexes[backend] = (self._clock(), index)
+        self.refreshes += 1
+        logger.info("Rules refreshed", backend=backend, rules=len(index.rules), recording_rules=len(index.recordings))
+
+    async def _refresh_quietly(self, backend: Optional[str]) -> None:
+        try:
+            await self._load(backend)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Rules refresh failed", backend=backend, error=str(e), error_type=type(e).__name__)
+
+
+def rule_summary(rule: Dict[str, Any], include_alerts: bool = False) -> Dict[str, Any]:
+    """Return a rule without its active alerts, which are replaced by their count unless included."""
+    if include_alerts or "alerts" not in rule:
+        return rule
+    summary = {key: value for key, value in rule.items() if key != "alerts"}
+    summary["alertCount"] = len(rule["alerts"] or [])
+    return summary
+
+
+def filter_alerts(alerts: List[Dict[str, Any]], state: Optional[str] = None, name: Optional[str] = None,
+                  labels: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+    """Keep the alerts in a state ('firing' or 'pending'), of one alert name and/or with all the given labels."""
+    return [
+        alert for alert in alerts
+        if (state is None or alert.get("state") == state)
+        and (name is None or (alert.get("labels") or {}).get("alertname") == name)
+        and all((alert.get("labels") or {}).get(label) == value for label, value in (labels or {}).items())
+    ]
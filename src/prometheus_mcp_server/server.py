@@ -2,24 +2,78 @@
 
 import os
 import json
-from typing import Any, Dict, List, Optional, Union
-from dataclasses import dataclass
+import asyncio
+import functools
+import hashlib
+import tempfile
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
+from dataclasses import dataclass, field
 import time
 from datetime import datetime, timedelta
 
 import dotenv
-import requests
+import httpx
 from mcp.server.fastmcp import FastMCP
-from prometheus_mcp_server.logging_config import get_logger
+from mcp.types import TextContent
+from prometheus_mcp_server.backends import (
+    ALL_BACKENDS,
+    DEFAULT_BACKEND,
+    Backend,
+    ReplicaTracker,
+    merge_backend_results,
+    parse_backends,
+    replica_urls,
+)
+from prometheus_mcp_server.cache import ResultCache, make_cache_key, mark_size_inexact, measure_size, record_response_size
+from prometheus_mcp_server.cardinality import CardinalityCache, status_overview
+from prometheus_mcp_server.disk_cache import DiskCache
+from prometheus_mcp_server.export import export_matrix, export_path, prune_exports, validate_export_format
+from prometheus_mcp_server.flow_control import AdaptiveLimiter, backoff_delay, hedged
+from prometheus_mcp_server.http_client import create_http_client
+from prometheus_mcp_server.json_codec import dumps, read_json
+from prometheus_mcp_server.logging_config import dropped_records, get_logger
+from prometheus_mcp_server.metadata_cache import MetadataCache
+from prometheus_mcp_server.metric_index import MetricIndex
+from prometheus_mcp_server.projection import project_result, validate_projection
+from prometheus_mcp_server.query_cost import (
+    estimate_cost,
+    evaluations,
+    parse_selectors,
+    parse_tool_budgets,
+    query_budget,
+    widened_step,
+)
+from prometheus_mcp_server.range_cache import IncrementalRangeCache
+from prometheus_mcp_server.range_split import MAX_POINTS_PER_SERIES, fetch_shards, is_retryable, split_range
+from prometheus_mcp_server.rules import ALERT_STATES, RULE_TYPES, RuleCache, filter_alerts, rule_summary
+from prometheus_mcp_server.single_flight import SingleFlight
+from prometheus_mcp_server.sse_transport import ToolCallLimiter
+from prometheus_mcp_server.targets import TARGET_STATES, filter_targets, paginate, project, summarize_targets
+from prometheus_mcp_server.telemetry import COUNT_BUCKETS, SIZE_BUCKETS, Counter, Registry, cache_metrics, serve_metrics
+from prometheus_mcp_server.summarize import summarize_result, validate_output_options
+from prometheus_mcp_server.time_utils import align_range, format_timestamp, parse_duration, parse_timestamp
+from prometheus_mcp_server.watch import WATCH_URI_TEMPLATE, WatchRegistry, watch_id_from_uri
 
-dotenv.load_dotenv()
-mcp = FastMCP("Prometheus MCP")
+# Loaded once per process, before the configuration below is read
+env_file_loaded = dotenv.load_dotenv()
 
 # Get logger instance
 logger = get_logger()
 
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+def _env_duration(name: str, default: str) -> float:
+    value = os.environ.get(name) or default
+    return 0.0 if value.strip() == "0" else parse_duration(value)
+
 @dataclass
 class PrometheusConfig:
+    # Default backend, a comma-separated list of HA replica URLs
     url: str
     # Optional credentials
     username: Optional[str] = None
@@ -27,6 +81,98 @@ class PrometheusConfig:
     token: Optional[str] = None
     # Optional Org ID for multi-tenant setups
     org_id: Optional[str] = None
+    # HTTP client pool and timeout settings
+    timeout: float = 30.0
+    connect_timeout: float = 5.0
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = True
+    # Query result cache settings (TTLs in seconds, 0 disables caching for that endpoint)
+    cache_enabled: bool = True
+    cache_max_bytes: int = 64 * 1024 * 1024
+    cache_ttl_query: float = 60.0
+    cache_ttl_query_now: float = 5.0
+    cache_ttl_query_range: float = 60.0
+    cache_ttl_targets: float = 15.0
+    cache_ttl_alerts: float = 15.0
+    # Incremental range query sample cache settings
+    range_cache_enabled: bool = True
+    range_cache_max_bytes: int = 128 * 1024 * 1024
+    range_cache_max_freshness: float = 60.0
+    # Range query splitting settings (interval in seconds, 0 splits only on the point limit)
+    range_split_interval: float = 24 * 3600.0
+    range_split_max_points: int = MAX_POINTS_PER_SERIES
+    range_split_concurrency: int = 4
+    range_split_retries: int = 0
+    # Default limits for summarized query output modes
+    summary_max_points: int = 200
+    summary_topk: int = 10
+    # Metric name index refresh intervals in seconds (0 disables background refresh)
+    metric_index_refresh_interval: float = 300.0
+    metric_index_full_refresh_interval: float = 3600.0
+    # Metric metadata cache
+    metadata_ttl: float = 300.0
+    # Cardinality analysis: TTL of cached analyses, maximum series fetched per selector
+    # and the default time window searched for series (seconds)
+    cardinality_ttl: float = 300.0
+    cardinality_series_limit: int = 10000
+    cardinality_lookback: float = 3600.0
+    # Rules: TTL of the cached rule index (seconds) and whether queries matching a
+    # recording rule's expression are answered from the recorded series instead
+    rules_ttl: float = 60.0
+    query_rewrite: bool = False
+    # Watches: shortest evaluation interval (seconds), maximum number of watched queries
+    # and seconds after which subscriptions that are not polled expire
+    watch_min_interval: float = 5.0
+    watch_max: int = 100
+    watch_idle_timeout: float = 300.0
+    # Export: directory range query results are written to when exported, and the number
+    # and age (seconds) of exports kept there (0 disables either limit)
+    export_dir: str = field(default_factory=lambda: os.path.join(tempfile.gettempdir(), "prometheus-mcp-exports"))
+    export_max_files: int = 100
+    export_max_age: float = 86400.0
+    # Disk cache: SQLite file shared by server processes (empty disables it), its size bound
+    # and the age after which query results can no longer change and are kept without expiry (seconds)
+    disk_cache_path: str = ""
+    disk_cache_max_bytes: int = 512 * 1024 * 1024
+    disk_cache_settle_window: float = 3600.0
+    # Query pre-flight: maximum estimated samples a query may load (0 disables the check),
+    # per-tool budgets, what to do with range queries over budget (adjust the step or reject)
+    # and the scrape interval assumed when counting the samples in a range
+    query_max_samples: int = 0
+    tool_max_samples: Dict[str, int] = field(default_factory=dict)
+    query_guard: str = "adjust"
+    scrape_interval: float = 15.0
+    # Maximum queries of one execute_queries batch sent to Prometheus at the same time
+    batch_concurrency: int = 8
+    # Share one upstream request between concurrent identical requests
+    coalesce_requests: bool = True
+    # Per-backend flow control: retries with jittered backoff, hedging to replicas,
+    # adaptive concurrency and rate limits, and a deadline for each request (seconds)
+    request_retries: int = 2
+    retry_backoff: float = 0.2
+    retry_backoff_max: float = 5.0
+    hedge_delay: float = 2.0
+    request_deadline: float = 60.0
+    max_concurrency: int = 32
+    rate_limit: float = 50.0
+    rate_burst: float = 100.0
+    latency_threshold: float = 10.0
+    # Port and address of the /metrics endpoint exposing the server's own metrics (0 disables it)
+    metrics_port: int = 0
+    metrics_host: str = "127.0.0.1"
+    # MCP transport (stdio or sse) and, for sse, the listen address, the maximum number of
+    # client sessions and concurrent tool calls (0 = unlimited) and the shutdown drain timeout
+    transport: str = "stdio"
+    host: str = "127.0.0.1"
+    port: int = 8000
+    max_sessions: int = 100
+    max_concurrent_tool_calls: int = 64
+    drain_timeout: float = 30.0
+    # Named backends besides the default one, and the label naming the backend of merged series
+    backends: Dict[str, Backend] = field(default_factory=dict)
+    source_label: str = "backend"
 
 config = PrometheusConfig(
     url=os.environ.get("PROMETHEUS_URL", ""),
@@ -34,47 +180,459 @@ config = PrometheusConfig(
     password=os.environ.get("PROMETHEUS_PASSWORD", ""),
     token=os.environ.get("PROMETHEUS_TOKEN", ""),
     org_id=os.environ.get("ORG_ID", ""),
+    timeout=float(os.environ.get("PROMETHEUS_TIMEOUT", "30")),
+    connect_timeout=float(os.environ.get("PROMETHEUS_CONNECT_TIMEOUT", "5")),
+    max_connections=int(os.environ.get("PROMETHEUS_MAX_CONNECTIONS", "100")),
+    max_keepalive_connections=int(os.environ.get("PROMETHEUS_MAX_KEEPALIVE_CONNECTIONS", "20")),
+    keepalive_expiry=float(os.environ.get("PROMETHEUS_KEEPALIVE_EXPIRY", "30")),
+    http2=_env_bool("PROMETHEUS_HTTP2", True),
+    cache_enabled=_env_bool("PROMETHEUS_CACHE_ENABLED", True),
+    cache_max_bytes=int(os.environ.get("PROMETHEUS_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    cache_ttl_query=float(os.environ.get("PROMETHEUS_CACHE_TTL_QUERY", "60")),
+    cache_ttl_query_now=float(os.environ.get("PROMETHEUS_CACHE_TTL_QUERY_NOW", "5")),
+    cache_ttl_query_range=float(os.environ.get("PROMETHEUS_CACHE_TTL_QUERY_RANGE", "60")),
+    cache_ttl_targets=float(os.environ.get("PROMETHEUS_CACHE_TTL_TARGETS", "15")),
+    cache_ttl_alerts=float(os.environ.get("PROMETHEUS_CACHE_TTL_ALERTS", "15")),
+    range_cache_enabled=_env_bool("PROMETHEUS_RANGE_CACHE_ENABLED", True),
+    range_cache_max_bytes=int(os.environ.get("PROMETHEUS_RANGE_CACHE_MAX_BYTES", str(128 * 1024 * 1024))),
+    range_cache_max_freshness=float(os.environ.get("PROMETHEUS_RANGE_CACHE_MAX_FRESHNESS", "60")),
+    range_split_interval=_env_duration("PROMETHEUS_RANGE_SPLIT_INTERVAL", "1d"),
+    range_split_max_points=int(os.environ.get("PROMETHEUS_RANGE_SPLIT_MAX_POINTS", str(MAX_POINTS_PER_SERIES))),
+    range_split_concurrency=int(os.environ.get("PROMETHEUS_RANGE_SPLIT_CONCURRENCY", "4")),
+    range_split_retries=int(os.environ.get("PROMETHEUS_RANGE_SPLIT_RETRIES", "0")),
+    summary_max_points=int(os.environ.get("PROMETHEUS_SUMMARY_MAX_POINTS", "200")),
+    summary_topk=int(os.environ.get("PROMETHEUS_SUMMARY_TOPK", "10")),
+    metric_index_refresh_interval=float(os.environ.get("PROMETHEUS_METRIC_INDEX_REFRESH_INTERVAL", "300")),
+    metric_index_full_refresh_interval=float(os.environ.get("PROMETHEUS_METRIC_INDEX_FULL_REFRESH_INTERVAL", "3600")),
+    metadata_ttl=float(os.environ.get("PROMETHEUS_METADATA_TTL", "300")),
+    cardinality_ttl=float(os.environ.get("PROMETHEUS_CARDINALITY_TTL", "300")),
+    cardinality_series_limit=int(os.environ.get("PROMETHEUS_CARDINALITY_SERIES_LIMIT", "10000")),
+    cardinality_lookback=_env_duration("PROMETHEUS_CARDINALITY_LOOKBACK", "1h"),
+    rules_ttl=float(os.environ.get("PROMETHEUS_RULES_TTL", "60")),
+    query_rewrite=_env_bool("PROMETHEUS_QUERY_REWRITE", False),
+    watch_min_interval=_env_duration("PROMETHEUS_WATCH_MIN_INTERVAL", "5s"),
+    watch_max=int(os.environ.get("PROMETHEUS_WATCH_MAX", "100")),
+    watch_idle_timeout=_env_duration("PROMETHEUS_WATCH_IDLE_TIMEOUT", "5m"),
+    export_dir=os.environ.get("PROMETHEUS_EXPORT_DIR") or os.path.join(tempfile.gettempdir(), "prometheus-mcp-exports"),
+    export_max_files=int(os.environ.get("PROMETHEUS_EXPORT_MAX_FILES", "100")),
+    export_max_age=_env_duration("PROMETHEUS_EXPORT_MAX_AGE", "1d"),
+    disk_cache_path=os.environ.get("PROMETHEUS_DISK_CACHE_PATH", ""),
+    disk_cache_max_bytes=int(os.environ.get("PROMETHEUS_DISK_CACHE_MAX_BYTES", str(512 * 1024 * 1024))),
+    disk_cache_settle_window=_env_duration("PROMETHEUS_DISK_CACHE_SETTLE_WINDOW", "1h"),
+    query_max_samples=int(os.environ.get("PROMETHEUS_MAX_SAMPLES", "0")),
+    tool_max_samples=parse_tool_budgets(os.environ, ["execute_query", "execute_range_query"]),
+    query_guard=os.environ.get("PROMETHEUS_QUERY_GUARD", "adjust").strip().lower(),
+    scrape_interval=_env_duration("PROMETHEUS_SCRAPE_INTERVAL", "15s"),
+    batch_concurrency=int(os.environ.get("PROMETHEUS_BATCH_CONCURRENCY", "8")),
+    coalesce_requests=_env_bool("PROMETHEUS_COALESCE_REQUESTS", True),
+    request_retries=int(os.environ.get("PROMETHEUS_REQUEST_RETRIES", "2")),
+    retry_backoff=float(os.environ.get("PROMETHEUS_RETRY_BACKOFF", "0.2")),
+    retry_backoff_max=float(os.environ.get("PROMETHEUS_RETRY_BACKOFF_MAX", "5")),
+    hedge_delay=float(os.environ.get("PROMETHEUS_HEDGE_DELAY", "2")),
+    request_deadline=float(os.environ.get("PROMETHEUS_REQUEST_DEADLINE", "60")),
+    max_concurrency=int(os.environ.get("PROMETHEUS_MAX_CONCURRENCY", "32")),
+    rate_limit=float(os.environ.get("PROMETHEUS_RATE_LIMIT", "50")),
+    rate_burst=float(os.environ.get("PROMETHEUS_RATE_BURST", "100")),
+    latency_threshold=float(os.environ.get("PROMETHEUS_LATENCY_THRESHOLD", "10")),
+    metrics_port=int(os.environ.get("PROMETHEUS_MCP_METRICS_PORT", "0")),
+    metrics_host=os.environ.get("PROMETHEUS_MCP_METRICS_HOST", "127.0.0.1"),
+    transport=os.environ.get("PROMETHEUS_MCP_TRANSPORT", "stdio").strip().lower(),
+    host=os.environ.get("PROMETHEUS_MCP_HOST", "127.0.0.1"),
+    port=int(os.environ.get("PROMETHEUS_MCP_PORT", "8000")),
+    max_sessions=int(os.environ.get("PROMETHEUS_MCP_MAX_SESSIONS", "100")),
+    max_concurrent_tool_calls=int(os.environ.get("PROMETHEUS_MCP_MAX_CONCURRENT_TOOL_CALLS", "64")),
+    drain_timeout=float(os.environ.get("PROMETHEUS_MCP_DRAIN_TIMEOUT", "30")),
+    backends=parse_backends(),
+    source_label=os.environ.get("PROMETHEUS_SOURCE_LABEL", "backend"),
+)
+
+# Shared LRU cache for instant and range query results
+result_cache = ResultCache(max_bytes=config.cache_max_bytes)
+
+# Sample cache that lets sliding-window range queries fetch only the new data
+range_cache = IncrementalRangeCache(
+    max_bytes=config.range_cache_max_bytes,
+    max_freshness=config.range_cache_max_freshness,
+)
+
+# Results kept on disk across sessions and shared with other server processes, None when disabled
+disk_cache: Optional[DiskCache] = (
+    DiskCache(config.disk_cache_path, config.disk_cache_max_bytes) if config.disk_cache_path else None
+)
+
+# Identical requests in flight at the same time share one upstream call
+single_flight = SingleFlight()
+
+# Latency and health of every replica, used to send reads to the fastest healthy one
+replica_tracker = ReplicaTracker()
+
+# Rate and concurrency limits per backend name, None for the default backend
+limiters: Dict[Optional[str], AdaptiveLimiter] = {}
+
+# Tool calls running at once across all client sessions
+tool_calls = ToolCallLimiter(config.max_concurrent_tool_calls)
+
+# Shared HTTP client, created once per server process and reused by every tool call
+_http_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared pooled HTTP client, creating it on first use."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_http_client(config)
+    return _http_client
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client and release its pooled connections."""
+    global _http_client
+    client, _http_client = _http_client, None
+    if client is not None and not client.is_closed:
+        await client.aclose()
+        logger.info("Prometheus HTTP client closed")
+
+def persisted_fetch(ttl):
+    """Build a fetch function for the background caches that keeps their full downloads on disk.
+
+    Requests without parameters (all metadata, all metric names) are served from
+    the disk cache while younger than ttl seconds, so a new session starts with
+    what another session or process loaded recently. Requests with parameters go
+    straight to Prometheus.
+    """
+    async def fetch(endpoint, **kwargs):
+        request = lambda: make_prometheus_request(endpoint, **kwargs)
+        if kwargs.get("params"):
+            return await request()
+        return await disk_cached_request(endpoint, make_cache_key(endpoint), ttl, request, kwargs.get("backend"))
+    return fetch
+
+# Full metric metadata, fetched in one request and refreshed in the background
+metadata_cache = MetadataCache(
+    fetch=persisted_fetch(config.metadata_ttl),
+    ttl=config.metadata_ttl,
+)
+
+# Index of metric names, refreshed in the background while the server runs
+metric_index = MetricIndex(
+    fetch=persisted_fetch(config.metric_index_refresh_interval),
+    full_refresh_interval=config.metric_index_full_refresh_interval,
+    metadata=metadata_cache,
+)
+
+# Series counts per backend, selector and label, from the TSDB status and series APIs
+cardinality_cache = CardinalityCache(
+    fetch=lambda endpoint, **kwargs: make_prometheus_request(endpoint, **kwargs),
+    ttl=config.cardinality_ttl,
+    series_limit=config.cardinality_series_limit,
+    lookback=config.cardinality_lookback,
+)
+
+# Rules of every backend asked about, indexed for listing and recording rule rewrites
+rule_cache = RuleCache(
+    fetch=lambda endpoint, **kwargs: make_prometheus_request(endpoint, **kwargs),
+    ttl=config.rules_ttl,
+)
+
+# Instant queries evaluated on a schedule for watch subscriptions, one evaluation per distinct query
+watch_registry = WatchRegistry(
+    evaluate=lambda query, backend: query_backends(
+        backend, lambda name: make_prometheus_request("query", params={"query": query}, backend=name)
+    ),
+    max_watches=config.watch_max,
+    idle_timeout=config.watch_idle_timeout,
 )
 
-def get_prometheus_auth():
+# Metrics about the server itself, served at /metrics when PROMETHEUS_MCP_METRICS_PORT is set
+registry = Registry()
+tool_duration = registry.histogram(
+    "prometheus_mcp_tool_duration_seconds", "Duration of MCP tool calls", ("tool",))
+tool_errors = registry.counter(
+    "prometheus_mcp_tool_errors_total", "Failed MCP tool calls by error type", ("tool", "error_type"))
+tool_in_flight = registry.gauge(
+    "prometheus_mcp_tool_calls_in_flight", "MCP tool calls in progress", ("tool",))
+upstream_duration = registry.histogram(
+    "prometheus_mcp_upstream_request_duration_seconds", "Duration of requests to Prometheus", ("backend", "endpoint"))
+upstream_bytes = registry.histogram(
+    "prometheus_mcp_upstream_response_bytes", "Size of Prometheus response bodies", ("backend", "endpoint"),
+    buckets=SIZE_BUCKETS)
+upstream_errors = registry.counter(
+    "prometheus_mcp_upstream_errors_total", "Failed requests to Prometheus by error type",
+    ("backend", "endpoint", "error_type"))
+upstream_in_flight = registry.gauge(
+    "prometheus_mcp_upstream_requests_in_flight", "Requests to Prometheus in progress", ("backend",))
+result_series = registry.histogram(
+    "prometheus_mcp_result_series", "Series per query result", ("tool",), buckets=COUNT_BUCKETS)
+result_samples = registry.histogram(
+    "prometheus_mcp_result_samples", "Samples per query result", ("tool",), buckets=COUNT_BUCKETS)
+registry.add_collector(lambda: cache_metrics({
+    "result": result_cache.stats,
+    "range": range_cache.stats,
+    "metadata": metadata_cache.stats,
+    "cardinality": cardinality_cache.stats,
+    "rules": rule_cache.stats,
+    "request_coalescing": single_flight.stats,
+    # Counters and occupancy kept in memory: scrapes run on the event loop and never query the file
+    **({"disk": disk_cache.stats} if disk_cache is not None else {}),
+}))
+
+def log_metrics():
+    """Report the log records dropped because the log queue was full."""
+    dropped = Counter("prometheus_mcp_log_records_dropped_total", "Log records dropped because the log queue was full")
+    dropped.inc(amount=dropped_records())
+    return [dropped]
+
+registry.add_collector(log_metrics)
+
+def observe_result(tool, data):
+    """Record the series and sample counts of a query result.
+
+    Scalar and string results, a single [timestamp, value] pair, count as one series and one sample.
+    """
+    result_type = data.get("resultType")
+    if result_type == "matrix":
+        series = len(data["result"])
+        samples = sum(len(item.get("values", ())) for item in data["result"])
+    elif result_type == "vector":
+        series = samples = len(data["result"])
+    else:
+        series = samples = 1
+    result_series.observe(series, (tool,))
+    result_samples.observe(samples, (tool,))
+    return series, samples
+
+# Number of active server_lifespan users and the resources they share
+_lifespan_users = 0
+_lifespan_lock = asyncio.Lock()
+_lifespan_resources: Dict[str, Any] = {}
+
+async def _start_resources() -> None:
+    get_http_client()
+    refresh_tasks = []
+    if config.metric_index_refresh_interval > 0:
+        refresh_tasks.append(asyncio.create_task(metric_index.run(config.metric_index_refresh_interval)))
+    if config.metadata_ttl > 0:
+        refresh_tasks.append(asyncio.create_task(metadata_cache.run(config.metadata_ttl)))
+    if config.cardinality_ttl > 0:
+        refresh_tasks.append(asyncio.create_task(cardinality_cache.run(config.cardinality_ttl)))
+    if config.rules_ttl > 0:
+        refresh_tasks.append(asyncio.create_task(rule_cache.run(config.rules_ttl)))
+    _lifespan_resources["refresh_tasks"] = refresh_tasks
+    _lifespan_resources["metrics_server"] = None
+    if config.metrics_port > 0:
+        _lifespan_resources["metrics_server"] = await serve_metrics(registry, config.metrics_host, config.metrics_port)
+
+async def _stop_resources() -> None:
+    refresh_tasks = _lifespan_resources.pop("refresh_tasks", [])
+    for task in refresh_tasks:
+        task.cancel()
+    await asyncio.gather(*refresh_tasks, return_exceptions=True)
+    await watch_registry.close()
+    if disk_cache is not None:
+        disk_cache.close()
+    metrics_server = _lifespan_resources.pop("metrics_server", None)
+    if metrics_server is not None:
+        metrics_server.close()
+        await metrics_server.wait_closed()
+    await close_http_client()
+
+@asynccontextmanager
+async def server_lifespan(server: FastMCP) -> AsyncIterator[None]:
+    """Open the shared HTTP client and start background refreshes at startup, stop them on shutdown.
+
+    The lifespan is entered once per client session with the SSE transport, so
+    the resources are reference counted: the first user starts them and the
+    last one stops them, and sessions never pay for reconnecting or reloading.
+    """
+    global _lifespan_users
+    async with _lifespan_lock:
+        if _lifespan_users == 0:
+            await _start_resources()
+        _lifespan_users += 1
+    try:
+        yield
+    finally:
+        async with _lifespan_lock:
+            _lifespan_users -= 1
+            if _lifespan_users == 0:
+                await _stop_resources()
+
+def encode_tool_result(fn):
+    """Wrap a tool so dict and list results are returned as JSON text encoded with orjson.
+
+    FastMCP passes text content through unchanged, so results are encoded in one
+    pass instead of being copied into JSON-compatible objects first, and lists
+    are returned as a single JSON array.
+    """
+    @functools.wraps(fn)
+    async def tool(*args, **kwargs):
+        result = await fn(*args, **kwargs)
+        if isinstance(result, (dict, list)):
+            return TextContent(type="text", text=dumps(result))
+        return result
+    return tool
+
+class PrometheusMCP(FastMCP):
+    """FastMCP server that encodes structured tool results with the fast JSON encoder
+    and records the latency and errors of every tool call."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The low-level server never advertises resource subscriptions, which watch resources support
+        get_capabilities = self._mcp_server.get_capabilities
+
+        def capabilities(*args, **kwargs):
+            result = get_capabilities(*args, **kwargs)
+            if result.resources is not None:
+                result.resources.subscribe = True
+            return result
+
+        self._mcp_server.get_capabilities = capabilities
+
+    async def run_session(self, read_stream, write_stream) -> None:
+        """Serve one client session on an already connected pair of streams."""
+        await self._mcp_server.run(read_stream, write_stream, self._mcp_server.create_initialization_options())
+
+    def add_tool(self, fn, name=None, description=None):
+        super().add_tool(encode_tool_result(fn), name=name, description=description)
+
+    async def call_tool(self, name, arguments):
+        labels = (name,)
+        tool_in_flight.inc(labels)
+        started = time.perf_counter()
+        try:
+            async with tool_calls.slot():
+                return await super().call_tool(name, arguments)
+        except Exception as e:
+            # Tool errors are wrapped by FastMCP, count the original error type
+            tool_errors.inc((name, type(e.__cause__ or e).__name__))
+            raise
+        finally:
+            tool_in_flight.dec(labels)
+            tool_duration.observe(time.perf_counter() - started, labels)
+
+mcp = PrometheusMCP("Prometheus MCP", lifespan=server_lifespan)
+
+def get_backend(name=None):
+    """Return the settings of a named backend, or the default backend's config for None or 'default'."""
+    if name in (None, DEFAULT_BACKEND):
+        return config
+    if name not in config.backends:
+        choices = ", ".join([DEFAULT_BACKEND, ALL_BACKENDS] + list(config.backends))
+        raise ValueError(f"Unknown backend '{name}', expected one of {choices}")
+    return config.backends[name]
+
+def get_limiter(backend=None):
+    """Return the flow control limiter of a backend, creating it on first use."""
+    name = None if backend == DEFAULT_BACKEND else backend
+    if name not in limiters:
+        limiters[name] = AdaptiveLimiter(
+            max_concurrency=config.max_concurrency,
+            rate=config.rate_limit,
+            burst=config.rate_burst,
+            latency_threshold=config.latency_threshold,
+        )
+    return limiters[name]
+
+def get_prometheus_auth(backend=None):
     """Get authentication for Prometheus based on provided credentials."""
-    if config.token:
-        return {"Authorization": f"Bearer {config.token}"}
-    elif config.username and config.password:
-        return requests.auth.HTTPBasicAuth(config.username, config.password)
+    target = backend or config
+    if target.token:
+        return {"Authorization": f"Bearer {target.token}"}
+    elif target.username and target.password:
+        return httpx.BasicAuth(target.username, target.password)
     return None
 
-def make_prometheus_request(endpoint, params=None):
-    """Make a request to the Prometheus API with proper authentication and headers."""
-    if not config.url:
+async def make_prometheus_request(endpoint, params=None, backend=None):
+    """Make a request to the Prometheus API, joining an identical request already in flight."""
+    if not config.coalesce_requests:
+        return await send_prometheus_request(endpoint, params, backend)
+    sent = False
+
+    async def send():
+        nonlocal sent
+        sent = True
+        return await send_prometheus_request(endpoint, params, backend)
+
+    data = await single_flight.do((backend,) + make_cache_key(endpoint, params), send)
+    if not sent:
+        # The response was read, and measured, for the caller that sent the request
+        mark_size_inexact()
+    return data
+
+async def send_prometheus_request(endpoint, params=None, backend=None):
+    """Make a request to a backend within its flow control limits.
+
+    Replicas are tried fastest first, slow requests are hedged to the next replica,
+    and transient failures of all replicas are retried with jittered exponential
+    backoff until the request deadline.
+    """
+    target = get_backend(backend)
+    if not target.url:
         logger.error("Prometheus configuration missing", error="PROMETHEUS_URL not set")
         raise ValueError("Prometheus configuration is missing. Please set PROMETHEUS_URL environment variable.")
 
-    url = f"{config.url.rstrip('/')}/api/v1/{endpoint}"
-    auth = get_prometheus_auth()
+    limiter = get_limiter(backend)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + config.request_deadline if config.request_deadline > 0 else None
+    attempt = 0
+    while True:
+        try:
+            async with limiter.slot(deadline):
+                return await hedged(
+                    replica_tracker.order(replica_urls(target.url)),
+                    lambda replica: send_replica_request(replica, endpoint, params, target, limiter),
+                    hedge_delay=config.hedge_delay,
+                    on_hedge=limiter.record_hedge,
+                )
+        except Exception as e:
+            attempt += 1
+            if attempt > config.request_retries or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt, config.retry_backoff, config.retry_backoff_max)
+            if deadline is not None and loop.time() + delay >= deadline:
+                raise
+            limiter.retries += 1
+            logger.warning("Prometheus request failed, retrying", endpoint=endpoint, attempt=attempt,
+                           delay=round(delay, 3), error=str(e), error_type=type(e).__name__)
+            await asyncio.sleep(delay)
+
+async def send_replica_request(base_url, endpoint, params, target, limiter):
+    """Make a request to one Prometheus replica with proper authentication and headers."""
+    url = f"{base_url}/api/v1/{endpoint}"
+    backend = getattr(target, "name", DEFAULT_BACKEND)
+    auth = get_prometheus_auth(target)
     headers = {}
 
     if isinstance(auth, dict):  # Token auth is passed via headers
         headers.update(auth)
-        auth = None  # Clear auth for requests.get if it's already in headers
+        auth = None  # Clear auth for the request if it's already in headers
     
     # Add OrgID header if specified
-    if config.org_id:
-        headers["X-Scope-OrgID"] = config.org_id
+    if target.org_id:
+        headers["X-Scope-OrgID"] = target.org_id
 
     try:
         logger.debug("Making Prometheus API request", endpoint=endpoint, url=url, params=params)
         
-        # Make the request with appropriate headers and auth
-        response = requests.get(url, params=params, auth=auth, headers=headers)
-        
-        response.raise_for_status()
-        result = response.json()
+        # Stream the response over the shared pooled client and decode it in a single pass
+        upstream_in_flight.inc((backend,))
+        started = time.perf_counter()
+        try:
+            async with get_http_client().stream("GET", url, params=params, auth=auth, headers=headers) as response:
+                response.raise_for_status()
+                result, size = await read_json(response)
+        finally:
+            upstream_in_flight.dec((backend,))
+        elapsed = time.perf_counter() - started
+        upstream_duration.observe(elapsed, (backend, endpoint))
+        upstream_bytes.observe(response.num_bytes_downloaded, (backend, endpoint))
+        replica_tracker.success(base_url, elapsed)
+        limiter.record_success(elapsed)
         
         if result["status"] != "success":
             error_msg = result.get('error', 'Unknown error')
             logger.error("Prometheus API returned error", endpoint=endpoint, error=error_msg, status=result["status"])
             raise ValueError(f"Prometheus API error: {error_msg}")
+        record_response_size(size)
         
         data_field = result.get("data", {})
         if isinstance(data_field, dict):
@@ -84,48 +642,441 @@ def make_prometheus_request(endpoint, params=None):
         logger.debug("Prometheus API request successful", endpoint=endpoint, result_type=result_type)
         return result["data"]
     
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
+        if is_retryable(e):
+            replica_tracker.failure(base_url)
+        limiter.record_failure(e)
+        upstream_errors.inc((backend, endpoint, type(e).__name__))
         logger.error("HTTP request to Prometheus failed", endpoint=endpoint, url=url, error=str(e), error_type=type(e).__name__)
         raise
     except json.JSONDecodeError as e:
+        upstream_errors.inc((backend, endpoint, type(e).__name__))
         logger.error("Failed to parse Prometheus response as JSON", endpoint=endpoint, url=url, error=str(e))
         raise ValueError(f"Invalid JSON response from Prometheus: {str(e)}")
     except Exception as e:
+        upstream_errors.inc((backend, endpoint, type(e).__name__))
         logger.error("Unexpected error during Prometheus request", endpoint=endpoint, url=url, error=str(e), error_type=type(e).__name__)
         raise
 
-@mcp.tool(description="Execute a PromQL instant query against Prometheus")
-async def execute_query(query: str, time: Optional[str] = None) -> Dict[str, Any]:
+async def cached_prometheus_request(endpoint, params, ttl, use_cache=True, key=None, fetch=None, backend=None):
+    """Serve a Prometheus request from the result cache, fetching and storing it on a miss.
+
+    Args:
+        fetch: Optional coroutine function used instead of make_prometheus_request on a miss
+        backend: Name of the backend the request goes to, None for the default backend
+    """
+    if fetch is None:
+        fetch = lambda: make_prometheus_request(endpoint, params=params, backend=backend)
+
+    if not (use_cache and config.cache_enabled and ttl > 0):
+        return await fetch()
+
+    if key is None:
+        key = make_cache_key(endpoint, params)
+    if backend is not None:
+        key = (backend, key)
+    data = result_cache.get(key)
+    if data is not None:
+        logger.debug("Query result served from cache", endpoint=endpoint)
+        return data
+
+    # Size the entry from the responses it was decoded from instead of encoding it again
+    with measure_size() as measured:
+        data = await disk_cached_request(endpoint, key, disk_cache_ttl(endpoint, params, ttl), fetch, backend)
+    result_cache.set(key, data, ttl, size=measured.size)
+    return data
+
+def disk_cache_key(key, backend=None):
+    """Build the disk cache key of a request, namespaced by the backend's URL and credentials.
+
+    The file may be shared by servers pointed at different Prometheus servers or
+    tenants. The credentials are hashed so they are not written to disk.
+    """
+    settings = get_backend(backend)
+    identity = dumps([settings.url, settings.org_id, settings.username, settings.token])
+    return dumps([hashlib.sha256(identity.encode()).hexdigest()[:16], key])
+
+def is_settled(endpoint, params):
+    """Check whether a query only reads samples older than the settle window, so its result can no longer change."""
+    name = {"query": "time", "query_range": "end"}.get(endpoint)
+    if name is None or config.disk_cache_settle_window <= 0 or not params or not params.get(name):
+        return False
+    try:
+        end = parse_timestamp(params[name])
+    except ValueError:
+        return False
+    return end < time.time() - config.disk_cache_settle_window
+
+def disk_cache_ttl(endpoint, params, ttl):
+    """Return how long a result is kept on disk: None (no expiry) for settled queries,
+    0 (not stored) for other queries and the result cache TTL for other endpoints."""
+    if is_settled(endpoint, params):
+        return None
+    if endpoint in ("query", "query_range"):
+        return 0
+    return ttl
+
+async def disk_cached_request(endpoint, key, ttl, fetch, backend=None):
+    """Serve a request from the disk cache, fetching and storing it on a miss.
+
+    Args:
+        key: Cache key of the request, without the backend
+        ttl: Seconds the result stays on disk, None to keep it until evicted, 0 to not store it
+        fetch: Coroutine function fetching the result on a miss
+        backend: Name of the backend the request goes to, None for the default backend
+    """
+    if disk_cache is None or ttl == 0:
+        return await fetch()
+    disk_key = disk_cache_key(key, backend)
+    data = await asyncio.to_thread(disk_cache.get, disk_key)
+    if data is not None:
+        logger.debug("Result served from disk cache", endpoint=endpoint)
+        mark_size_inexact()
+        return data
+    data = await fetch()
+    await asyncio.to_thread(disk_cache.set, disk_key, data, ttl)
+    return data
+
+def is_stitchable(query):
+    """Check whether a range query can be evaluated in pieces and stitched back together.
+
+    Queries using the @ start()/end() modifiers depend on the whole range.
+    """
+    return "start()" not in query and "end()" not in query
+
+async def fetch_range_window(params, backend=None):
+    """Fetch a range query, splitting long ranges into shards that are fetched concurrently."""
+    try:
+        start = parse_timestamp(params["start"])
+        end = parse_timestamp(params["end"])
+        step = parse_duration(params["step"])
+    except ValueError:
+        return await make_prometheus_request("query_range", params=params, backend=backend)
+
+    shards = split_range(start, end, step, config.range_split_interval, config.range_split_max_points)
+    if len(shards) == 1 or not is_stitchable(params["query"]):
+        return await make_prometheus_request("query_range", params=params, backend=backend)
+
+    async def fetch_shard(shard_start, shard_end):
+        shard = dict(params, start=format_timestamp(shard_start), end=format_timestamp(shard_end))
+        data = await make_prometheus_request("query_range", params=shard, backend=backend)
+        return data["result"]
+
+    logger.debug("Splitting range query", query=params["query"], shards=len(shards))
+    result = await fetch_shards(
+        shards, fetch_shard,
+        concurrency=config.range_split_concurrency,
+        retries=config.range_split_retries,
+    )
+    return {"resultType": "matrix", "result": result}
+
+async def fetch_range_query(params, backend=None):
+    """Fetch a step-aligned range query, requesting only windows missing from the range cache."""
+    aligned = align_range(params["start"], params["end"], params["step"])
+    if not config.range_cache_enabled or aligned is None or not is_stitchable(params["query"]):
+        return await fetch_range_window(params, backend)
+
+    start, end, step = aligned
+    fetched = []
+
+    async def fetch_window(window_start, window_end):
+        window = params
+        if (window_start, window_end) != (start, end):
+            window = dict(params, start=format_timestamp(window_start), end=format_timestamp(window_end))
+        data = await fetch_range_window(window, backend)
+        fetched.append(data["result"])
+        return data["result"]
+
+    result = await range_cache.query(params["query"], start, end, step, fetch_window, namespace=backend)
+    if not (len(fetched) == 1 and result is fetched[0]):
+        # Samples from the range cache are not part of any response read for this request
+        mark_size_inexact()
+    return {"resultType": "matrix", "result": result}
+
+def align_range_params(params):
+    """Align range query start/end to the step so equivalent ranges share a cache key.
+
+    Returns:
+        Tuple of (params, cache key); params are left untouched if they cannot be parsed
+    """
+    aligned = align_range(params["start"], params["end"], params["step"])
+    if aligned is None:
+        return params, make_cache_key("query_range", params)
+
+    start, end, step = aligned
+    params = dict(params)
+    if parse_timestamp(params["start"]) != start:
+        params["start"] = format_timestamp(start)
+    if parse_timestamp(params["end"]) != end:
+        params["end"] = format_timestamp(end)
+    return params, ("query_range", params["query"], start, end, step)
+
+async def query_backends(backend, fetch):
+    """Run fetch(backend) against one backend, or against every backend concurrently for 'all'.
+
+    Results from several backends are merged with a label naming the backend of each
+    series. Backends that failed are listed under failedBackends as long as one succeeded.
+    """
+    if backend != ALL_BACKENDS:
+        get_backend(backend)
+        return await fetch(backend)
+
+    names = [DEFAULT_BACKEND] + list(config.backends)
+    outcomes = await asyncio.gather(
+        *(fetch(None if name == DEFAULT_BACKEND else name) for name in names), return_exceptions=True
+    )
+    results, failed = {}, {}
+    for name, outcome in zip(names, outcomes):
+        if isinstance(outcome, Exception):
+            failed[name] = str(outcome)
+            logger.warning("Backend query failed", backend=name, error=str(outcome), error_type=type(outcome).__name__)
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        else:
+            results[name] = outcome
+    if not results:
+        raise ValueError("All backends failed: " + "; ".join(f"{name}: {error}" for name, error in failed.items()))
+
+    data = merge_backend_results(results, config.source_label)
+    if failed:
+        data["failedBackends"] = failed
+    return data
+
+async def rewrite_query(query, backend=None, rewrite=None):
+    """Replace a query by the series of the recording rule that computes the same expression.
+
+    Rewriting is enabled with PROMETHEUS_QUERY_REWRITE or per call. It applies
+    to single backends only, as each backend has its own rules, and queries
+    are left unchanged if the rules cannot be loaded.
+
+    Returns:
+        Tuple of (query to run, report of the rewrite or None)
+    """
+    if not (config.query_rewrite if rewrite is None else rewrite) or backend == ALL_BACKENDS:
+        return query, None
+    try:
+        index = await rule_cache.index(None if backend == DEFAULT_BACKEND else backend)
+        rule = index.recording_rule(query)
+    except Exception as e:
+        logger.warning("Recording rule lookup failed", query=query, backend=backend, error=str(e),
+                       error_type=type(e).__name__)
+        return query, None
+    if rule is None:
+        return query, None
+    logger.info("Query rewritten to recording rule", query=query, rule=rule["name"], group=rule["group"])
+    return rule["name"], {"query": query, "recordingRule": rule["name"], "group": rule["group"],
+                          "interval": rule.get("interval")}
+
+async def estimate_query_cost(query, evaluation_count, budget, backend=None):
+    """Estimate the samples a query loads on one backend, from cached cardinality figures."""
+    async def series_count(selector):
+        count, _ = await cardinality_cache.series_count(selector.selector, backend)
+        return count
+
+    async def upper_bound(selector):
+        bound = await cardinality_cache.series_upper_bound(selector.metric, backend)
+        return bound if bound is not None else await series_count(selector)
+
+    return await estimate_cost(parse_selectors(query), evaluation_count, config.scrape_interval,
+                               upper_bound, series_count, budget)
+
+async def preflight_query(tool, query, backend=None, start=None, end=None, step=None):
+    """Check a query's estimated sample count against its budget before it reaches Prometheus.
+
+    Budgets are set globally, per tool and per backend; the smallest applies.
+    Range queries over budget get a wider step when PROMETHEUS_QUERY_GUARD is
+    'adjust', everything else over budget is rejected. Queries whose cost
+    cannot be estimated are let through.
+
+    Returns:
+        Tuple of (step to use, report of the adjustment or None)
+
+    Raises:
+        ValueError: If the query is over budget and cannot be adjusted
+    """
+    # The default backend is always looked up as None, so it shares one set of cardinality cache entries
+    names = [None if backend == DEFAULT_BACKEND else backend]
+    if backend == ALL_BACKENDS:
+        names = [None] + list(config.backends)
+    budgets = {
+        name: query_budget([config.query_max_samples, config.tool_max_samples.get(tool, 0),
+                            # The default backend's own budget is PROMETHEUS_MAX_SAMPLES
+                            0 if name is None else get_backend(name).max_samples])
+        for name in names
+    }
+    if not any(budgets.values()):
+        return step, None
+
+    if step is None:
+        span = None
+        evaluation_count = 1
+    else:
+        try:
+            span = (parse_timestamp(start), parse_timestamp(end), parse_duration(step))
+        except ValueError:
+            return step, None
+        evaluation_count = evaluations(*span)
+
+    new_step = None
+    for name, budget in budgets.items():
+        if not budget:
+            continue
+        try:
+            estimate = await estimate_query_cost(query, evaluation_count, budget, name)
+        except Exception as e:
+            logger.warning("Query cost estimate failed", query=query, backend=name, error=str(e),
+                           error_type=type(e).__name__)
+            continue
+        if estimate.samples <= budget:
+            continue
+        widened = None
+        if span is not None and config.query_guard == "adjust":
+            widened = widened_step(span[0], span[1], span[2], estimate.per_evaluation, budget)
+        if widened is None:
+            logger.warning("Query rejected by pre-flight check", query=query, backend=name,
+                           estimated_samples=estimate.samples, budget=budget)
+            raise ValueError(
+                f"Query would load about {estimate.samples} samples, over the budget of {budget}. "
+                "Narrow the selectors, shorten the range or widen the step"
+            )
+        new_step = max(new_step or 0.0, widened)
+
+    if new_step is None:
+        return step, None
+    adjusted = f"{format_timestamp(new_step)}s"
+    logger.info("Query step widened by pre-flight check", query=query, step=step, adjusted_step=adjusted)
+    return adjusted, {"step": {"requested": step, "used": adjusted},
+                      "evaluations": evaluations(span[0], span[1], new_step)}
+
+def summarize_query_result(data, output, max_points, downsample_method, topk, stat):
+    """Apply the requested output mode to a query result, using configured default limits."""
+    result = summarize_result(
+        data,
+        output=output,
+        max_points=config.summary_max_points if max_points is None else max_points,
+        method=downsample_method,
+        topk=config.summary_topk if topk is None else topk,
+        stat=stat,
+    )
+    for key in ("truncated", "failedBackends"):
+        if key in data:
+            result[key] = data[key]
+    return result
+
+def project_query_result(data, backend, keep_labels, drop_labels, sort, limit, sample_limit, stat):
+    """Project a query result to the requested labels and series, keeping the backend label of merged results."""
+    if keep_labels is not None and backend == ALL_BACKENDS and config.source_label not in keep_labels:
+        keep_labels = list(keep_labels) + [config.source_label]
+    return project_result(data, keep_labels=keep_labels, drop_labels=drop_labels, sort=sort, limit=limit,
+                          sample_limit=sample_limit, stat=stat)
+
+@mcp.tool(description="Execute a PromQL instant query against Prometheus. Use keep_labels, sort and limit to return only the labels and series needed, or output='stats' or 'topk' to summarize large results")
+async def execute_query(
+    query: str,
+    time: Optional[str] = None,
+    use_cache: bool = True,
+    output: str = "raw",
+    max_points: Optional[int] = None,
+    downsample_method: str = "lttb",
+    topk: Optional[int] = None,
+    stat: str = "avg",
+    keep_labels: Optional[List[str]] = None,
+    drop_labels: Optional[List[str]] = None,
+    sort: Optional[str] = None,
+    limit: Optional[int] = None,
+    sample_limit: Optional[int] = None,
+    rewrite: Optional[bool] = None,
+    backend: Optional[str] = None,
+) -> Dict[str, Any]:
     """Execute an instant query against Prometheus.
     
     Args:
         query: PromQL query string
         time: Optional RFC3339 or Unix timestamp (default: current time)
+        use_cache: Serve repeated queries from the result cache (default: True)
+        output: Output mode: 'raw', 'downsample', 'stats' or 'topk' (default: 'raw')
+        max_points: Maximum samples per series when downsampling matrix results
+        downsample_method: Downsampling method, 'lttb' or 'minmax' (default: 'lttb')
+        topk: Number of series returned in 'topk' mode
+        stat: Statistic used to rank series in 'topk' mode and to sort matrices: min, max, avg, p95 or last
+        keep_labels: Labels kept on each series, e.g. ['job', 'instance']; all others are dropped
+        drop_labels: Labels removed from each series
+        sort: Order series by value, 'asc' or 'desc'
+        limit: Maximum number of series returned
+        sample_limit: Maximum number of samples returned over all series
+        rewrite: Query the recorded series of a recording rule with the same expression (default: PROMETHEUS_QUERY_REWRITE)
+        backend: Backend to query, or 'all' to query every backend and merge the results (default: the default backend)
         
     Returns:
-        Query result with type (vector, matrix, scalar, string) and values
+        Query result with type (vector, matrix, scalar, string) and values, under
+        'truncated' the series and sample totals if limits cut the result, and
+        under 'rewrite' the recording rule queried instead of the expression
     """
+    validate_output_options(output, downsample_method, stat, max_points, topk)
+    validate_projection(keep_labels, drop_labels, sort, limit, sample_limit)
+    query, rewritten = await rewrite_query(query, backend, rewrite)
+    await preflight_query("execute_query", query, backend)
     params = {"query": query}
     if time:
         params["time"] = time
     
-    logger.info("Executing instant query", query=query, time=time)
-    data = make_prometheus_request("query", params=params)
+    logger.info("Executing instant query", query=query, time=time, backend=backend)
+    # Queries relative to "now" go stale quickly, so they only get a short TTL
+    ttl = config.cache_ttl_query if time else config.cache_ttl_query_now
+    data = await query_backends(
+        backend, lambda name: cached_prometheus_request("query", params, ttl, use_cache=use_cache, backend=name)
+    )
     
-    result = {
-        "resultType": data["resultType"],
-        "result": data["result"]
-    }
+    projected = project_query_result(data, backend, keep_labels, drop_labels, sort, limit, sample_limit, stat)
+    result = summarize_query_result(projected, output, max_points, downsample_method, topk, stat)
+    if rewritten:
+        result["rewrite"] = rewritten
     
+    series, samples = observe_result("execute_query", data)
     logger.info("Instant query completed", 
                 query=query, 
                 result_type=data["resultType"], 
-                result_count=len(data["result"]) if isinstance(data["result"], list) else 1)
+                result_count=series,
+                sample_count=samples)
     
     return result
 
-@mcp.tool(description="Execute a PromQL range query with start time, end time, and step interval")
-async def execute_range_query(query: str, start: str, end: str, step: str) -> Dict[str, Any]:
+async def export_query_result(data: Dict[str, Any], fmt: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Write a matrix result to a file in the export directory and return its summary in place of the values."""
+    if data["resultType"] != "matrix":
+        raise ValueError(f"Only matrix results can be exported, got {data['resultType']}")
+    path = export_path(config.export_dir, params["query"], params, fmt)
+    # Large results take a while to write, which must not block other tool calls
+    summary = await asyncio.to_thread(export_matrix, data["result"], path, fmt)
+    pruned = await asyncio.to_thread(prune_exports, config.export_dir, config.export_max_files, config.export_max_age)
+    logger.info("Range query exported", path=summary["path"], format=fmt, bytes=summary["bytes"], pruned=pruned)
+    result = {"resultType": "matrix", "export": summary}
+    for key in ("truncated", "failedBackends"):
+        if key in data:
+            result[key] = data[key]
+    return result
+
+@mcp.tool(description="Execute a PromQL range query with start time, end time, and step interval. Use keep_labels, sort, limit and sample_limit to return only the labels and series needed, output='downsample', 'stats' or 'topk' to summarize large matrices, or export='csv', 'arrow' or 'parquet' to write the samples to a local file and return only its URI and summary stats")
+async def execute_range_query(
+    query: str,
+    start: str,
+    end: str,
+    step: str,
+    use_cache: bool = True,
+    output: str = "raw",
+    max_points: Optional[int] = None,
+    downsample_method: str = "lttb",
+    topk: Optional[int] = None,
+    stat: str = "avg",
+    keep_labels: Optional[List[str]] = None,
+    drop_labels: Optional[List[str]] = None,
+    sort: Optional[str] = None,
+    limit: Optional[int] = None,
+    sample_limit: Optional[int] = None,
+    rewrite: Optional[bool] = None,
+    export: Optional[str] = None,
+    backend: Optional[str] = None,
+) -> Dict[str, Any]:
     """Execute a range query against Prometheus.
     
     Args:
@@ -133,10 +1084,35 @@ async def execute_range_query(query: str, start: str, end: str, step: str) -> Di
         start: Start time as RFC3339 or Unix timestamp
         end: End time as RFC3339 or Unix timestamp
         step: Query resolution step width (e.g., '15s', '1m', '1h')
+        use_cache: Serve repeated queries from the result cache (default: True)
+        output: Output mode: 'raw', 'downsample', 'stats' or 'topk' (default: 'raw')
+        max_points: Maximum samples per series when downsampling
+        downsample_method: Downsampling method, 'lttb' or 'minmax' (default: 'lttb')
+        topk: Number of series returned in 'topk' mode
+        stat: Statistic used to rank series in 'topk' mode and to sort matrices: min, max, avg, p95 or last
+        keep_labels: Labels kept on each series, e.g. ['job', 'instance']; all others are dropped
+        drop_labels: Labels removed from each series
+        sort: Order series by value, 'asc' or 'desc'
+        limit: Maximum number of series returned
+        sample_limit: Maximum number of samples returned over all series
+        rewrite: Query the recorded series of a recording rule with the same expression (default: PROMETHEUS_QUERY_REWRITE)
+        export: Write the samples to a file in PROMETHEUS_EXPORT_DIR instead of returning them: 'csv', 'arrow' (Arrow IPC) or 'parquet'
+        backend: Backend to query, or 'all' to query every backend and merge the results (default: the default backend)
         
     Returns:
-        Range query result with type (usually matrix) and values over time
+        Range query result with type (usually matrix) and values over time, under
+        'truncated' the series and sample totals if limits cut the result, under
+        'rewrite' the recording rule queried instead of the expression, and
+        under 'preflight' the widened step if the query was over its sample budget.
+        When exported, 'export' holds the file's path, URI, size, columns, series
+        and sample counts, time range and value range instead of the values
     """
+    validate_output_options(output, downsample_method, stat, max_points, topk)
+    validate_projection(keep_labels, drop_labels, sort, limit, sample_limit)
+    if export is not None:
+        validate_export_format(export)
+    query, rewritten = await rewrite_query(query, backend, rewrite)
+    step, preflight = await preflight_query("execute_range_query", query, backend, start, end, step)
     params = {
         "query": query,
         "start": start,
@@ -144,21 +1120,209 @@ async def execute_range_query(query: str, start: str, end: str, step: str) -> Di
         "step": step
     }
     
-    logger.info("Executing range query", query=query, start=start, end=end, step=step)
-    data = make_prometheus_request("query_range", params=params)
+    logger.info("Executing range query", query=query, start=start, end=end, step=step, backend=backend)
+    if use_cache and (config.cache_enabled or config.range_cache_enabled):
+        params, key = align_range_params(params)
+
+        async def fetch(name):
+            return await cached_prometheus_request(
+                "query_range", params, config.cache_ttl_query_range, key=key,
+                fetch=lambda: fetch_range_query(params, name), backend=name,
+            )
+    else:
+        async def fetch(name):
+            return await fetch_range_window(params, name)
+    data = await query_backends(backend, fetch)
     
-    result = {
-        "resultType": data["resultType"],
-        "result": data["result"]
-    }
+    projected = project_query_result(data, backend, keep_labels, drop_labels, sort, limit, sample_limit, stat)
+    if export is not None:
+        result = await export_query_result(projected, export, params)
+    else:
+        result = summarize_query_result(projected, output, max_points, downsample_method, topk, stat)
+    if rewritten:
+        result["rewrite"] = rewritten
+    if preflight:
+        result["preflight"] = preflight
     
+    series, samples = observe_result("execute_range_query", data)
     logger.info("Range query completed", 
                 query=query, 
                 result_type=data["resultType"], 
-                result_count=len(data["result"]) if isinstance(data["result"], list) else 1)
+                result_count=series,
+                sample_count=samples)
     
     return result
 
+async def run_timed(run, semaphore):
+    """Await run() under the semaphore and report its result or error with the elapsed time."""
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            outcome = {"status": "success", "data": await run()}
+        except Exception as e:
+            outcome = {"status": "error", "error": str(e), "errorType": type(e).__name__}
+        outcome["durationMs"] = round((time.perf_counter() - started) * 1000, 3)
+    return outcome
+
+@mcp.tool(description="Execute several PromQL queries concurrently, as instant queries or, with start/end/step, as range queries. Results are keyed by query")
+async def execute_queries(
+    queries: List[str],
+    time: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    step: Optional[str] = None,
+    use_cache: bool = True,
+    output: str = "raw",
+    max_points: Optional[int] = None,
+    downsample_method: str = "lttb",
+    topk: Optional[int] = None,
+    stat: str = "avg",
+    keep_labels: Optional[List[str]] = None,
+    drop_labels: Optional[List[str]] = None,
+    sort: Optional[str] = None,
+    limit: Optional[int] = None,
+    sample_limit: Optional[int] = None,
+    rewrite: Optional[bool] = None,
+    backend: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Execute a batch of queries against Prometheus concurrently.
+    
+    Args:
+        queries: PromQL query strings; duplicates are executed once
+        time: Optional RFC3339 or Unix timestamp for instant queries (default: current time)
+        start: Start time of range queries, requires end and step
+        end: End time of range queries, requires start and step
+        step: Step width of range queries, requires start and end
+        use_cache: Serve repeated queries from the result cache (default: True)
+        output: Output mode applied to every result: 'raw', 'downsample', 'stats' or 'topk' (default: 'raw')
+        max_points: Maximum samples per series when downsampling
+        downsample_method: Downsampling method, 'lttb' or 'minmax' (default: 'lttb')
+        topk: Number of series returned in 'topk' mode
+        stat: Statistic used to rank series in 'topk' mode and to sort matrices: min, max, avg, p95 or last
+        keep_labels: Labels kept on each series, e.g. ['job', 'instance']; all others are dropped
+        drop_labels: Labels removed from each series
+        sort: Order series by value, 'asc' or 'desc'
+        limit: Maximum number of series returned
+        sample_limit: Maximum number of samples returned over all series
+        rewrite: Query the recorded series of a recording rule with the same expression (default: PROMETHEUS_QUERY_REWRITE)
+        backend: Backend to query, or 'all' to query every backend and merge the results (default: the default backend)
+        
+    Returns:
+        Dictionary with per-query results, each with status, data or error, and duration,
+        plus the duration of the whole batch
+    """
+    validate_output_options(output, downsample_method, stat, max_points, topk)
+    validate_projection(keep_labels, drop_labels, sort, limit, sample_limit)
+    range_params = (start, end, step)
+    if any(range_params) and not all(range_params):
+        raise ValueError("Range queries need all of start, end and step")
+    if all(range_params) and time:
+        raise ValueError("time cannot be combined with start, end and step")
+
+    unique = list(dict.fromkeys(queries))
+    options = dict(use_cache=use_cache, output=output, max_points=max_points,
+                   downsample_method=downsample_method, topk=topk, stat=stat, keep_labels=keep_labels,
+                   drop_labels=drop_labels, sort=sort, limit=limit, sample_limit=sample_limit, rewrite=rewrite,
+                   backend=backend)
+    if all(range_params):
+        def run_query(query):
+            return lambda: execute_range_query(query, start, end, step, **options)
+    else:
+        def run_query(query):
+            return lambda: execute_query(query, time, **options)
+
+    logger.info("Executing query batch", query_count=len(unique), duplicates=len(queries) - len(unique),
+                range=all(range_params))
+    started = asyncio.get_running_loop().time()
+    semaphore = asyncio.Semaphore(max(1, config.batch_concurrency))
+    outcomes = await asyncio.gather(*(run_timed(run_query(query), semaphore) for query in unique))
+    duration_ms = round((asyncio.get_running_loop().time() - started) * 1000, 3)
+
+    results = dict(zip(unique, outcomes))
+    errors = sum(1 for outcome in outcomes if outcome["status"] == "error")
+    logger.info("Query batch completed", query_count=len(unique), errors=errors, duration_ms=duration_ms)
+    return {"results": results, "durationMs": duration_ms}
+
+@mcp.tool(description="Watch a PromQL instant query: it is evaluated every interval and get_watch_updates returns only the series added, removed or changed since the last call. Use instead of repeating execute_query in a loop")
+async def watch_query(
+    query: str,
+    interval: str = "30s",
+    threshold: float = 0.0,
+    backend: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Subscribe to the changes of an instant query.
+
+    Watches of the same expression, backend and interval share one evaluation.
+    Updates can be polled with get_watch_updates or by reading the watch's
+    resource URI, and clients subscribed to that resource are notified when
+    there are changes to read.
+
+    Args:
+        query: PromQL query string returning an instant vector or scalar
+        interval: Time between evaluations, e.g. '15s' or '1m' (default: '30s')
+        threshold: Absolute change below which a value is not reported as changed (default: 0, any change)
+        backend: Backend to query, or 'all' to query every backend and merge the results (default: the default backend)
+
+    Returns:
+        The watch ID and resource URI, with every current series under 'added'
+    """
+    seconds = parse_duration(interval)
+    if seconds < config.watch_min_interval:
+        raise ValueError(f"interval must be at least {config.watch_min_interval:g}s")
+    if threshold < 0:
+        raise ValueError("threshold must not be negative")
+    if backend != ALL_BACKENDS:
+        get_backend(backend)
+    backend = None if backend == DEFAULT_BACKEND else backend
+
+    logger.info("Watching query", query=query, interval=seconds, backend=backend)
+    return await watch_registry.watch(query, seconds, threshold, backend)
+
+@mcp.tool(description="Get the changes of a watched query since the last call: series added, removed and changed by more than the watch's threshold")
+async def get_watch_updates(watch_id: str) -> Dict[str, Any]:
+    """Get the changes of a watched query since it was last read.
+
+    Args:
+        watch_id: ID returned by watch_query
+
+    Returns:
+        Dictionary with the 'added', 'removed' and 'changed' series (with their
+        'previous' value), the number of 'unchanged' series, the number of
+        evaluations and the time of the last one, and under 'error' why the
+        last evaluation failed
+    """
+    return watch_registry.poll(watch_id)
+
+@mcp.tool(description="Stop watching a query")
+async def unwatch_query(watch_id: str) -> Dict[str, Any]:
+    """Remove a watch; its query stops being evaluated once no watch uses it.
+
+    Args:
+        watch_id: ID returned by watch_query
+
+    Returns:
+        Dictionary with the watch ID and whether it existed
+    """
+    removed = await watch_registry.unwatch(watch_id)
+    logger.info("Unwatched query", watch=watch_id, removed=removed)
+    return {"watch": watch_id, "removed": removed}
+
+@mcp.resource(WATCH_URI_TEMPLATE, name="watch", description="Changes of a watched query since it was last read",
+              mime_type="application/json")
+def read_watch(watch_id: str) -> str:
+    """Read a watch resource, which returns the same changes as get_watch_updates."""
+    return dumps(watch_registry.poll(watch_id))
+
+@mcp._mcp_server.subscribe_resource()
+async def subscribe_watch(uri) -> None:
+    """Send the subscribing session a resource updated notification whenever the watch has changes to read."""
+    watch_registry.add_listener(watch_id_from_uri(str(uri)), mcp._mcp_server.request_context.session)
+
+@mcp._mcp_server.unsubscribe_resource()
+async def unsubscribe_watch(uri) -> None:
+    """Stop notifying the session of a watch's changes."""
+    watch_registry.remove_listener(watch_id_from_uri(str(uri)), mcp._mcp_server.request_context.session)
+
 @mcp.tool(description="List all available metrics in Prometheus")
 async def list_metrics() -> List[str]:
     """Retrieve a list of all metric names available in Prometheus.
@@ -167,10 +1331,55 @@ async def list_metrics() -> List[str]:
         List of metric names as strings
     """
     logger.info("Listing available metrics")
-    data = make_prometheus_request("label/__name__/values")
+    await metric_index.ensure_loaded()
+    data = metric_index.names
     logger.info("Metrics list retrieved", metric_count=len(data))
     return data
 
+@mcp.tool(description="Search metric names by prefix, substring or fuzzy match, with type, help text and optionally label names")
+async def search_metrics(
+    query: str,
+    mode: str = "auto",
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    include_labels: bool = False,
+) -> Dict[str, Any]:
+    """Search the metric index.
+    
+    Args:
+        query: Case-insensitive search string, e.g. 'http_req' or 'reqdur'
+        mode: 'prefix', 'substring', 'fuzzy', or 'auto' to combine them, best matches first (default: 'auto')
+        limit: Maximum number of metrics to return (default: 50)
+        cursor: Cursor from a previous response to fetch the next page
+        include_labels: Also return the label names of each metric (default: False)
+        
+    Returns:
+        Dictionary with matching metrics, the total match count and the cursor for the next page
+    """
+    logger.info("Searching metrics", query=query, mode=mode, limit=limit, cursor=cursor)
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    try:
+        offset = int(cursor) if cursor else 0
+    except ValueError:
+        offset = -1
+    if offset < 0:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    await metric_index.ensure_loaded(metadata=True)
+    matches = metric_index.search(query, mode)
+    page = matches[offset:offset + limit]
+    if include_labels:
+        await metric_index.label_names(page)
+
+    next_offset = offset + len(page)
+    result = {
+        "metrics": [metric_index.describe(name) for name in page],
+        "total": len(matches),
+        "nextCursor": str(next_offset) if next_offset < len(matches) else None,
+    }
+    logger.info("Metric search completed", query=query, total=len(matches), returned=len(page))
+    return result
+
 @mcp.tool(description="Get metadata for a specific metric")
 async def get_metric_metadata(metric: str) -> List[Dict[str, Any]]:
     """Get metadata about a specific metric.
@@ -182,32 +1391,266 @@ async def get_metric_metadata(metric: str) -> List[Dict[str, Any]]:
         List of metadata entries for the metric
     """
     logger.info("Retrieving metric metadata", metric=metric)
-    params = {"metric": metric}
-    data = make_prometheus_request("metadata", params=params)
-    logger.info("Metric metadata retrieved", metric=metric, metadata_count=len(data["metadata"]))
-    return data["metadata"]
+    await metadata_cache.ensure_loaded()
+    data = metadata_cache.get(metric)
+    logger.info("Metric metadata retrieved", metric=metric, metadata_count=len(data))
+    return data
 
-@mcp.tool(description="Get information about all scrape targets")
-async def get_targets() -> Dict[str, List[Dict[str, Any]]]:
-    """Get information about all Prometheus scrape targets.
+@mcp.tool(description="Get metadata for several metrics at once")
+async def get_metrics_metadata(metrics: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Get metadata about several metrics in one call.
     
+    Args:
+        metrics: The names of the metrics to retrieve metadata for
+        
     Returns:
-        Dictionary with active and dropped targets information
+        Dictionary mapping each metric name to its list of metadata entries
     """
-    logger.info("Retrieving scrape targets information")
-    data = make_prometheus_request("targets")
+    logger.info("Retrieving metadata for metrics", metric_count=len(metrics))
+    await metadata_cache.ensure_loaded()
+    data = metadata_cache.get_many(metrics)
+    logger.info("Metrics metadata retrieved", metric_count=len(data),
+                found=sum(1 for entries in data.values() if entries))
+    return data
+
+@mcp.tool(description="Get scrape targets, filtered by state, job and health, paginated and projected to selected fields. Use summary=true for target counts per job and health with details of only the unhealthy targets")
+async def get_targets(
+    state: str = "any",
+    job: Optional[str] = None,
+    health: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    summary: bool = False,
+    backend: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Get information about Prometheus scrape targets.
     
+    Args:
+        state: 'active', 'dropped' or 'any' (default: 'any')
+        job: Only targets of this job
+        health: Only targets with this health: 'up', 'down' or 'unknown'
+        fields: Fields returned per target, e.g. ['scrapeUrl', 'health', 'labels.instance'] (default: all)
+        limit: Maximum number of targets returned, active targets first (default: all)
+        cursor: Cursor from a previous response to fetch the next page
+        summary: Return counts per job and health and the unhealthy targets instead of the target list (default: False)
+        backend: Backend to ask (default: the default backend)
+        
+    Returns:
+        Dictionary with active and dropped targets, and with limit or cursor the totals
+        and the cursor of the next page; in summary mode the counts and unhealthy targets
+    """
+    if state not in TARGET_STATES:
+        raise ValueError(f"Invalid state '{state}', expected one of {', '.join(TARGET_STATES)}")
+    if backend == ALL_BACKENDS:
+        raise ValueError("Targets are listed per backend, select a single backend")
+    get_backend(backend)
+    backend = None if backend == DEFAULT_BACKEND else backend
+
+    logger.info("Retrieving scrape targets information", state=state, job=job, health=health, summary=summary)
+    params = {"state": state} if state != "any" else None
+    data = await cached_prometheus_request("targets", params, config.cache_ttl_targets, backend=backend)
+    active = filter_targets(data.get("activeTargets") or [], job, health)
+    dropped = filter_targets(data.get("droppedTargets") or [], job, health)
+
+    if summary:
+        result = summarize_targets(active, dropped, limit or config.summary_topk)
+    else:
+        page_active, page_dropped, next_cursor = paginate(active, dropped, limit, cursor)
+        if fields:
+            page_active = [project(target, fields) for target in page_active]
+            page_dropped = [project(target, fields) for target in page_dropped]
+        result = {"activeTargets": page_active, "droppedTargets": page_dropped}
+        if limit is not None or cursor:
+            result["total"] = {"active": len(active), "dropped": len(dropped)}
+            result["nextCursor"] = next_cursor
+    
+    logger.info("Scrape targets retrieved", 
+                active_targets=len(active), 
+                dropped_targets=len(dropped))
+    
+    return result
+
+@mcp.tool(description="List recording and alerting rules with their expressions, health and alert state. Query a recording rule's name instead of recomputing its expression")
+async def get_rules(
+    rule_type: Optional[str] = None,
+    name: Optional[str] = None,
+    group: Optional[str] = None,
+    health: Optional[str] = None,
+    state: Optional[str] = None,
+    include_alerts: bool = False,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    backend: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Get the rules of a backend from its cached rule index.
+
+    Args:
+        rule_type: Only 'recording' or 'alerting' rules
+        name: Only rules whose name contains this text (case-insensitive)
+        group: Only rules of this rule group
+        health: Only rules with this health: 'ok', 'err' or 'unknown'
+        state: Only alerting rules in this state: 'firing', 'pending' or 'inactive'
+        include_alerts: Include the active alerts of alerting rules instead of their count (default: False)
+        limit: Maximum number of rules returned (default: all)
+        cursor: Cursor from a previous response to fetch the next page
+        backend: Backend to ask (default: the default backend)
+
+    Returns:
+        Dictionary with the matching rules, their total and the cursor of the next page
+    """
+    if rule_type is not None and rule_type not in RULE_TYPES:
+        raise ValueError(f"Invalid rule type '{rule_type}', expected one of {', '.join(RULE_TYPES)}")
+    if state is not None and state not in ALERT_STATES:
+        raise ValueError(f"Invalid alert state '{state}', expected one of {', '.join(ALERT_STATES)}")
+    if backend == ALL_BACKENDS:
+        raise ValueError("Rules are listed per backend, select a single backend")
+    get_backend(backend)
+    backend = None if backend == DEFAULT_BACKEND else backend
+
+    logger.info("Retrieving rules", rule_type=rule_type, name=name, group=group, backend=backend)
+    index = await rule_cache.index(backend)
+    rules = index.find(rule_type=rule_type, name=name, group=group, health=health, state=state)
+    page, _, next_cursor = paginate(rules, [], limit, cursor)
     result = {
-        "activeTargets": data["activeTargets"],
-        "droppedTargets": data["droppedTargets"]
+        "rules": [rule_summary(rule, include_alerts) for rule in page],
+        "total": len(rules),
+        "nextCursor": next_cursor,
     }
+    logger.info("Rules retrieved", rule_count=len(rules))
+    return result
+
+@mcp.tool(description="List active alerts, filtered by state, alert name and labels, with counts of firing and pending alerts")
+async def get_alerts(
+    state: Optional[str] = None,
+    name: Optional[str] = None,
+    labels: Optional[Dict[str, str]] = None,
+    limit: Optional[int] = None,
+    backend: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Get the active alerts of a backend.
+
+    Args:
+        state: Only alerts in this state: 'firing' or 'pending'
+        name: Only alerts with this alertname
+        labels: Only alerts with all of these label values, e.g. {'severity': 'critical'}
+        limit: Maximum number of alerts returned (default: all)
+        backend: Backend to ask (default: the default backend)
+
+    Returns:
+        Dictionary with the matching alerts, their total and the number firing and pending
+    """
+    if state is not None and state not in ALERT_STATES[:2]:
+        raise ValueError(f"Invalid alert state '{state}', expected one of {', '.join(ALERT_STATES[:2])}")
+    if limit is not None and limit < 1:
+        raise ValueError("limit must be at least 1")
+    if backend == ALL_BACKENDS:
+        raise ValueError("Alerts are listed per backend, select a single backend")
+    get_backend(backend)
+    backend = None if backend == DEFAULT_BACKEND else backend
+
+    logger.info("Retrieving alerts", state=state, name=name, backend=backend)
+    data = await cached_prometheus_request("alerts", None, config.cache_ttl_alerts, backend=backend)
+    alerts = filter_alerts(data.get("alerts") or [], state, name, labels)
+    result = {
+        "alerts": alerts[:limit] if limit is not None else alerts,
+        "total": len(alerts),
+        "firing": sum(1 for alert in alerts if alert.get("state") == "firing"),
+        "pending": sum(1 for alert in alerts if alert.get("state") == "pending"),
+    }
+    logger.info("Alerts retrieved", alert_count=len(alerts), firing=result["firing"])
+    return result
+
+@mcp.tool(description="Analyze series cardinality: the largest metrics and labels overall, the series matching a selector with their label value distribution and estimated result size, or the values of one label")
+async def analyze_cardinality(
+    selector: Optional[str] = None,
+    label: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    topk: int = 10,
+    backend: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Analyze how many series a backend, a selector or a label has.
     
-    logger.info("Scrape targets retrieved", 
-                active_targets=len(data["activeTargets"]), 
-                dropped_targets=len(data["droppedTargets"]))
+    Args:
+        selector: Series selector, e.g. 'http_requests_total{job="api"}'; omit for an overview of the whole TSDB
+        label: Label name whose values are counted, restricted to the selector if one is given
+        start: Start of the window searched for series, RFC3339 or Unix timestamp (default: end minus the lookback)
+        end: End of the window searched for series, RFC3339 or Unix timestamp (default: now)
+        topk: Number of metrics, labels and values listed (default: 10)
+        backend: Backend to analyze (default: the default backend)
+        
+    Returns:
+        Dictionary with series counts, top metrics, labels and label values, and for
+        selectors the estimated size in bytes of an instant query result
+    """
+    if backend == ALL_BACKENDS:
+        raise ValueError("Cardinality is analyzed per backend, select a single backend")
+    get_backend(backend)
+    backend = None if backend == DEFAULT_BACKEND else backend
+    logger.info("Analyzing cardinality", selector=selector, label=label, backend=backend)
+
+    if label:
+        values = await cardinality_cache.label_values(label, selector, backend)
+        result = {"label": label, "selector": selector, "values": len(values), "sampleValues": values[:topk]}
+    elif selector:
+        analysis = await cardinality_cache.selector(
+            selector, backend,
+            start=parse_timestamp(start) if start else None,
+            end=parse_timestamp(end) if end else None,
+        )
+        result = dict(selector=selector, **analysis.summary(topk))
+    else:
+        result = status_overview(await cardinality_cache.tsdb_status(backend), topk)
+
+    logger.info("Cardinality analyzed", selector=selector, label=label,
+                series=result.get("series", result.get("totalSeries")))
+    return result
+
+@mcp.tool(description="List the Prometheus backends that query tools can select, with replica health and request limits")
+async def list_backends() -> List[Dict[str, Any]]:
+    """List the configured Prometheus backends.
     
+    Returns:
+        List of backends with their name, org ID, replicas and current request limits
+    """
+    replicas = replica_tracker.stats()
+    targets = [config] + list(config.backends.values())
+    result = [
+        {
+            "name": getattr(target, "name", DEFAULT_BACKEND),
+            "orgId": target.org_id or None,
+            "replicas": [dict(url=url, **replicas.get(url, {})) for url in replica_urls(target.url)],
+            "limits": get_limiter(getattr(target, "name", None)).stats(),
+        }
+        for target in targets
+    ]
+    logger.info("Backends listed", backend_count=len(result))
     return result
 
+@mcp.tool(description="Get hit, miss and eviction statistics for the query and metadata caches, and request coalescing counters")
+async def get_cache_stats() -> Dict[str, Any]:
+    """Get statistics for the server's query caches.
+    
+    Returns:
+        Dictionary with hit/miss/eviction counters and current occupancy per cache,
+        and executed/coalesced counters for upstream requests
+    """
+    stats = {
+        "result_cache": result_cache.stats(),
+        "range_cache": range_cache.stats(),
+        "metadata_cache": metadata_cache.stats(),
+        "cardinality_cache": cardinality_cache.stats(),
+        "rules_cache": rule_cache.stats(),
+    }
+    if disk_cache is not None:
+        await asyncio.to_thread(disk_cache.refresh_occupancy)
+        stats["disk_cache"] = disk_cache.stats()
+    logger.info("Cache statistics retrieved", **{name: cache["entries"] for name, cache in stats.items()})
+    stats["request_coalescing"] = single_flight.stats()
+    stats["watches"] = watch_registry.stats()
+    return stats
+
 if __name__ == "__main__":
     logger.info("Starting Prometheus MCP Server", mode="direct")
     mcp.run()
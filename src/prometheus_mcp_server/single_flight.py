@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Future[Any]"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into a single execution.
+
+    The first caller for a key starts the call as a task; callers arriving
+    while it is in flight await the same task and receive the same result or
+    exception. A caller being cancelled does not cancel the shared call unless
+    it was the last one waiting for it. Keys are forgotten as soon as the call
+    completes, so results are never reused afterwards.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn() for key, or join the call already in flight for the same key."""
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task: self._forget(key, call, task))
+            self.executed += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    def stats(self) -> Dict[str, int]:
+        """Return executed and coalesced call counters and the calls in flight."""
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls),
+        }
+
+    def _forget(self, key: Hashable, call: _Call, task: "asyncio.Future[Any]") -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        # Mark the error as retrieved when every caller already gave up waiting
+        if not task.cancelled():
+            task.exception()
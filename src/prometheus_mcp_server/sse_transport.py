@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, List, Optional
+
+import anyio
+import uvicorn
+from mcp.server.sse import SseServerTransport
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Mount, Route
+
+from prometheus_mcp_server.logging_config import get_logger
+
+logger = get_logger()
+
+
+class ToolCallLimiter:
+    """Bound the number of tool calls running at once across all sessions.
+
+    Also tracks the calls in progress so that shutdown can wait for them.
+    """
+
+    def __init__(self, max_concurrency: int = 0):
+        self.max_concurrency = max_concurrency
+        self.active = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._idle: List[asyncio.Future] = []
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold a tool call slot, waiting for one if the limit is reached."""
+        if self.max_concurrency > 0:
+            if self._semaphore is None:
+                self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            await self._semaphore.acquire()
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            if self._semaphore is not None:
+                self._semaphore.release()
+            if self.active == 0:
+                for waiter in self._idle:
+                    if not waiter.done():
+                        waiter.set_result(None)
+                self._idle.clear()
+
+    async def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Wait until no tool call is running.
+
+        Returns:
+            False if calls were still running when the timeout expired
+        """
+        if self.active == 0:
+            return True
+        waiter = asyncio.get_running_loop().create_future()
+        self._idle.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+class SessionManager:
+    """Admit SSE sessions up to a limit and drain them on shutdown.
+
+    Draining rejects new sessions, waits for running tool calls to finish
+    (at most drain_timeout seconds) and then closes every open session.
+    """
+
+    def __init__(self, max_sessions: int, drain_timeout: float, calls: ToolCallLimiter):
+        self.max_sessions = max_sessions
+        self.drain_timeout = drain_timeout
+        self.calls = calls
+        self.active = 0
+        self.draining = False
+        self._drained: Optional[asyncio.Event] = None
+
+    def admit(self) -> bool:
+        """Reserve a session slot, False when draining or at the session limit."""
+        if self.draining or (self.max_sessions > 0 and self.active >= self.max_sessions):
+            return False
+        self.active += 1
+        return True
+
+    def release(self) -> None:
+        """Free a session slot."""
+        self.active -= 1
+
+    async def wait_drained(self) -> None:
+        """Wait until sessions have to be closed because the server shuts down."""
+        await self._event().wait()
+
+    async def drain(self) -> None:
+        """Stop admitting sessions, let running tool calls finish, then close the sessions."""
+        self.draining = True
+        logger.info("Draining MCP sessions", sessions=self.active, tool_calls=self.calls.active,
+                    timeout=self.drain_timeout)
+        if not await self.calls.wait_idle(self.drain_timeout or None):
+            logger.warning("Drain timeout expired with tool calls still running", tool_calls=self.calls.active)
+        self._event().set()
+
+    def stats(self) -> dict:
+        """Return session and tool call counts."""
+        return {
+            "sessions": self.active,
+            "max_sessions": self.max_sessions,
+            "tool_calls": self.calls.active,
+            "draining": self.draining,
+        }
+
+    def _event(self) -> asyncio.Event:
+        if self._drained is None:
+            self._drained = asyncio.Event()
+        return self._drained
+
+
+class _SseEndpoint:
+    """ASGI endpoint running one MCP session per SSE connection."""
+
+    def __init__(self, transport: SseServerTransport, run_session: Callable[..., Any], sessions: SessionManager):
+        self.transport = transport
+        self.run_session = run_session
+        self.sessions = sessions
+
+    async def __call__(self, scope, receive, send) -> None:
+        if not self.sessions.admit():
+            reason = "draining" if self.sessions.draining else "session limit reached"
+            logger.warning("MCP session rejected", reason=reason, sessions=self.sessions.active)
+            response = PlainTextResponse(f"Server unavailable: {reason}", status_code=503)
+            await response(scope, receive, send)
+            return
+
+        logger.info("MCP session opened", sessions=self.sessions.active)
+        try:
+            async with self.transport.connect_sse(scope, receive, send) as (read_stream, write_stream):
+                async with anyio.create_task_group() as tg:
+                    async def run() -> None:
+                        try:
+                            await self.run_session(read_stream, write_stream)
+                        except Exception as e:
+                            # One failing session must not affect the others
+                            logger.error("MCP session failed", error=str(e), error_type=type(e).__name__)
+                        tg.cancel_scope.cancel()
+
+                    tg.start_soon(run)
+                    await self.sessions.wait_drained()
+                    tg.cancel_scope.cancel()
+        finally:
+            self.sessions.release()
+            logger.info("MCP session closed", sessions=self.sessions.active)
+
+
+def create_sse_app(
+    run_session: Callable[..., Any],
+    sessions: SessionManager,
+    lifespan: Callable[[Starlette], Any],
+) -> Starlette:
+    """Create the ASGI app serving MCP over SSE to many concurrent clients.
+
+    Args:
+        run_session: Coroutine function serving one MCP session on (read_stream, write_stream)
+        sessions: Session admission and drain control
+        lifespan: Lifespan holding the process-wide resources for as long as the app runs
+
+    Returns:
+        Starlette app with /sse, /messages/ and /healthz routes
+    """
+    transport = SseServerTransport("/messages/")
+
+    async def healthz(request):
+        status = 503 if sessions.draining else 200
+        return JSONResponse(sessions.stats(), status_code=status)
+
+    return Starlette(
+        routes=[
+            Route("/sse", endpoint=_SseEndpoint(transport, run_session, sessions)),
+            Mount("/messages/", app=transport.handle_post_message),
+            Route("/healthz", endpoint=healthz),
+        ],
+        lifespan=lifespan,
+    )
+
+
+class _DrainingServer(uvicorn.Server):
+    """Uvicorn server that drains MCP sessions before closing connections."""
+
+    def __init__(self, config: uvicorn.Config, sessions: SessionManager):
+        super().__init__(config)
+        self.sessions = sessions
+
+    async def shutdown(self, sockets=None) -> None:
+        await self.sessions.drain()
+        await super().shutdown(sockets)
+
+
+async def serve_sse(app: Starlette, sessions: SessionManager, host: str, port: int, log_level: str = "info") -> None:
+    """Serve the SSE app until the process is asked to stop, draining sessions on shutdown."""
+    config = uvicorn.Config(
+        app,
+        host=host,
+        port=port,
+        log_level=log_level.lower(),
+        # Backstop for connections still open after the drain
+        timeout_graceful_shutdown=max(1, int(sessions.drain_timeout)) if sessions.drain_timeout else None,
+    )
+    logger.info("Serving MCP over SSE", host=host, port=port, max_sessions=sessions.max_sessions,
+                max_tool_calls=sessions.calls.max_concurrency)
+    await _DrainingServer(config, sessions).serve()
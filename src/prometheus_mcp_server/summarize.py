@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+from prometheus_mcp_server.lazy_import import lazy_import
+
+# Loaded on first use, not at server startup
+np = lazy_import("numpy")
+
+OUTPUT_MODES = ("raw", "downsample", "stats", "topk")
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+STATISTICS = ("min", "max", "avg", "p95", "last")
+
+
+def _json_float(value: float) -> Any:
+    """Render a float for JSON, using Prometheus' spelling for non-finite values."""
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return float(value)
+
+
+def matrix_arrays(result: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Pack the sample values of a matrix into a NaN-padded 2D array.
+
+    Returns:
+        Tuple of (values, lengths) where values has one row per series
+    """
+    lengths = np.fromiter((len(series["values"]) for series in result), dtype=np.int64, count=len(result))
+    width = int(lengths.max()) if len(result) else 0
+    values = np.full((len(result), width), np.nan)
+    if width:
+        flat = np.array([value for series in result for _, value in series["values"]], dtype=np.str_).astype(np.float64)
+        rows = np.repeat(np.arange(len(result)), lengths)
+        cols = np.arange(len(flat)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        values[rows, cols] = flat
+    return values, lengths
+
+
+def matrix_stats(values: np.ndarray, lengths: np.ndarray) -> Dict[str, np.ndarray]:
+    """Compute min/max/avg/p95/last for every row of a NaN-padded value array at once."""
+    count = np.sum(~np.isnan(values), axis=1)
+    stats = {"min": np.full(len(values), np.nan), "max": np.full(len(values), np.nan),
+             "avg": np.full(len(values), np.nan), "p95": np.full(len(values), np.nan)}
+    present = count > 0
+    if present.any():
+        rows = values[present]
+        stats["min"][present] = np.nanmin(rows, axis=1)
+        stats["max"][present] = np.nanmax(rows, axis=1)
+        stats["avg"][present] = np.nanmean(rows, axis=1)
+        stats["p95"][present] = np.nanpercentile(rows, 95, axis=1)
+    last = np.full(len(values), np.nan)
+    nonempty = lengths > 0
+    last[nonempty] = values[np.flatnonzero(nonempty), lengths[nonempty] - 1]
+    stats["last"] = last
+    stats["count"] = count
+    return stats
+
+
+def lttb_indices(timestamps: np.ndarray, values: np.ndarray, threshold: int) -> np.ndarray:
+    """Select sample indices with the Largest-Triangle-Three-Buckets algorithm.
+
+    The first and last samples are always kept. NaN values are treated as zero
+    when measuring triangle areas but the original values are returned.
+    """
+    n = len(values)
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        return np.array([0, n - 1])
+    y = np.nan_to_num(values, nan=0.0, posinf=0.0, neginf=0.0)
+    # threshold - 2 buckets between the fixed first and last samples
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], max(edges[bucket + 1], edges[bucket] + 1)
+        next_start, next_stop = edges[bucket + 1], edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = timestamps[next_start:max(next_stop, next_start + 1)].mean()
+        next_y = y[next_start:max(next_stop, next_start + 1)].mean()
+        areas = np.abs(
+            (timestamps[previous] - next_x) * (y[start:stop] - y[previous])
+            - (timestamps[previous] - timestamps[start:stop]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def minmax_indices(values: np.ndarray, threshold: int) -> np.ndarray:
+    """Select the minimum and maximum sample of each bucket, plus the first and last samples."""
+    n = len(values)
+    buckets = max((threshold - 2) // 2, 1)
+    if threshold >= n:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, buckets + 1).astype(np.int64)
+    width = int(np.max(np.diff(edges))) or 1
+    index = edges[:-1, None] + np.arange(width)
+    inside = index < edges[1:, None]
+    index = np.minimum(index, n - 1)
+    bucket_values = values[index]
+    low = np.where(inside & ~np.isnan(bucket_values), bucket_values, np.inf)
+    high = np.where(inside & ~np.isnan(bucket_values), bucket_values, -np.inf)
+    rows = np.arange(buckets)
+    picks = np.concatenate(([0], index[rows, np.argmin(low, axis=1)], index[rows, np.argmax(high, axis=1)], [n - 1]))
+    return np.unique(picks)
+
+
+def validate_output_options(output: str, method: str = "lttb", stat: str = "avg",
+                            max_points: Optional[int] = None, topk: Optional[int] = None) -> None:
+    """Check output mode options before any query is sent.
+
+    Raises:
+        ValueError: If the output mode, downsampling method or statistic is unknown,
+            max_points is below 3 or topk is below 1
+    """
+    if output not in OUTPUT_MODES:
+        raise ValueError(f"Unknown output mode '{output}', expected one of {', '.join(OUTPUT_MODES)}")
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Unknown downsampling method '{method}', expected one of {', '.join(DOWNSAMPLE_METHODS)}")
+    if stat not in STATISTICS:
+        raise ValueError(f"Unknown statistic '{stat}', expected one of {', '.join(STATISTICS)}")
+    if max_points is not None and max_points < 3:
+        raise ValueError(f"Invalid max_points {max_points}, expected at least 3")
+    if topk is not None and topk < 1:
+        raise ValueError(f"Invalid topk {topk}, expected at least 1")
+
+
+def downsample_matrix(result: List[Dict[str, Any]], max_points: int, method: str = "lttb") -> List[Dict[str, Any]]:
+    """Reduce every series of a matrix to at most max_points samples.
+
+    Selected samples keep their original timestamps and value strings.
+    """
+    downsampled = []
+    for series in result:
+        samples = series["values"]
+        if len(samples) <= max_points:
+            downsampled.append(series)
+            continue
+        timestamps = np.fromiter((timestamp for timestamp, _ in samples), dtype=np.float64, count=len(samples))
+        values = np.array([value for _, value in samples], dtype=np.str_).astype(np.float64)
+        if method == "lttb":
+            indices = lttb_indices(timestamps, values, max_points)
+        else:
+            indices = minmax_indices(values, max_points)
+        downsampled.append({"metric": series["metric"], "values": [samples[i] for i in indices.tolist()]})
+    return downsampled
+
+
+def summarize_result(
+    data: Dict[str, Any],
+    output: str = "raw",
+    max_points: int = 200,
+    method: str = "lttb",
+    topk: int = 10,
+    stat: str = "avg",
+) -> Dict[str, Any]:
+    """Apply an output mode to a query result to shrink it before it is returned.
+
+    Args:
+        data: Prometheus query data with resultType and result
+        output: 'raw', 'downsample' (matrix only), 'stats' or 'topk'
+        max_points: Maximum samples per series for downsampled output
+        method: Downsampling method, 'lttb' or 'minmax'
+        topk: Number of series kept in 'topk' mode
+        stat: Statistic used to rank series in 'topk' mode
+
+    Returns:
+        Dictionary with resultType, result and details about the applied output mode
+    """
+    validate_output_options(output, method, stat, max_points, topk)
+    result_type, result = data["resultType"], data["result"]
+    summary = {"resultType": result_type, "result": result}
+    if output == "raw" or result_type not in ("matrix", "vector"):
+        return summary
+
+    summary["output"] = output
+    summary["seriesCount"] = len(result)
+    if result_type == "vector":
+        return _summarize_vector(summary, result, output, topk)
+
+    if output == "downsample":
+        summary["result"] = downsample_matrix(result, max_points, method)
+        return summary
+
+    values, lengths = matrix_arrays(result)
+    stats = matrix_stats(values, lengths)
+    if output == "stats":
+        summary["result"] = [
+            {"metric": series["metric"], "stats": _series_stats(stats, i)} for i, series in enumerate(result)
+        ]
+        return summary
+
+    # Rank on the chosen statistic, series without samples last
+    ranking = np.where(np.isnan(stats[stat]), -np.inf, stats[stat])
+    top = np.argsort(-ranking, kind="stable")[:topk].tolist()
+    selected = downsample_matrix([result[i] for i in top], max_points, method)
+    summary["result"] = [
+        {"metric": series["metric"], "stats": _series_stats(stats, i), "values": series["values"]}
+        for i, series in zip(top, selected)
+    ]
+    return summary
+
+
+def _series_stats(stats: Dict[str, np.ndarray], index: int) -> Dict[str, Any]:
+    series_stats = {name: _json_float(stats[name][index]) for name in STATISTICS}
+    series_stats["count"] = int(stats["count"][index])
+    return series_stats
+
+
+def _summarize_vector(summary: Dict[str, Any], result: List[Dict[str, Any]], output: str, topk: int) -> Dict[str, Any]:
+    if output == "downsample":
+        return summary
+    values = np.array([series["value"][1] for series in result], dtype=np.str_).astype(np.float64)
+    if output == "topk":
+        ranking = np.where(np.isnan(values), -np.inf, values)
+        summary["result"] = [result[i] for i in np.argsort(-ranking, kind="stable")[:topk].tolist()]
+        return summary
+    stats = matrix_stats(values[None, :], np.array([len(values)]))
+    summary["result"] = {"stats": _series_stats(stats, 0)}
+    return summary
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+
+from typing import Any, Dict, List, Optional, Tuple
+
+TARGET_STATES = ("active", "dropped", "any")
+
+# Fields of unhealthy targets listed in summary mode
+SUMMARY_FIELDS = ("scrapePool", "scrapeUrl", "labels.instance", "health", "lastError", "lastScrape")
+
+
+def target_job(target: Dict[str, Any]) -> Optional[str]:
+    """Return the job of a target, falling back to its scrape pool and discovered job label."""
+    labels = target.get("labels") or {}
+    if "job" in labels:
+        return labels["job"]
+    return target.get("scrapePool") or (target.get("discoveredLabels") or {}).get("job")
+
+
+def filter_targets(targets: List[Dict[str, Any]], job: Optional[str] = None,
+                   health: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Keep the targets of a job and/or with a health ('up', 'down' or 'unknown')."""
+    if job is None and health is None:
+        return targets
+    return [
+        target for target in targets
+        if (job is None or target_job(target) == job) and (health is None or target.get("health") == health)
+    ]
+
+
+def project(target: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    """Copy only the given fields of a target.
+
+    Fields are top-level keys such as ``scrapeUrl``, or ``labels.<name>`` and
+    ``discoveredLabels.<name>`` for single labels.
+    """
+    projected: Dict[str, Any] = {}
+    for field in fields:
+        name, _, label = field.partition(".")
+        if name not in target:
+            continue
+        if label:
+            value = (target[name] or {}).get(label)
+            if value is not None:
+                projected.setdefault(name, {})[label] = value
+        else:
+            projected[name] = target[name]
+    return projected
+
+
+def paginate(active: List[Dict[str, Any]], dropped: List[Dict[str, Any]], limit: Optional[int],
+             cursor: Optional[str]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Optional[str]]:
+    """Page through active targets followed by dropped targets.
+
+    Returns:
+        Tuple of (active page, dropped page, cursor of the next page or None)
+
+    Raises:
+        ValueError: If limit is below 1 or the cursor is not a non-negative offset
+    """
+    try:
+        offset = int(cursor) if cursor else 0
+    except ValueError:
+        offset = -1
+    if offset < 0:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    if limit is None:
+        end = len(active) + len(dropped)
+    else:
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        end = offset + limit
+    page_active = active[offset:end]
+    page_dropped = dropped[max(0, offset - len(active)):max(0, end - len(active))]
+    total = len(active) + len(dropped)
+    return page_active, page_dropped, str(end) if end < total else None
+
+
+def summarize_targets(active: List[Dict[str, Any]], dropped: List[Dict[str, Any]],
+                      max_unhealthy: int) -> Dict[str, Any]:
+    """Count targets per job and health, listing the details of only the unhealthy ones."""
+    jobs: Dict[str, Dict[str, int]] = {}
+    unhealthy = []
+    for target in active:
+        health = target.get("health", "unknown")
+        counts = jobs.setdefault(target_job(target) or "", {"up": 0, "down": 0, "unknown": 0})
+        counts[health] = counts.get(health, 0) + 1
+        if health != "up" and len(unhealthy) < max_unhealthy:
+            unhealthy.append(project(target, list(SUMMARY_FIELDS)))
+    totals = {"up": 0, "down": 0, "unknown": 0}
+    for counts in jobs.values():
+        for health, count in counts.items():
+            totals[health] = totals.get(health, 0) + count
+    return {
+        "total": dict(totals, active=len(active), dropped=len(dropped)),
+        "jobs": [dict(job=job, **counts) for job, counts in sorted(jobs.items())],
+        "unhealthy": unhealthy,
+        "unhealthyTruncated": totals["down"] + totals["unknown"] > len(unhealthy),
+    }
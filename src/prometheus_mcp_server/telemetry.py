@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+
+import asyncio
+import math
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from prometheus_mcp_server.logging_config import get_logger
+
+logger = get_logger()
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+COUNT_BUCKETS = (1, 10, 100, 1000, 10000, 100000, 1000000)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    # Non-finite values have fixed spellings in the text format, and int() rejects them
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+    def _labels(self, values: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, labels: LabelValues = (), amount: float = 1.0) -> None:
+        """Add amount to the value of a label set, given as values in labelnames order."""
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, labels: LabelValues = ()) -> float:
+        """Return the current value of a label set."""
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> Iterable[Sample]:
+        for labels, value in self._values.items():
+            yield self.name, self._labels(labels), value
+
+
+class Gauge(Counter):
+    """Value per label set that can go up and down."""
+    kind = "gauge"
+
+    def dec(self, labels: LabelValues = (), amount: float = 1.0) -> None:
+        """Subtract amount from the value of a label set."""
+        self._values[labels] = self._values.get(labels, 0.0) - amount
+
+    def set(self, value: float, labels: LabelValues = ()) -> None:
+        """Replace the value of a label set."""
+        self._values[labels] = value
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets per label set."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: counts per bucket (plus +Inf), sum of observations
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, labels: LabelValues = ()) -> None:
+        """Record one observation for a label set."""
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1][0] += value
+
+    def count(self, labels: LabelValues = ()) -> int:
+        """Return the number of observations of a label set."""
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def samples(self) -> Iterable[Sample]:
+        for labels, (counts, total) in self._series.items():
+            base = self._labels(labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield self.name + "_bucket", dict(base, le=_format_value(bound)), cumulative
+            yield self.name + "_sum", base, total[0]
+            yield self.name + "_count", base, cumulative
+
+
+class Registry:
+    """Collection of metrics rendered in the Prometheus text exposition format.
+
+    Besides metrics updated on the hot path, collectors can be registered that
+    read values only when the registry is rendered, e.g. cache statistics.
+    """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[_Metric]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Add a metric to the registry and return it."""
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collect: Callable[[], Iterable[_Metric]]) -> None:
+        """Register a function returning metrics that are filled in at render time."""
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        metrics = list(self._metrics)
+        for collect in self._collectors:
+            try:
+                metrics.extend(collect())
+            except Exception as e:
+                logger.warning("Metrics collector failed", error=str(e), error_type=type(e).__name__)
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+async def serve_metrics(registry: Registry, host: str, port: int) -> asyncio.AbstractServer:
+    """Serve the registry at /metrics over plain HTTP.
+
+    Args:
+        registry: Registry to render on every scrape
+        host: Address to listen on
+        port: Port to listen on
+
+    Returns:
+        The listening server; close it to stop serving
+    """
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status, content_type, body = "200 OK", CONTENT_TYPE, registry.render().encode()
+            else:
+                status, content_type, body = "404 Not Found", "text/plain; charset=utf-8", b"Not Found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    logger.info("Metrics endpoint started", host=host, port=port)
+    return server
+
+
+def cache_metrics(caches: Dict[str, Callable[[], Dict[str, Optional[float]]]]) -> List[_Metric]:
+    """Build metrics from cache stats() functions, one label value per cache.
+
+    Counters in the stats (hits, misses, ...) are exported as ``<stat>_total``
+    counters, occupancy values (entries, bytes) as gauges.
+    """
+    counters: Dict[str, Counter] = {}
+    gauges: Dict[str, Gauge] = {}
+    for cache, stats in caches.items():
+        for stat, value in stats().items():
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                continue
+            if stat in ("entries", "bytes", "max_bytes", "in_flight", "age_seconds"):
+                metric = gauges.get(stat)
+                if metric is None:
+                    metric = gauges[stat] = Gauge(f"prometheus_mcp_cache_{stat}", f"Cache {stat.replace('_', ' ')}", ("cache",))
+                metric.set(value, (cache,))
+            else:
+                metric = counters.get(stat)
+                if metric is None:
+                    metric = counters[stat] = Counter(
+                        f"prometheus_mcp_cache_{stat}_total", f"Cache {stat.replace('_', ' ')}", ("cache",)
+                    )
+                metric.inc((cache,), value)
+    return list(counters.values()) + list(gauges.values())
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+
+import math
+import re
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+_DURATION_RE = re.compile(
+    r"^(?:(?P<y>\d+)y)?(?:(?P<w>\d+)w)?(?:(?P<d>\d+)d)?(?:(?P<h>\d+)h)?"
+    r"(?:(?P<m>\d+)m(?!s))?(?:(?P<s>\d+)s)?(?:(?P<ms>\d+)ms)?$"
+)
+_DURATION_UNITS = {
+    "y": 365 * 24 * 3600,
+    "w": 7 * 24 * 3600,
+    "d": 24 * 3600,
+    "h": 3600,
+    "m": 60,
+    "s": 1,
+    "ms": 0.001,
+}
+
+
+def parse_timestamp(value: str) -> float:
+    """Parse a Prometheus API timestamp into Unix seconds.
+
+    Args:
+        value: RFC3339 timestamp or Unix timestamp (optionally fractional)
+
+    Returns:
+        Timestamp as float seconds since the epoch
+
+    Raises:
+        ValueError: If the value is not a valid timestamp
+    """
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    if value.endswith(("Z", "z")):
+        value = value[:-1] + "+00:00"
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def parse_duration(value: str) -> float:
+    """Parse a Prometheus duration or float seconds value.
+
+    Args:
+        value: Duration such as '15s', '1m', '1h30m' or a float number of seconds
+
+    Returns:
+        Duration in seconds
+
+    Raises:
+        ValueError: If the value is not a valid duration
+    """
+    value = str(value).strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        match = _DURATION_RE.match(value)
+        if not value or not match:
+            raise ValueError(f"Invalid duration: {value!r}")
+        seconds = sum(int(amount) * _DURATION_UNITS[unit] for unit, amount in match.groupdict().items() if amount)
+    if not math.isfinite(seconds) or seconds <= 0:
+        raise ValueError(f"Invalid duration: {value!r}")
+    return seconds
+
+
+def format_timestamp(value: float) -> str:
+    """Format Unix seconds the way the Prometheus API accepts them, without float noise."""
+    return f"{value:.3f}".rstrip("0").rstrip(".")
+
+
+def align_range(start: str, end: str, step: str) -> Optional[Tuple[float, float, float]]:
+    """Align a range query's start and end down to a multiple of its step.
+
+    Aligned ranges evaluate on the same timestamp grid, so equivalent requests
+    produce identical results and can share cache entries.
+
+    Returns:
+        Tuple of (start, end, step) in seconds, or None if any value cannot be parsed
+    """
+    try:
+        step_seconds = parse_duration(step)
+        start_seconds = parse_timestamp(start)
+        end_seconds = parse_timestamp(end)
+    except ValueError:
+        return None
+    step_ms = int(round(step_seconds * 1000))
+    if step_ms <= 0:
+        return None
+    aligned_start = (int(round(start_seconds * 1000)) // step_ms) * step_ms / 1000
+    aligned_end = (int(round(end_seconds * 1000)) // step_ms) * step_ms / 1000
+    return aligned_start, aligned_end, step_seconds
@@ -0,0 +1,341 @@
+#!/usr/bin/env python
+
+import asyncio
+import math
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from prometheus_mcp_server.logging_config import get_logger
+from prometheus_mcp_server.rules import normalize_expr
+
+logger = get_logger()
+
+WATCH_URI_PREFIX = "prometheus://watch/"
+WATCH_URI_TEMPLATE = WATCH_URI_PREFIX + "{watch_id}"
+
+# Evaluates an instant query on a backend and returns the query result data
+Evaluate = Callable[[str, Optional[str]], Awaitable[Dict[str, Any]]]
+
+SeriesKey = Tuple[Tuple[str, str], ...]
+# Series key -> (labels, [timestamp, value]) of one evaluation
+Snapshot = Dict[SeriesKey, Tuple[Dict[str, str], List[Any]]]
+
+
+def watch_uri(watch_id: str) -> str:
+    """Return the resource URI of a watch."""
+    return WATCH_URI_PREFIX + watch_id
+
+
+def watch_id_from_uri(uri: str) -> str:
+    """Return the watch ID of a watch resource URI.
+
+    Raises:
+        ValueError: If the URI is not a watch URI
+    """
+    if not uri.startswith(WATCH_URI_PREFIX) or len(uri) == len(WATCH_URI_PREFIX):
+        raise ValueError(f"Not a watch resource: {uri}")
+    return uri[len(WATCH_URI_PREFIX):]
+
+
+def take_snapshot(data: Dict[str, Any]) -> Snapshot:
+    """Index an instant query result by series labels.
+
+    Raises:
+        ValueError: If the result is not a vector or scalar
+    """
+    if data["resultType"] == "scalar":
+        return {(): ({}, data["result"])}
+    if data["resultType"] != "vector":
+        raise ValueError(f"Only instant vector and scalar expressions can be watched, got {data['resultType']}")
+    return {tuple(sorted(item["metric"].items())): (item["metric"], item["value"]) for item in data["result"]}
+
+
+def value_changed(previous: str, current: str, threshold: float) -> bool:
+    """Return whether a sample value moved by more than the threshold; NaN only changes to or from a number."""
+    a, b = float(previous), float(current)
+    if math.isnan(a) or math.isnan(b):
+        return math.isnan(a) != math.isnan(b)
+    return a != b and abs(a - b) > threshold
+
+
+def diff_snapshot(seen: Dict[SeriesKey, str], snapshot: Snapshot, threshold: float) -> Dict[str, Any]:
+    """Compare a snapshot with the values last delivered to a subscriber.
+
+    Args:
+        seen: Series key -> value last delivered
+        snapshot: Current evaluation
+        threshold: Absolute change below which a value counts as unchanged
+
+    Returns:
+        Dictionary with the 'added', 'removed' and 'changed' series and the
+        number of 'unchanged' series
+    """
+    added = []
+    changed = []
+    for key, (metric, sample) in snapshot.items():
+        previous = seen.get(key)
+        if previous is None:
+            added.append({"metric": metric, "value": sample})
+        elif value_changed(previous, sample[1], threshold):
+            changed.append({"metric": metric, "value": sample, "previous": previous})
+    removed = [{"metric": dict(key)} for key in seen if key not in snapshot]
+    return {
+        "added": added,
+        "removed": removed,
+        "changed": changed,
+        "unchanged": len(snapshot) - len(added) - len(changed),
+    }
+
+
+def has_changes(seen: Dict[SeriesKey, str], snapshot: Snapshot, threshold: float) -> bool:
+    """Return whether diff_snapshot would report any added, removed or changed series."""
+    if any(key not in snapshot for key in seen):
+        return True
+    return any(key not in seen or value_changed(seen[key], sample[1], threshold)
+               for key, (_, sample) in snapshot.items())
+
+
+class _Evaluator:
+    """One query evaluated on a schedule and shared by its subscriptions."""
+
+    def __init__(self, key: Tuple[str, Optional[str], float], query: str, backend: Optional[str], interval: float):
+        self.key = key
+        self.query = query
+        self.backend = backend
+        self.interval = interval
+        self.snapshot: Snapshot = {}
+        self.evaluated_at: Optional[float] = None
+        self.evaluations = 0
+        self.error: Optional[str] = None
+        self.subscriptions: Dict[str, "_Subscription"] = {}
+        self.first: Optional[asyncio.Task] = None
+        self.task: Optional[asyncio.Task] = None
+
+
+class _Subscription:
+    """A subscriber's view of an evaluator: its threshold and the values last delivered to it."""
+
+    def __init__(self, watch_id: str, evaluator: _Evaluator, threshold: float, now: float):
+        self.id = watch_id
+        self.evaluator = evaluator
+        self.threshold = threshold
+        self.seen: Dict[SeriesKey, str] = {}
+        self.polled_at = now
+        # Set once a listener was told about changes, until the subscriber reads them
+        self.notified = False
+        self.listeners: set = set()
+
+
+class WatchRegistry:
+    """Instant queries evaluated on a schedule, with updates delivered as deltas.
+
+    Subscriptions to the same expression (after normalization), backend and
+    interval share one evaluation loop. Each subscription remembers the values
+    it was last given, so polling it returns only the series added, removed,
+    or changed by more than its threshold since then. Listeners, such as MCP
+    sessions subscribed to the watch resource, are sent a resource updated
+    notification when a subscription has changes to read.
+
+    Subscriptions that are neither polled nor listened to for idle_timeout
+    seconds expire, and an evaluation loop stops with its last subscription.
+    """
+
+    def __init__(self, evaluate: Evaluate, max_watches: int = 100, idle_timeout: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self._evaluate = evaluate
+        self.max_watches = max_watches
+        self.idle_timeout = idle_timeout
+        self._clock = clock
+        self._evaluators: Dict[Tuple[str, Optional[str], float], _Evaluator] = {}
+        self._subscriptions: Dict[str, _Subscription] = {}
+        self.evaluations = 0
+        self.polls = 0
+        self.notifications = 0
+        self.expired = 0
+
+    def clear(self) -> None:
+        """Cancel every evaluation loop and forget all subscriptions."""
+        for evaluator in self._evaluators.values():
+            for task in (evaluator.first, evaluator.task):
+                if task is not None:
+                    task.cancel()
+        self._evaluators.clear()
+        self._subscriptions.clear()
+
+    async def close(self) -> None:
+        """Cancel every evaluation loop and wait for them to finish."""
+        tasks = [task for evaluator in self._evaluators.values() for task in (evaluator.first, evaluator.task) if task]
+        self.clear()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def watch(self, query: str, interval: float, threshold: float = 0.0,
+                    backend: Optional[str] = None) -> Dict[str, Any]:
+        """Subscribe to a query, joining the evaluation of an equal query if there is one.
+
+        Args:
+            query: PromQL expression returning an instant vector or scalar
+            interval: Seconds between evaluations
+            threshold: Absolute change below which values are not reported as changed
+            backend: Backend to query
+
+        Returns:
+            The first update of the subscription, with every current series as added
+
+        Raises:
+            ValueError: If too many queries are watched or the query does not return a vector or scalar
+        """
+        try:
+            shared = normalize_expr(query)
+        except ValueError:
+            shared = query.strip()
+        key = (shared, backend, interval)
+        evaluator = self._evaluators.get(key)
+        if evaluator is None:
+            if len(self._evaluators) >= self.max_watches:
+                raise ValueError(f"Too many watched queries (maximum {self.max_watches}), unwatch one first")
+            evaluator = self._evaluators[key] = _Evaluator(key, query, backend, interval)
+            evaluator.first = asyncio.create_task(self._evaluate_once(evaluator))
+        try:
+            # Concurrent subscribers to a new query wait for the same first evaluation
+            await asyncio.shield(evaluator.first)
+        except Exception:
+            if self._evaluators.get(key) is evaluator and not evaluator.subscriptions:
+                del self._evaluators[key]
+            raise
+        if evaluator.task is None:
+            evaluator.task = asyncio.create_task(self._run(evaluator))
+            logger.info("Watch started", query=query, backend=backend, interval=interval)
+        subscription = _Subscription(uuid.uuid4().hex[:16], evaluator, threshold, self._clock())
+        evaluator.subscriptions[subscription.id] = subscription
+        self._subscriptions[subscription.id] = subscription
+        return self.poll(subscription.id)
+
+    def poll(self, watch_id: str) -> Dict[str, Any]:
+        """Return the changes of a subscription since it was last polled.
+
+        Raises:
+            ValueError: If the subscription does not exist or has expired
+        """
+        subscription = self._subscription(watch_id)
+        evaluator = subscription.evaluator
+        subscription.polled_at = self._clock()
+        subscription.notified = False
+        self.polls += 1
+        delta = diff_snapshot(subscription.seen, evaluator.snapshot, subscription.threshold)
+        seen = subscription.seen
+        for item in delta["removed"]:
+            del seen[tuple(sorted(item["metric"].items()))]
+        for item in delta["added"] + delta["changed"]:
+            seen[tuple(sorted(item["metric"].items()))] = item["value"][1]
+        update = {
+            "watch": watch_id,
+            "uri": watch_uri(watch_id),
+            "query": evaluator.query,
+            "interval": evaluator.interval,
+            "evaluations": evaluator.evaluations,
+            "evaluatedAt": evaluator.evaluated_at,
+            **delta,
+        }
+        if evaluator.error:
+            update["error"] = evaluator.error
+        return update
+
+    async def unwatch(self, watch_id: str) -> bool:
+        """Remove a subscription, stopping its evaluation loop if it was the last one."""
+        subscription = self._subscriptions.get(watch_id)
+        if subscription is None:
+            return False
+        self._remove(subscription)
+        return True
+
+    def add_listener(self, watch_id: str, listener: Any) -> None:
+        """Notify a listener, which has an async send_resource_updated(uri) method, of the subscription's changes.
+
+        Raises:
+            ValueError: If the subscription does not exist or has expired
+        """
+        self._subscription(watch_id).listeners.add(listener)
+
+    def remove_listener(self, watch_id: str, listener: Any) -> None:
+        """Stop notifying a listener of a subscription's changes."""
+        subscription = self._subscriptions.get(watch_id)
+        if subscription is not None:
+            subscription.listeners.discard(listener)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return evaluation, poll and notification counters and the number of watches and subscriptions."""
+        return {
+            "evaluations": self.evaluations,
+            "polls": self.polls,
+            "notifications": self.notifications,
+            "expired": self.expired,
+            "watches": len(self._evaluators),
+            "entries": len(self._subscriptions),
+        }
+
+    def _subscription(self, watch_id: str) -> _Subscription:
+        subscription = self._subscriptions.get(watch_id)
+        if subscription is None:
+            raise ValueError(f"Unknown watch '{watch_id}', it may have expired")
+        return subscription
+
+    def _remove(self, subscription: _Subscription) -> None:
+        evaluator = subscription.evaluator
+        self._subscriptions.pop(subscription.id, None)
+        evaluator.subscriptions.pop(subscription.id, None)
+        if not evaluator.subscriptions and self._evaluators.get(evaluator.key) is evaluator:
+            del self._evaluators[evaluator.key]
+            if evaluator.task is not None and evaluator.task is not asyncio.current_task():
+                evaluator.task.cancel()
+            logger.info("Watch stopped", query=evaluator.query, backend=evaluator.backend,
+                        evaluations=evaluator.evaluations)
+
+    async def _evaluate_once(self, evaluator: _Evaluator) -> None:
+        data = await self._evaluate(evaluator.query, evaluator.backend)
+        evaluator.snapshot = take_snapshot(data)
+        evaluator.evaluated_at = time.time()
+        evaluator.evaluations += 1
+        evaluator.error = None
+        self.evaluations += 1
+
+    async def _run(self, evaluator: _Evaluator) -> None:
+        while True:
+            await asyncio.sleep(evaluator.interval)
+            self._expire(evaluator)
+            if not evaluator.subscriptions:
+                return
+            try:
+                await self._evaluate_once(evaluator)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # The last snapshot is kept, and polls report the error until an evaluation succeeds
+                evaluator.error = str(e)
+                logger.warning("Watch evaluation failed", query=evaluator.query, backend=evaluator.backend,
+                               error=str(e), error_type=type(e).__name__)
+                continue
+            await self._notify(evaluator)
+
+    def _expire(self, evaluator: _Evaluator) -> None:
+        now = self._clock()
+        for subscription in list(evaluator.subscriptions.values()):
+            if not subscription.listeners and now - subscription.polled_at > self.idle_timeout:
+                self.expired += 1
+                self._remove(subscription)
+
+    async def _notify(self, evaluator: _Evaluator) -> None:
+        for subscription in list(evaluator.subscriptions.values()):
+            if (not subscription.listeners or subscription.notified
+                    or not has_changes(subscription.seen, evaluator.snapshot, subscription.threshold)):
+                continue
+            subscription.notified = True
+            for listener in list(subscription.listeners):
+                try:
+                    await listener.send_resource_updated(watch_uri(subscription.id))
+                    self.notifications += 1
+                except Exception as e:
+                    # Closed sessions stop listening; the subscription then expires when idle
+                    subscription.listeners.discard(listener)
+                    logger.warning("Watch notification failed", watch=subscription.id, error=str(e),
+                                   error_type=type(e).__name__)
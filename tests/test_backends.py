@@ -0,0 +1,84 @@
+"""Tests for backend configuration, replica selection and result merging."""
+
+import pytest
+
+from prometheus_mcp_server.backends import ReplicaTracker, merge_backend_results, parse_backends, replica_urls
+
+
+def test_parse_backends():
+    """Test that named backends are read from prefixed environment variables."""
+    environ = {
+        "PROMETHEUS_BACKENDS": "eu-west, us",
+        "PROMETHEUS_BACKEND_EU_WEST_URL": "http://eu-a:9090, http://eu-b:9090/",
+        "PROMETHEUS_BACKEND_EU_WEST_TOKEN": "secret",
+        "PROMETHEUS_BACKEND_US_URL": "http://us:9090",
+        "PROMETHEUS_BACKEND_US_ORG_ID": "tenant-1",
+        "PROMETHEUS_BACKEND_US_MAX_SAMPLES": "1000000",
+    }
+
+    backends = parse_backends(environ)
+
+    assert list(backends) == ["eu-west", "us"]
+    assert replica_urls(backends["eu-west"].url) == ["http://eu-a:9090", "http://eu-b:9090"]
+    assert backends["eu-west"].token == "secret"
+    assert backends["us"].org_id == "tenant-1"
+    assert backends["us"].max_samples == 1000000
+    assert backends["eu-west"].max_samples == 0
+
+
+@pytest.mark.parametrize("environ", [
+    {"PROMETHEUS_BACKENDS": "eu"},
+    {"PROMETHEUS_BACKENDS": "all", "PROMETHEUS_BACKEND_ALL_URL": "http://all:9090"},
+])
+def test_parse_backends_rejects_invalid_config(environ):
+    """Test that backends without a URL or with a reserved name are rejected."""
+    with pytest.raises(ValueError):
+        parse_backends(environ)
+
+
+def test_replica_tracker_prefers_fastest_healthy_replica():
+    """Test that reads go to the fastest replica unless it failed recently."""
+    clock = [0.0]
+    tracker = ReplicaTracker(cooldown=5, clock=lambda: clock[0])
+    urls = ["http://a", "http://b", "http://c"]
+
+    tracker.success("http://a", 0.2)
+    tracker.success("http://b", 0.05)
+    assert tracker.order(urls) == ["http://c", "http://b", "http://a"]
+
+    tracker.success("http://c", 0.5)
+    tracker.failure("http://b")
+    assert tracker.order(urls) == ["http://a", "http://c", "http://b"]
+
+    clock[0] = 6.0
+    assert tracker.order(urls)[0] == "http://b"
+    assert tracker.stats()["http://b"]["healthy"] is True
+
+
+def test_merge_backend_results_adds_source_label():
+    """Test that merged series carry the name of their backend."""
+    results = {
+        "eu": {"resultType": "vector", "result": [{"metric": {"__name__": "up"}, "value": [1, "1"]}]},
+        "us": {"resultType": "vector", "result": [{"metric": {"__name__": "up"}, "value": [1, "0"]}]},
+    }
+
+    merged = merge_backend_results(results, "backend")
+
+    assert merged["resultType"] == "vector"
+    assert [series["metric"] for series in merged["result"]] == [
+        {"__name__": "up", "backend": "eu"},
+        {"__name__": "up", "backend": "us"},
+    ]
+    assert results["eu"]["result"][0]["metric"] == {"__name__": "up"}
+
+
+def test_merge_backend_results_scalars_and_mismatches():
+    """Test that scalars become a vector and mixed result types are rejected."""
+    merged = merge_backend_results({"eu": {"resultType": "scalar", "result": [1, "2"]}}, "backend")
+    assert merged == {"resultType": "vector", "result": [{"metric": {"backend": "eu"}, "value": [1, "2"]}]}
+
+    with pytest.raises(ValueError):
+        merge_backend_results({
+            "eu": {"resultType": "scalar", "result": [1, "2"]},
+            "us": {"resultType": "vector", "result": []},
+        }, "backend")
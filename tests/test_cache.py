@@ -0,0 +1,109 @@
+"""Tests for the query result cache."""
+
+import asyncio
+
+import pytest
+
+from prometheus_mcp_server.cache import (
+    ResultCache,
+    make_cache_key,
+    mark_size_inexact,
+    measure_size,
+    record_response_size,
+)
+
+
+class FakeClock:
+    """Manually advanced clock for TTL tests."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_make_cache_key_ignores_param_order():
+    """Test that parameter order does not change the cache key."""
+    assert make_cache_key("query", {"query": "up", "time": "1"}) == make_cache_key("query", {"time": "1", "query": "up"})
+    assert make_cache_key("targets") == ("targets",)
+
+
+def test_cache_hit_and_miss():
+    """Test that cached values are returned until they expire."""
+    clock = FakeClock()
+    cache = ResultCache(max_bytes=1024, clock=clock)
+
+    assert cache.get("a") is None
+    cache.set("a", {"value": 1}, ttl=10)
+    assert cache.get("a") == {"value": 1}
+
+    clock.now = 11
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+    assert cache.stats()["expirations"] == 1
+
+
+def test_cache_evicts_least_recently_used():
+    """Test that the memory bound evicts the least recently used entries first."""
+    cache = ResultCache(max_bytes=25)
+
+    cache.set("a", "x" * 8, ttl=60)
+    cache.set("b", "y" * 8, ttl=60)
+    cache.get("a")
+    cache.set("c", "z" * 8, ttl=60)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "x" * 8
+    assert cache.get("c") == "z" * 8
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= 25
+
+
+def test_cache_rejects_oversized_values():
+    """Test that values larger than the whole cache are not stored."""
+    cache = ResultCache(max_bytes=4)
+
+    assert cache.set("a", "too large to fit", ttl=60) is False
+    assert len(cache) == 0
+
+
+def test_cache_zero_ttl_is_not_stored():
+    """Test that a zero TTL disables caching for that value."""
+    cache = ResultCache(max_bytes=1024)
+
+    assert cache.set("a", 1, ttl=0) is False
+    assert cache.get("a") is None
+
+
+def test_cache_uses_given_size():
+    """Test that a size passed by the caller is used instead of estimating it."""
+    cache = ResultCache(max_bytes=1024)
+
+    cache.set("a", {"value": 1}, ttl=60, size=500)
+    cache.set("b", {"value": 2}, ttl=60)
+
+    assert cache.stats()["bytes"] == 500 + len('{"value":2}')
+    assert cache.set("c", 1, ttl=60, size=2048) is False
+
+
+@pytest.mark.asyncio
+async def test_measure_size():
+    """Test that responses read by the block and its tasks are measured until a part comes from elsewhere."""
+    async def read(size):
+        record_response_size(size)
+
+    record_response_size(100)
+    with measure_size() as measured:
+        await asyncio.gather(read(10), read(20))
+    assert measured.size == 30
+
+    with measure_size() as measured:
+        await read(10)
+        mark_size_inexact()
+    assert measured.size is None
+
+    with measure_size() as measured:
+        pass
+    assert measured.size is None
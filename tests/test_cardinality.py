@@ -0,0 +1,116 @@
+"""Tests for the cardinality analysis cache."""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock
+
+from prometheus_mcp_server.cardinality import CardinalityCache, SelectorCardinality, status_overview
+
+SERIES = [
+    {"__name__": "http_requests_total", "job": "api", "instance": "a:80", "code": "200"},
+    {"__name__": "http_requests_total", "job": "api", "instance": "b:80", "code": "200"},
+    {"__name__": "http_requests_total", "job": "api", "instance": "b:80", "code": "500"},
+]
+
+STATUS = {
+    "headStats": {"numSeries": 1200, "numLabelPairs": 300},
+    "seriesCountByMetricName": [{"name": "http_requests_total", "value": 900}, {"name": "up", "value": 300}],
+    "labelValueCountByLabelName": [{"name": "instance", "value": 150}],
+    "seriesCountByLabelValuePair": [{"name": "job=api", "value": 1000}],
+}
+
+
+def test_selector_summary_counts_labels():
+    """Test that series are counted per metric and per label value, most values first."""
+    summary = SelectorCardinality(SERIES, limit=100).summary(topk=5)
+
+    assert summary["series"] == 3
+    assert summary["truncated"] is False
+    assert summary["metrics"] == [{"metric": "http_requests_total", "series": 3}]
+    assert [label["label"] for label in summary["labels"]] == ["code", "instance", "job"]
+    assert summary["labels"][1]["topValues"][0] == {"value": "b:80", "series": 2}
+    assert summary["estimatedBytes"] > 0
+
+
+def test_selector_at_limit_is_truncated():
+    """Test that a series count reaching the limit is reported as a lower bound."""
+    assert SelectorCardinality(SERIES, limit=3).truncated is True
+
+
+@pytest.mark.asyncio
+async def test_selector_analysis_is_cached():
+    """Test that a selector is fetched once with a limit and served from the cache afterwards."""
+    fetch = AsyncMock(return_value=SERIES)
+    cache = CardinalityCache(fetch, series_limit=2)
+
+    first = await cache.selector("http_requests_total")
+    count = await cache.series_count("http_requests_total")
+
+    fetch.assert_awaited_once()
+    params = fetch.await_args.kwargs["params"]
+    assert params["match[]"] == "http_requests_total"
+    assert params["limit"] == 2
+    assert first.series == 2
+    assert count == (2, True)
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_selector_analysis_expires():
+    """Test that analyses are fetched again after the TTL."""
+    clock = [0.0]
+    fetch = AsyncMock(return_value=SERIES)
+    cache = CardinalityCache(fetch, ttl=60, clock=lambda: clock[0])
+
+    await cache.selector("up")
+    clock[0] = 61.0
+    await cache.selector("up")
+
+    assert fetch.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_stale_status_refreshes_in_background():
+    """Test that a stale TSDB status is served while a background refresh replaces it."""
+    clock = [0.0]
+    fetch = AsyncMock(return_value=STATUS)
+    cache = CardinalityCache(fetch, ttl=60, clock=lambda: clock[0])
+    await cache.tsdb_status()
+
+    clock[0] = 61.0
+    fetch.return_value = dict(STATUS, headStats={"numSeries": 5})
+    stale = await cache.tsdb_status()
+    await asyncio.sleep(0)
+
+    assert stale is STATUS
+    assert (await cache.tsdb_status())["headStats"]["numSeries"] == 5
+    assert cache.stats()["refreshes"] == 2
+
+
+def test_status_overview():
+    """Test that the TSDB status is condensed to the top entries."""
+    overview = status_overview(STATUS, topk=1)
+
+    assert overview["totalSeries"] == 1200
+    assert overview["topMetrics"] == [{"metric": "http_requests_total", "series": 900}]
+    assert overview["topLabels"] == [{"label": "instance", "values": 150}]
+    assert overview["topLabelPairs"] == [{"pair": "job=api", "series": 1000}]
+
+
+@pytest.mark.asyncio
+async def test_series_upper_bound_from_status():
+    """Test that metric series are bounded from the TSDB status top list."""
+    fetch = AsyncMock(return_value=STATUS)
+    cache = CardinalityCache(fetch, status_limit=2)
+
+    assert await cache.series_upper_bound("http_requests_total") == 900
+    # Not in a list cut off at the limit: at most the smallest listed count
+    assert await cache.series_upper_bound("other") == 300
+    assert await cache.series_upper_bound(None) == 1200
+    fetch.assert_awaited_once()
+
+    cache = CardinalityCache(AsyncMock(return_value=STATUS), status_limit=50)
+    assert await cache.series_upper_bound("other") == 0
+    cache = CardinalityCache(AsyncMock(return_value={}))
+    assert await cache.series_upper_bound("other") is None
@@ -0,0 +1,137 @@
+"""Tests for the SQLite-backed disk cache."""
+
+import threading
+
+import pytest
+
+from prometheus_mcp_server.disk_cache import DiskCache
+
+
+@pytest.fixture
+def now():
+    """Mutable wall clock shared by the caches of a test."""
+    return [1700000000.0]
+
+
+@pytest.fixture
+def cache(tmp_path, now):
+    """Disk cache in a temporary directory, closed after the test."""
+    cache = DiskCache(str(tmp_path / "cache" / "prometheus.db"), max_bytes=1024, clock=lambda: now[0])
+    yield cache
+    cache.close()
+
+
+def test_set_and_get(cache):
+    """Test that stored values are read back and unknown keys miss."""
+    assert cache.set("a", {"resultType": "vector", "result": [1, "2"]}, ttl=60)
+
+    assert cache.get("a") == {"resultType": "vector", "result": [1, "2"]}
+    assert cache.get("b") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["writes"], stats["entries"]) == (1, 1, 1, 1)
+
+
+def test_entries_expire_after_ttl(cache, now):
+    """Test that entries with a TTL expire while entries without one are kept."""
+    cache.set("volatile", [1], ttl=10)
+    cache.set("settled", [2], ttl=None)
+
+    now[0] += 11
+
+    assert cache.get("volatile") is None
+    assert cache.get("settled") == [2]
+    assert cache.stats()["expirations"] == 1
+
+
+def test_zero_ttl_and_oversized_values_are_not_stored(cache):
+    """Test that a TTL of 0 and values larger than the cache are rejected."""
+    assert not cache.set("a", [1], ttl=0)
+    assert not cache.set("b", "x" * 2048)
+
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted(cache, now):
+    """Test that the least recently used entries make room once the cache is full."""
+    cache.set("a", "x" * 400)
+    now[0] += 100
+    cache.set("b", "x" * 400)
+    now[0] += 100
+    # Reading a refreshes its access time, so b is the oldest
+    assert cache.get("a") is not None
+    now[0] += 100
+
+    cache.set("c", "x" * 400)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= 1024
+
+
+def test_stats_track_occupancy_without_querying(cache, now):
+    """Test that stats follow writes, evictions and expirations while the database is busy."""
+    cache.set("a", "x" * 400, ttl=10)
+    cache.set("b", "x" * 400)
+    now[0] += 11
+    assert cache.get("a") is None
+    cache.set("c", "x" * 400)
+    cache.set("d", "x" * 400)
+
+    # A scrape during a slow database call must not wait for it
+    with cache._lock:
+        stats = cache.stats()
+
+    assert (stats["entries"], stats["bytes"]) == (2, 2 * len('"' + "x" * 400 + '"'))
+    assert (stats["expirations"], stats["evictions"]) == (1, 1)
+
+
+def test_entries_are_shared_between_connections(tmp_path):
+    """Test that caches opening the same file, as separate processes do, see each other's entries."""
+    path = str(tmp_path / "shared.db")
+    first, second = DiskCache(path, max_bytes=1 << 20), DiskCache(path, max_bytes=1 << 20)
+    try:
+        first.set("metadata", {"up": [{"type": "gauge"}]}, ttl=300)
+        assert second.get("metadata") == {"up": [{"type": "gauge"}]}
+
+        second.clear()
+        assert first.get("metadata") is None
+    finally:
+        first.close()
+        second.close()
+
+
+def test_concurrent_writers(tmp_path):
+    """Test that writers on separate connections do not lose entries or fail on locks."""
+    path = str(tmp_path / "shared.db")
+    caches = [DiskCache(path, max_bytes=1 << 20) for _ in range(4)]
+
+    def write(index, cache):
+        for item in range(25):
+            cache.set(f"{index}-{item}", [index, item])
+
+    threads = [threading.Thread(target=write, args=(index, cache)) for index, cache in enumerate(caches)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    try:
+        assert sum(cache.errors for cache in caches) == 0
+        caches[0].refresh_occupancy()
+        assert caches[0].stats()["entries"] == 100
+        assert caches[1].get("3-24") == [3, 24]
+    finally:
+        for cache in caches:
+            cache.close()
+
+
+def test_unreadable_file_is_a_miss(tmp_path):
+    """Test that a file that is not a database is logged and treated as a miss."""
+    path = tmp_path / "broken.db"
+    path.write_bytes(b"not a database" * 100)
+    cache = DiskCache(str(path), max_bytes=1024)
+
+    assert cache.get("a") is None
+    assert not cache.set("a", [1])
+    assert cache.stats()["errors"] >= 2
@@ -0,0 +1,144 @@
+"""Tests for exporting range query results to files."""
+
+import csv
+import os
+import sys
+
+import pytest
+
+from prometheus_mcp_server.export import (
+    export_matrix,
+    export_path,
+    label_columns,
+    prune_exports,
+    validate_export_format,
+)
+
+MATRIX = [
+    {"metric": {"__name__": "up", "job": "node", "instance": "a"}, "values": [[1700000000, "1"], [1700000015, "NaN"]]},
+    {"metric": {"__name__": "up", "job": "api"}, "values": [[1700000000, "0"], [1700000015, "4"], [1700000030, "2"]]},
+]
+
+
+def test_label_columns_put_name_first():
+    """Test that the label columns are the union of all labels, __name__ first."""
+    assert label_columns(MATRIX) == ["__name__", "instance", "job"]
+
+
+def test_export_csv_writes_one_row_per_sample(tmp_path):
+    """Test that CSV exports have a row per sample and empty cells for missing labels."""
+    summary = export_matrix(MATRIX, tmp_path / "out.csv", "csv")
+
+    with open(tmp_path / "out.csv", newline="") as file:
+        rows = list(csv.reader(file))
+    assert rows[0] == ["timestamp", "value", "__name__", "instance", "job"]
+    assert rows[1:3] == [["1700000000", "1", "up", "a", "node"], ["1700000015", "NaN", "up", "a", "node"]]
+    assert rows[3] == ["1700000000", "0", "up", "", "api"]
+    assert len(rows) == 6
+    assert summary["series"] == 2 and summary["samples"] == 5
+    assert (summary["start"], summary["end"]) == (1700000000, 1700000030)
+    assert (summary["min"], summary["max"]) == (0.0, 4.0)
+    assert summary["bytes"] == (tmp_path / "out.csv").stat().st_size
+    assert summary["uri"] == (tmp_path / "out.csv").as_uri()
+
+
+def test_export_empty_matrix(tmp_path):
+    """Test that an empty result is exported as a header-only file without a time range."""
+    summary = export_matrix([], tmp_path / "empty.csv", "csv")
+
+    assert (tmp_path / "empty.csv").read_text().strip() == "timestamp,value"
+    assert summary["samples"] == 0 and summary["start"] is None and summary["min"] is None
+
+
+def test_export_failure_leaves_no_file(tmp_path):
+    """Test that a failed export removes its partial file."""
+    broken = [{"metric": {}, "values": [[1700000000, "not a number"]]}]
+
+    with pytest.raises(ValueError):
+        export_matrix(broken, tmp_path / "out.csv", "csv")
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_export_without_pyarrow(tmp_path, monkeypatch):
+    """Test that Arrow and Parquet exports explain how to install pyarrow when it is missing."""
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+
+    with pytest.raises(ValueError, match=r"prometheus_mcp_server\[export\]"):
+        export_matrix(MATRIX, tmp_path / "out.parquet", "parquet")
+
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize("fmt", ["arrow", "parquet"])
+def test_export_arrow_formats(tmp_path, fmt):
+    """Test that Arrow IPC and Parquet exports round-trip, split into chunks."""
+    pa = pytest.importorskip("pyarrow")
+    path = tmp_path / f"out.{fmt}"
+
+    summary = export_matrix(MATRIX, path, fmt, chunk_rows=2)
+
+    if fmt == "arrow":
+        table = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+    else:
+        import pyarrow.parquet as pq
+        table = pq.read_table(path)
+    assert table.num_rows == summary["samples"] == 5
+    assert table.column_names == ["timestamp", "value", "__name__", "instance", "job"]
+    assert table.column("job").to_pylist() == ["node", "node", "api", "api", "api"]
+    assert table.column("instance").to_pylist()[2] is None
+
+
+def test_export_path_in_directory(tmp_path):
+    """Test that export files are named after the query, in the export directory."""
+    params = {"query": "up", "start": "1", "end": "2", "step": "15s"}
+    path = export_path(str(tmp_path), "up", params, "parquet")
+
+    assert path.parent == tmp_path and path.suffix == ".parquet"
+    assert path != export_path(str(tmp_path), "down", dict(params, query="down"), "parquet")
+
+
+def test_exporting_the_same_query_again_replaces_its_file(tmp_path):
+    """Test that re-exporting a query overwrites its file instead of adding one."""
+    params = {"query": "up", "start": "1", "end": "2", "step": "15s"}
+
+    export_matrix(MATRIX, export_path(str(tmp_path), "up", params, "csv"), "csv")
+    export_matrix(MATRIX[:1], export_path(str(tmp_path), "up", params, "csv"), "csv")
+
+    files = list(tmp_path.iterdir())
+    assert len(files) == 1
+    assert len(files[0].read_text().splitlines()) == 1 + len(MATRIX[0]["values"])
+
+
+def test_prune_exports_by_count_and_age(tmp_path):
+    """Test that the oldest exports beyond the count and those past the age are deleted."""
+    now = 1700000000.0
+    ages = {"range-a.csv": 10, "range-b.csv": 20, "range-c.parquet": 30, "range-d.csv": 5000,
+            "range-e.csv.1234abcd.partial": 4000, "range-f.csv.5678abcd.partial": 10, "notes.txt": 9999}
+    for name, age in ages.items():
+        path = tmp_path / name
+        path.write_text("x")
+        os.utime(path, (now - age, now - age))
+
+    removed = prune_exports(str(tmp_path), max_files=2, max_age=3600, now=now)
+
+    assert removed == 3
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "notes.txt", "range-a.csv", "range-b.csv", "range-f.csv.5678abcd.partial"
+    ]
+
+
+def test_prune_exports_limits_disabled(tmp_path):
+    """Test that a limit of 0 keeps every export."""
+    for name in ("range-a.csv", "range-b.csv"):
+        (tmp_path / name).write_text("x")
+
+    assert prune_exports(str(tmp_path), max_files=0, max_age=0) == 0
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_validate_export_format():
+    """Test that unknown formats are rejected."""
+    validate_export_format("csv")
+    with pytest.raises(ValueError, match="Unknown export format"):
+        validate_export_format("json")
@@ -0,0 +1,119 @@
+"""Tests for rate limiting, backpressure, retries and hedging."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from prometheus_mcp_server.flow_control import AdaptiveLimiter, backoff_delay, hedged, is_overloaded
+
+
+def status_error(code):
+    """Build an HTTP status error with the given status code."""
+    request = httpx.Request("GET", "http://test:9090/api/v1/query")
+    return httpx.HTTPStatusError("error", request=request, response=httpx.Response(code, request=request))
+
+
+def test_backoff_delay_is_bounded():
+    """Test that jittered delays stay within the exponential bound and the maximum."""
+    for attempt in range(1, 10):
+        delay = backoff_delay(attempt, 0.2, 1.0)
+        assert 0 <= delay <= min(1.0, 0.2 * 2 ** (attempt - 1))
+
+
+def test_is_overloaded():
+    """Test which failures count as overload signals."""
+    assert is_overloaded(status_error(429))
+    assert is_overloaded(status_error(503))
+    assert is_overloaded(httpx.ReadTimeout("timed out"))
+    assert not is_overloaded(status_error(500))
+    assert not is_overloaded(httpx.ConnectError("refused"))
+
+
+def test_limiter_backs_off_and_recovers():
+    """Test that overload halves the limits and healthy responses grow them back."""
+    limiter = AdaptiveLimiter(max_concurrency=8, rate=10, latency_threshold=1.0)
+
+    limiter.record_failure(status_error(429))
+    assert limiter.stats()["concurrency_limit"] == 4
+    assert limiter.stats()["rate_limit"] == 5
+
+    limiter.record_success(5.0)
+    assert limiter.stats()["concurrency_limit"] == 2
+
+    for _ in range(100):
+        limiter.record_success(0.01)
+    assert limiter.stats()["concurrency_limit"] == 8
+    assert limiter.stats()["rate_limit"] == 10
+    assert limiter.stats()["overloads"] == 2
+
+
+@pytest.mark.asyncio
+async def test_limiter_caps_concurrency_and_honours_deadlines():
+    """Test that callers beyond the limit wait, and give up at their deadline."""
+    limiter = AdaptiveLimiter(max_concurrency=1)
+    loop = asyncio.get_running_loop()
+
+    async with limiter.slot():
+        assert limiter.stats()["in_flight"] == 1
+        with pytest.raises(TimeoutError):
+            async with limiter.slot(deadline=loop.time() + 0.05):
+                pass
+
+    async with limiter.slot(deadline=loop.time() + 0.05):
+        pass
+    assert limiter.stats()["rejected"] == 1
+    assert limiter.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_limiter_rate_limit_rejects_when_wait_exceeds_deadline():
+    """Test that the token bucket fails fast when the wait would pass the deadline."""
+    limiter = AdaptiveLimiter(max_concurrency=10, rate=1, burst=1)
+    loop = asyncio.get_running_loop()
+
+    async with limiter.slot():
+        pass
+    with pytest.raises(TimeoutError):
+        async with limiter.slot(deadline=loop.time() + 0.1):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_to_second_replica_wins():
+    """Test that a slow replica is hedged and the faster response is returned."""
+    hedges = []
+
+    async def send(replica):
+        await asyncio.sleep(1 if replica == "slow" else 0)
+        return replica
+
+    result = await hedged(["slow", "fast"], send, hedge_delay=0.01, on_hedge=lambda: hedges.append(1))
+
+    assert result == "fast"
+    assert hedges == [1]
+
+
+@pytest.mark.asyncio
+async def test_hedged_fails_over_on_transient_errors():
+    """Test that a transient failure moves on to the next replica immediately."""
+    async def send(replica):
+        if replica == "down":
+            raise httpx.ConnectError("refused")
+        return replica
+
+    assert await hedged(["down", "up"], send) == "up"
+
+
+@pytest.mark.asyncio
+async def test_hedged_raises_permanent_errors():
+    """Test that a non-transient failure is raised without trying other replicas."""
+    tried = []
+
+    async def send(replica):
+        tried.append(replica)
+        raise ValueError("bad query")
+
+    with pytest.raises(ValueError):
+        await hedged(["a", "b"], send)
+    assert tried == ["a"]
@@ -0,0 +1,102 @@
+"""Tests for the shared Prometheus HTTP client."""
+
+import asyncio
+
+import httpx
+import pytest
+from unittest.mock import patch
+
+from prometheus_mcp_server import server
+from prometheus_mcp_server.http_client import create_http_client
+from prometheus_mcp_server.server import (
+    PrometheusConfig,
+    close_http_client,
+    get_http_client,
+    server_lifespan,
+)
+
+
+@pytest.mark.asyncio
+async def test_create_http_client_applies_limits():
+    """Test that pool limits and timeouts from the config are applied."""
+    test_config = PrometheusConfig(url="http://test:9090", timeout=12.0, connect_timeout=2.0, http2=False)
+
+    client = create_http_client(test_config)
+    try:
+        assert isinstance(client, httpx.AsyncClient)
+        assert client.timeout.read == 12.0
+        assert client.timeout.connect == 2.0
+    finally:
+        await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_create_http_client_without_h2_falls_back():
+    """Test that HTTP/2 is disabled when the h2 package is unavailable."""
+    test_config = PrometheusConfig(url="http://test:9090", http2=True)
+
+    with patch("prometheus_mcp_server.http_client.http2_available", return_value=False), \
+         patch("prometheus_mcp_server.http_client.httpx.AsyncClient") as mock_client:
+        create_http_client(test_config)
+
+    assert mock_client.call_args.kwargs["http2"] is False
+
+
+@pytest.mark.asyncio
+async def test_get_http_client_is_shared():
+    """Test that the HTTP client is created once and reused."""
+    await close_http_client()
+
+    first = get_http_client()
+    second = get_http_client()
+    assert first is second
+
+    await close_http_client()
+    assert first.is_closed
+    assert server._http_client is None
+
+
+@pytest.mark.asyncio
+async def test_server_lifespan_closes_client():
+    """Test that the server lifespan opens and closes the shared client."""
+    async with server_lifespan(server.mcp):
+        client = server._http_client
+        assert client is not None
+        assert not client.is_closed
+
+    assert client.is_closed
+    assert server._http_client is None
+
+
+@pytest.mark.asyncio
+async def test_server_lifespan_runs_background_refresh():
+    """Test that the background refresh tasks are started and cancelled with the server."""
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def run(interval):
+        started.set()
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with patch.object(server.metric_index, "run", side_effect=run), \
+         patch.object(server.metadata_cache, "run", side_effect=run):
+        async with server_lifespan(server.mcp):
+            await asyncio.wait_for(started.wait(), 1)
+
+    assert cancelled.is_set()
+
+
+@pytest.mark.asyncio
+async def test_server_lifespan_is_shared_by_nested_sessions():
+    """Test that overlapping lifespans share one client that closes with the last one."""
+    async with server_lifespan(server.mcp):
+        client = server._http_client
+        async with server_lifespan(server.mcp):
+            assert server._http_client is client
+        assert not client.is_closed
+
+    assert client.is_closed
@@ -0,0 +1,47 @@
+"""Tests for the fast JSON decoding and encoding helpers."""
+
+import httpx
+import numpy as np
+import pytest
+
+from prometheus_mcp_server.json_codec import dumps, loads, read_json
+
+
+def make_response(chunks, headers=None):
+    """Build a streaming httpx response from body chunks."""
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+    return httpx.Response(200, headers=headers or {}, content=stream())
+
+
+@pytest.mark.asyncio
+async def test_read_json_streams_chunks():
+    """Test decoding a body delivered in several chunks without a known length."""
+    response = make_response([b'{"status":', b'"success",', b'"data":[1,2]}'])
+
+    assert await read_json(response) == ({"status": "success", "data": [1, 2]}, 33)
+
+
+@pytest.mark.asyncio
+async def test_read_json_preallocates_known_length():
+    """Test decoding into a buffer sized from Content-Length."""
+    body = b'{"status":"success","data":["up"]}'
+    response = make_response([body[:5], body[5:]], headers={"content-length": str(len(body))})
+
+    assert await read_json(response) == ({"status": "success", "data": ["up"]}, len(body))
+
+
+@pytest.mark.asyncio
+async def test_read_json_body_longer_than_declared():
+    """Test that a body larger than Content-Length still decodes completely."""
+    body = b'{"data":[1,2,3]}'
+    response = make_response([body[:8], body[8:]], headers={"content-length": "4"})
+
+    assert await read_json(response) == ({"data": [1, 2, 3]}, len(body))
+
+
+def test_dumps_round_trip():
+    """Test that values encode to compact JSON, including NumPy arrays."""
+    assert loads(dumps({"a": [1, "2"], "b": np.array([1.5, 2.5])})) == {"a": [1, "2"], "b": [1.5, 2.5]}
+
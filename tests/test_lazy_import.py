@@ -0,0 +1,35 @@
+"""Tests for lazy module imports and the server's startup imports."""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+from prometheus_mcp_server.lazy_import import lazy_import
+
+
+def test_lazy_import_returns_loaded_module():
+    """Test that an already imported module is returned as is."""
+    assert lazy_import("json") is json
+
+
+def test_lazy_import_missing_module():
+    """Test that a missing module fails right away, not on first use."""
+    with pytest.raises(ImportError):
+        lazy_import("prometheus_mcp_server_missing_module")
+
+
+def test_server_startup_does_not_load_numpy():
+    """Test that starting the server leaves numpy unloaded until a tool needs it."""
+    code = (
+        "import sys, prometheus_mcp_server.main\n"
+        "loaded = 'numpy.linalg' in sys.modules\n"
+        "from prometheus_mcp_server.summarize import np\n"
+        "np.zeros(1)\n"
+        "print(loaded, 'numpy.linalg' in sys.modules)\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            env={"PROMETHEUS_URL": "http://127.0.0.1:9", "PATH": ""})
+
+    assert result.stdout.split() == ["False", "True"]
@@ -9,7 +9,22 @@ from unittest.mock import patch
 import pytest
 import structlog
 
-from prometheus_mcp_server.logging_config import setup_logging, get_logger
+from prometheus_mcp_server.logging_config import (
+    EventRateLimiter,
+    LogWriter,
+    QueryTruncator,
+    get_logger,
+    setup_logging,
+    stop_logging,
+    truncate_query,
+)
+
+
+@pytest.fixture(autouse=True)
+def restore_logging():
+    """Remove the log handler installed by a test, so later tests do not write to its stream."""
+    yield
+    stop_logging()
 
 
 def test_setup_logging_returns_logger():
@@ -59,4 +74,80 @@ def test_logging_levels():
     
     # Test with structured data
     logger.info("Structured message", user_id=123, action="test")
-    logger.error("Error with context", error_code=500, module="test") 
\ No newline at end of file
+    logger.error("Error with context", error_code=500, module="test") 
+
+
+def test_setup_logging_writes_json_lines_in_background():
+    """Test that events are written as JSON lines to the given stream once the queue is flushed."""
+    stream = StringIO()
+    setup_logging(stream=stream)
+
+    structlog.get_logger("test").info("Query executed", query="up", series=3)
+    stop_logging()
+
+    line = json.loads(stream.getvalue().splitlines()[-1])
+    assert line["event"] == "Query executed"
+    assert line["level"] == "info"
+    assert line["series"] == 3
+    assert "timestamp" in line
+
+
+def test_disabled_levels_are_not_built(monkeypatch):
+    """Test that events below the configured level skip the processors entirely."""
+    monkeypatch.setenv("PROMETHEUS_MCP_LOG_LEVEL", "warning")
+    stream = StringIO()
+    setup_logging(stream=stream)
+    logger = structlog.get_logger("test")
+
+    with patch("prometheus_mcp_server.logging_config.QueryTruncator.__call__") as truncator:
+        logger.debug("Making Prometheus API request", params={"query": "up"})
+        logger.info("Query executed")
+    stop_logging()
+
+    truncator.assert_not_called()
+    assert stream.getvalue() == ""
+
+
+def test_rate_limiter_drops_repeated_info_events():
+    """Test that repeated info events are limited per second and the drops reported later."""
+    now = [0.0]
+    limiter = EventRateLimiter(2, clock=lambda: now[0])
+
+    passed = []
+    for _ in range(5):
+        try:
+            passed.append(limiter(None, "info", {"event": "Query executed"}))
+        except structlog.DropEvent:
+            pass
+    warning = limiter(None, "warning", {"event": "Query executed"})
+    now[0] = 1.5
+    after = limiter(None, "info", {"event": "Query executed"})
+
+    assert len(passed) == 2
+    assert warning == {"event": "Query executed"}
+    assert after["suppressed"] == 3
+
+
+def test_query_truncation():
+    """Test that long queries, also inside request parameters, are shortened."""
+    truncator = QueryTruncator(5)
+
+    event = truncator(None, "info", {"event": "e", "query": "rate(x[5m])", "params": {"query": "sum(up)", "step": "1m"}})
+
+    assert event["query"] == "rate(...(11 chars)"
+    assert event["params"] == {"query": "sum(u...(7 chars)", "step": "1m"}
+    assert truncate_query("up", 0) == "up"
+
+
+def test_log_writer_drops_lines_when_full():
+    """Test that lines are dropped instead of blocking when the queue is full, and the rest written on stop."""
+    stream = StringIO()
+    writer = LogWriter(stream, max_size=2)
+
+    for n in range(3):
+        writer.put(f"line {n}")
+    writer.start()
+    writer.stop()
+
+    assert writer.dropped == 1
+    assert stream.getvalue() == "line 0\nline 1\n"
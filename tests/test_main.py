@@ -1,8 +1,7 @@
 """Tests for the main module."""
 
-import os
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 from prometheus_mcp_server.main import setup_environment, run_server
 
 @patch("prometheus_mcp_server.main.config")
@@ -14,6 +13,7 @@ def test_setup_environment_success(mock_config):
     mock_config.password = None
     mock_config.token = None
     mock_config.org_id = None
+    mock_config.query_guard = "adjust"
 
     # Execute
     result = setup_environment()
@@ -30,6 +30,7 @@ def test_setup_environment_missing_url(mock_config):
     mock_config.password = None
     mock_config.token = None
     mock_config.org_id = None
+    mock_config.query_guard = "adjust"
 
     # Execute
     result = setup_environment()
@@ -46,6 +47,7 @@ def test_setup_environment_with_auth(mock_config):
     mock_config.password = "pass"
     mock_config.token = None
     mock_config.org_id = None
+    mock_config.query_guard = "adjust"
 
     # Execute
     result = setup_environment()
@@ -53,6 +55,19 @@ def test_setup_environment_with_auth(mock_config):
     # Verify
     assert result is True
 
+@patch("prometheus_mcp_server.main.config")
+def test_setup_environment_invalid_query_guard(mock_config):
+    """Test environment setup with an unknown query guard mode."""
+    # Setup
+    mock_config.url = "http://test:9090"
+    mock_config.query_guard = "ignore"
+
+    # Execute
+    result = setup_environment()
+
+    # Verify
+    assert result is False
+
 @patch("prometheus_mcp_server.main.setup_environment")
 @patch("prometheus_mcp_server.main.mcp.run")
 @patch("prometheus_mcp_server.main.sys.exit")
@@ -87,3 +102,27 @@ def test_run_server_setup_failure(mock_exit, mock_run, mock_setup):
     mock_setup.assert_called_once()
     mock_run.assert_not_called()
     mock_exit.assert_called_once_with(1)
+
+@patch("prometheus_mcp_server.main.setup_environment", return_value=True)
+@patch("prometheus_mcp_server.main.run_sse_server")
+@patch("prometheus_mcp_server.main.mcp.run")
+def test_run_server_sse_transport(mock_run, mock_run_sse, mock_setup):
+    """Test that the SSE transport is selected from the config."""
+    # Execute
+    with patch("prometheus_mcp_server.main.config.transport", "sse"):
+        run_server()
+
+    # Verify
+    mock_run_sse.assert_called_once()
+    mock_run.assert_not_called()
+
+@patch("prometheus_mcp_server.main.setup_environment", return_value=True)
+@patch("prometheus_mcp_server.main.mcp.run")
+def test_run_server_unknown_transport(mock_run, mock_setup):
+    """Test that an unsupported transport stops the server."""
+    # Execute
+    with patch("prometheus_mcp_server.main.config.transport", "websocket"), pytest.raises(SystemExit):
+        run_server()
+
+    # Verify
+    mock_run.assert_not_called()
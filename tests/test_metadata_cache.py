@@ -0,0 +1,74 @@
+"""Tests for the bulk metric metadata cache."""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock
+
+from prometheus_mcp_server.metadata_cache import MetadataCache
+
+METADATA = {
+    "http_requests_total": [{"type": "counter", "help": "Total HTTP requests", "unit": ""}],
+    "up": [{"type": "gauge", "help": "Scrape health", "unit": ""}],
+}
+
+
+@pytest.mark.asyncio
+async def test_lookups_use_single_bulk_request():
+    """Test that single and batch lookups are answered from one metadata request."""
+    fetch = AsyncMock(return_value=METADATA)
+    cache = MetadataCache(fetch)
+
+    await cache.ensure_loaded()
+    await cache.ensure_loaded()
+
+    assert cache.get("up") == METADATA["up"]
+    assert cache.get_many(["up", "missing"]) == {"up": METADATA["up"], "missing": []}
+    fetch.assert_awaited_once_with("metadata")
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_load_fetches_once():
+    """Test that concurrent first lookups share one load."""
+    fetch = AsyncMock(return_value=METADATA)
+    cache = MetadataCache(fetch)
+
+    await asyncio.gather(*(cache.ensure_loaded() for _ in range(5)))
+
+    fetch.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_stale_lookup_refreshes_in_background():
+    """Test that stale data is served while a background refresh replaces it."""
+    clock = [0.0]
+    fetch = AsyncMock(return_value=METADATA)
+    cache = MetadataCache(fetch, ttl=60, clock=lambda: clock[0])
+    await cache.ensure_loaded()
+
+    clock[0] = 61.0
+    fetch.return_value = {"up": [{"type": "gauge", "help": "Updated", "unit": ""}]}
+    await cache.ensure_loaded()
+
+    assert cache.get("up") == METADATA["up"]
+    await cache._refresh_task
+    assert cache.get("up")[0]["help"] == "Updated"
+    assert cache.stats()["refreshes"] == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_background_refresh_keeps_data():
+    """Test that a failed refresh keeps serving the previous metadata."""
+    clock = [0.0]
+    fetch = AsyncMock(return_value=METADATA)
+    cache = MetadataCache(fetch, ttl=60, clock=lambda: clock[0])
+    await cache.ensure_loaded()
+
+    clock[0] = 61.0
+    fetch.side_effect = ValueError("Prometheus unavailable")
+    await cache.ensure_loaded()
+    await cache._refresh_task
+
+    assert cache.get("up") == METADATA["up"]
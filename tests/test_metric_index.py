@@ -0,0 +1,152 @@
+"""Tests for the metric name index."""
+
+import pytest
+from unittest.mock import AsyncMock
+
+from prometheus_mcp_server.metadata_cache import MetadataCache
+from prometheus_mcp_server.metric_index import MetricIndex
+
+NAMES = [
+    "go_goroutines",
+    "http_request_duration_seconds_bucket",
+    "http_requests_total",
+    "node_cpu_seconds_total",
+    "process_cpu_seconds_total",
+    "up",
+]
+
+METADATA = {
+    "http_requests_total": [{"type": "counter", "help": "Total HTTP requests", "unit": ""}],
+    "up": [{"type": "gauge", "help": "Scrape health", "unit": ""}],
+}
+
+
+def make_fetch(names=NAMES, metadata=METADATA):
+    """Build a fake Prometheus fetcher for the index."""
+    async def fetch(endpoint, params=None):
+        if endpoint == "label/__name__/values":
+            return list(names)
+        if endpoint == "metadata":
+            return dict(metadata)
+        if endpoint == "labels":
+            return ["__name__", "instance", "job"]
+        raise AssertionError(f"unexpected endpoint {endpoint}")
+    return AsyncMock(side_effect=fetch)
+
+
+async def loaded_index(fetch=None, **kwargs):
+    """Create an index and load names and metadata."""
+    fetch = fetch or make_fetch()
+    index = MetricIndex(fetch, metadata=MetadataCache(fetch), **kwargs)
+    await index.ensure_loaded(metadata=True)
+    return index
+
+
+@pytest.mark.asyncio
+async def test_prefix_search():
+    """Test case-insensitive prefix search."""
+    index = await loaded_index()
+
+    assert index.search("HTTP_", mode="prefix") == ["http_request_duration_seconds_bucket", "http_requests_total"]
+    assert index.search("zzz", mode="prefix") == []
+
+
+@pytest.mark.asyncio
+async def test_substring_search():
+    """Test substring search."""
+    index = await loaded_index()
+
+    assert index.search("cpu", mode="substring") == ["node_cpu_seconds_total", "process_cpu_seconds_total"]
+
+
+@pytest.mark.asyncio
+async def test_fuzzy_search_prefers_compact_matches():
+    """Test that fuzzy search matches in-order characters, tightest match first."""
+    index = await loaded_index()
+
+    results = index.search("reqtot", mode="fuzzy")
+
+    assert results[0] == "http_requests_total"
+
+
+@pytest.mark.asyncio
+async def test_auto_search_orders_prefix_first():
+    """Test that auto mode lists prefix matches before other matches without duplicates."""
+    index = await loaded_index()
+
+    results = index.search("up", mode="auto")
+
+    assert results[0] == "up"
+    assert len(results) == len(set(results))
+
+
+@pytest.mark.asyncio
+async def test_invalid_search_mode():
+    """Test that an unknown search mode is rejected."""
+    index = await loaded_index()
+
+    with pytest.raises(ValueError):
+        index.search("up", mode="regex")
+
+
+@pytest.mark.asyncio
+async def test_describe_includes_metadata_and_labels():
+    """Test that described metrics include metadata and fetched label names."""
+    index = await loaded_index()
+
+    await index.label_names(["up"])
+
+    assert index.describe("up") == {
+        "name": "up", "type": "gauge", "help": "Scrape health", "unit": "", "labels": ["instance", "job"]
+    }
+
+
+@pytest.mark.asyncio
+async def test_incremental_refresh_adds_new_names():
+    """Test that an incremental refresh only asks for names with recent samples."""
+    clock = [1000.0]
+    fetch = make_fetch()
+    index = await loaded_index(fetch, clock=lambda: clock[0])
+
+    clock[0] = 1300.0
+    fetch = index._fetch = make_fetch(names=["up", "new_metric_total"])
+
+    changed = await index.refresh()
+
+    assert changed is True
+    assert "new_metric_total" in index.search("new_", mode="prefix")
+    assert fetch.call_args_list[-1].kwargs["params"] == {"start": "1000"}
+
+
+@pytest.mark.asyncio
+async def test_incremental_refresh_without_changes():
+    """Test that an incremental refresh with no new names leaves the index untouched."""
+    clock = [1000.0]
+    fetch = make_fetch()
+    index = await loaded_index(fetch, clock=lambda: clock[0])
+
+    clock[0] = 1300.0
+    assert await index.refresh() is False
+    assert len(index.names) == len(NAMES)
+
+
+@pytest.mark.asyncio
+async def test_full_refresh_drops_stale_names():
+    """Test that a due full refresh replaces the name set."""
+    clock = [1000.0]
+    index = await loaded_index(make_fetch(), full_refresh_interval=3600, clock=lambda: clock[0])
+
+    clock[0] = 5000.0
+    index._fetch = make_fetch(names=["up"])
+
+    assert await index.refresh() is True
+    assert index.names == ["up"]
+
+
+@pytest.mark.asyncio
+async def test_describe_without_metadata_cache():
+    """Test that an index without a metadata cache still describes names."""
+    index = MetricIndex(make_fetch())
+    await index.ensure_loaded(metadata=True)
+
+    assert index.describe("up") == {"name": "up"}
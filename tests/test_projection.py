@@ -0,0 +1,106 @@
+"""Tests for label projection and series caps on query results."""
+
+import pytest
+
+from prometheus_mcp_server.projection import project_result, validate_projection
+
+
+def make_vector(*values):
+    """Build vector data with one series per value."""
+    return {
+        "resultType": "vector",
+        "result": [
+            {"metric": {"__name__": "up", "job": "node", "instance": f"host-{i}"}, "value": [1700000000, str(v)]}
+            for i, v in enumerate(values)
+        ],
+    }
+
+
+def make_matrix(*series_values):
+    """Build matrix data with one series per list of values."""
+    return {
+        "resultType": "matrix",
+        "result": [
+            {"metric": {"instance": f"host-{i}"}, "values": [[1700000000 + 15 * j, str(v)] for j, v in enumerate(values)]}
+            for i, values in enumerate(series_values)
+        ],
+    }
+
+
+def test_no_options_returns_data_unchanged():
+    """Test that a result is passed through as is when no option is set."""
+    data = make_vector(1, 2)
+
+    assert project_result(data) is data
+
+
+def test_keep_labels():
+    """Test that only the kept labels remain, and the input is not modified."""
+    data = make_vector(1)
+
+    projected = project_result(data, keep_labels=["job", "missing"])
+
+    assert projected["result"][0]["metric"] == {"job": "node"}
+    assert projected["result"][0]["value"] == [1700000000, "1"]
+    assert data["result"][0]["metric"]["__name__"] == "up"
+    assert "truncated" not in projected
+
+
+def test_drop_labels():
+    """Test that dropped labels are removed and the others kept."""
+    projected = project_result(make_vector(1), drop_labels=["__name__", "instance"])
+
+    assert projected["result"][0]["metric"] == {"job": "node"}
+
+
+def test_sort_and_limit_vector():
+    """Test sorting a vector by value with NaN last and reporting the truncation."""
+    projected = project_result(make_vector(3, "NaN", 7, 1), sort="desc", limit=3)
+
+    assert [series["value"][1] for series in projected["result"]] == ["7", "3", "1"]
+    assert projected["truncated"] == {"returnedSeries": 3, "totalSeries": 4, "returnedSamples": 3, "totalSamples": 4}
+
+    ascending = project_result(make_vector(3, "NaN", 7, 1), sort="asc")
+    assert [series["value"][1] for series in ascending["result"]] == ["1", "3", "7", "NaN"]
+
+
+def test_sort_matrix_by_statistic():
+    """Test that matrix series are sorted on the chosen statistic."""
+    data = make_matrix([1, 10], [5, 5], [2, 3])
+
+    by_max = project_result(data, sort="desc", stat="max")
+    by_last = project_result(data, sort="asc", stat="last")
+
+    assert [series["metric"]["instance"] for series in by_max["result"]] == ["host-0", "host-1", "host-2"]
+    assert [series["metric"]["instance"] for series in by_last["result"]] == ["host-2", "host-1", "host-0"]
+
+
+def test_sample_limit_keeps_most_recent_samples():
+    """Test that the series reaching the sample limit keeps its latest samples and later series are dropped."""
+    data = make_matrix([1, 2, 3], [4, 5, 6], [7, 8, 9])
+
+    projected = project_result(data, sample_limit=5)
+
+    assert projected["result"][0] is data["result"][0]
+    assert [value for _, value in projected["result"][1]["values"]] == ["5", "6"]
+    assert len(projected["result"]) == 2
+    assert projected["truncated"] == {"returnedSeries": 2, "totalSeries": 3, "returnedSamples": 5, "totalSamples": 9}
+
+
+def test_scalar_results_are_not_projected():
+    """Test that scalar results pass through untouched."""
+    data = {"resultType": "scalar", "result": [1700000000, "1"]}
+
+    assert project_result(data, limit=1) is data
+
+
+@pytest.mark.parametrize("options, message", [
+    ({"keep_labels": ["job"], "drop_labels": ["instance"]}, "cannot be combined"),
+    ({"sort": "up"}, "Unknown sort order"),
+    ({"limit": 0}, "limit must be at least 1"),
+    ({"sample_limit": 0}, "sample_limit must be at least 1"),
+])
+def test_validate_projection_rejects_invalid_options(options, message):
+    """Test that inconsistent or out of range options are rejected."""
+    with pytest.raises(ValueError, match=message):
+        validate_projection(**options)
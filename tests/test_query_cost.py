@@ -0,0 +1,80 @@
+"""Tests for the PromQL pre-flight cost estimator."""
+
+import pytest
+
+from prometheus_mcp_server.query_cost import (
+    SelectorUse,
+    estimate_cost,
+    evaluations,
+    parse_selectors,
+    parse_tool_budgets,
+    query_budget,
+    widened_step,
+)
+
+
+def selectors(query):
+    return [(use.selector, use.range_seconds, use.subquery_factor) for use in parse_selectors(query)]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("up", [("up", None, 1)]),
+    ('rate(http_requests_total{job="api", path=~"/a{b}"}[5m])',
+     [('http_requests_total{job="api", path=~"/a{b}"}', 300, 1)]),
+    ("sum by (job) (rate(x[30d]))", [("x", 2592000, 1)]),
+    ("sum(rate(x[5m])) without (instance) / on(job) group_left(team) y", [("x", 300, 1), ("y", None, 1)]),
+    ("max_over_time(rate(x[5m])[1h:1m])", [("x", 300, 60)]),
+    ("x[10m:] offset 5m", [("x", None, 10)]),
+    ('{__name__=~"foo.*"}[1m] @ start()', [('{__name__=~"foo.*"}', 60, 1)]),
+    ('label_replace(up, "dst", "$1", "src", "(.*)") > bool 0x10', [("up", None, 1)]),
+    ("time() - 1e3", []),
+])
+def test_parse_selectors(query, expected):
+    """Test that selectors are found with their ranges, skipping functions, keywords and literals."""
+    assert selectors(query) == expected
+
+
+def test_samples_per_series():
+    """Test that range selectors read one sample per scrape interval in their range."""
+    assert SelectorUse("x", "x").samples_per_series(15) == 1
+    assert SelectorUse("x", "x", range_seconds=300).samples_per_series(15) == 20
+    assert SelectorUse("x", "x", range_seconds=300, subquery_factor=60).samples_per_series(15) == 1200
+
+
+@pytest.mark.asyncio
+async def test_estimate_refines_with_series_counts_only_over_budget():
+    """Test that exact series counts are only requested when the cheap bound exceeds the budget."""
+    uses = parse_selectors("rate(x[1m])")
+    requested = []
+
+    async def upper_bound(use):
+        return 1000
+
+    async def series_count(use):
+        requested.append(use.selector)
+        return 10
+
+    cheap = await estimate_cost(uses, 10, 15, upper_bound, series_count, budget=100000)
+    assert (cheap.samples, cheap.exact, requested) == (40000, False, [])
+
+    exact = await estimate_cost(uses, 10, 15, upper_bound, series_count, budget=1000)
+    assert (exact.samples, exact.per_evaluation, exact.exact, requested) == (400, 40, True, ["x"])
+
+
+def test_evaluations_and_widened_step():
+    """Test that the step is widened just enough to fit the budget."""
+    assert evaluations(0, 3600, 1) == 3601
+    assert widened_step(0, 3600, 1, per_evaluation=100, budget=100 * 61) == 60
+    # 37s would fit, rounded up to the next common step
+    assert widened_step(0, 3600, 1, per_evaluation=100, budget=100 * 100) == 60
+    assert widened_step(0, 30 * 86400, 60, per_evaluation=100, budget=100 * 10) == 4 * 86400
+    assert widened_step(0, 3600, 120, per_evaluation=100, budget=100 * 61) == 120
+    assert widened_step(0, 3600, 1, per_evaluation=100, budget=99) is None
+
+
+def test_query_budget_and_tool_budgets():
+    """Test that the smallest configured budget applies and per-tool budgets are read from the environment."""
+    assert query_budget([0, 0, 0]) == 0
+    assert query_budget([1000, 0, 500]) == 500
+    environ = {"PROMETHEUS_MAX_SAMPLES_EXECUTE_RANGE_QUERY": "2000"}
+    assert parse_tool_budgets(environ, ["execute_query", "execute_range_query"]) == {"execute_range_query": 2000}
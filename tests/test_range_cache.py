@@ -0,0 +1,135 @@
+"""Tests for the incremental range query cache."""
+
+import pytest
+
+from prometheus_mcp_server.range_cache import CompactSeries, IncrementalRangeCache, merge_extents, missing_ranges
+
+
+def make_fetcher(calls, series=({"__name__": "up"},), step=10):
+    """Build a fetcher that returns one sample per step for each series and records its windows."""
+    async def fetch(start, end):
+        calls.append((start, end))
+        return [
+            {"metric": dict(metric), "values": [[ts, str(ts)] for ts in range(int(start), int(end) + 1, step)]}
+            for metric in series
+        ]
+    return fetch
+
+
+def test_missing_ranges():
+    """Test computing the uncovered windows of a range."""
+    assert missing_ranges([], 0, 100, 10) == [(0, 100)]
+    assert missing_ranges([(0, 50)], 0, 100, 10) == [(60, 100)]
+    assert missing_ranges([(30, 50)], 0, 100, 10) == [(0, 20), (60, 100)]
+    assert missing_ranges([(0, 100)], 20, 80, 10) == []
+    assert missing_ranges([(0, 20), (60, 70)], 0, 100, 10) == [(30, 50), (80, 100)]
+
+
+def test_merge_extents():
+    """Test that touching and overlapping extents are merged."""
+    assert merge_extents([(60, 100), (0, 50)], 10) == [(0, 100)]
+    assert merge_extents([(0, 20), (40, 50), (45, 70)], 10) == [(0, 20), (40, 70)]
+
+
+@pytest.mark.asyncio
+async def test_query_fetches_only_missing_window():
+    """Test that a sliding window only fetches the new part of the range."""
+    cache = IncrementalRangeCache(max_bytes=10**6, max_freshness=0, clock=lambda: 10_000)
+    calls = []
+    fetch = make_fetcher(calls)
+
+    first = await cache.query("up", 0, 100, 10, fetch)
+    second = await cache.query("up", 50, 150, 10, fetch)
+
+    assert calls == [(0, 100), (110, 150)]
+    assert [ts for ts, _ in first[0]["values"]] == list(range(0, 101, 10))
+    assert [ts for ts, _ in second[0]["values"]] == list(range(50, 151, 10))
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["partial_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_query_full_hit():
+    """Test that a range fully inside cached extents does not fetch."""
+    cache = IncrementalRangeCache(max_bytes=10**6, max_freshness=0, clock=lambda: 10_000)
+    calls = []
+    fetch = make_fetcher(calls)
+
+    await cache.query("up", 0, 100, 10, fetch)
+    result = await cache.query("up", 20, 80, 10, fetch)
+
+    assert calls == [(0, 100)]
+    assert [ts for ts, _ in result[0]["values"]] == list(range(20, 81, 10))
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_query_does_not_cache_fresh_samples():
+    """Test that samples newer than the freshness horizon are refetched."""
+    cache = IncrementalRangeCache(max_bytes=10**6, max_freshness=30, clock=lambda: 100)
+    calls = []
+    fetch = make_fetcher(calls)
+
+    await cache.query("up", 0, 100, 10, fetch)
+    result = await cache.query("up", 0, 100, 10, fetch)
+
+    assert calls == [(0, 100), (80, 100)]
+    assert [ts for ts, _ in result[0]["values"]] == list(range(0, 101, 10))
+
+
+@pytest.mark.asyncio
+async def test_query_merges_series_from_different_windows():
+    """Test that series appearing in only one window are kept."""
+    cache = IncrementalRangeCache(max_bytes=10**6, max_freshness=0, clock=lambda: 10_000)
+    calls = []
+
+    await cache.query("up", 0, 50, 10, make_fetcher(calls, series=({"job": "a"},)))
+    result = await cache.query("up", 0, 100, 10, make_fetcher(calls, series=({"job": "b"},)))
+
+    assert {series["metric"]["job"] for series in result} == {"a", "b"}
+
+
+@pytest.mark.asyncio
+async def test_memory_budget_evicts_least_recently_used():
+    """Test that entries are evicted when the memory budget is exceeded."""
+    cache = IncrementalRangeCache(max_bytes=1500, max_freshness=0, clock=lambda: 10_000)
+    calls = []
+    fetch = make_fetcher(calls)
+
+    await cache.query("a", 0, 100, 10, fetch)
+    await cache.query("b", 0, 100, 10, fetch)
+
+    assert len(cache) == 1
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= 1500
+
+
+def test_compact_series_merge_and_window():
+    """Test that compact series merge without duplicates and render the original value strings."""
+    series = CompactSeries.from_values({"job": "a"}, [[0, "1"], [10, "2.50"], [20, "NaN"]], 0, 20000)
+    series.merge(CompactSeries.from_values({"job": "a"}, [[20, "9"], [30.5, "1e-07"]], 0, 100000))
+
+    assert series.timestamps.tolist() == [0, 10000, 20000, 30500]
+    assert series.to_values() == [[0, "1"], [10, "2.50"], [20, "NaN"], [30.5, "1e-07"]]
+    assert series.window(10000, 20000).to_values() == [[10, "2.50"], [20, "NaN"]]
+    assert series.nbytes == 4 * (8 + 8 + 56)
+
+
+@pytest.mark.asyncio
+async def test_full_miss_returns_fetched_result():
+    """Test that a range with nothing cached returns the fetched matrix as is, and still caches it."""
+    cache = IncrementalRangeCache(max_bytes=10**6, max_freshness=0, clock=lambda: 10_000)
+    calls = []
+    fetch = make_fetcher(calls)
+    fetched = []
+
+    async def recording_fetch(start, end):
+        fetched.append(await fetch(start, end))
+        return fetched[-1]
+
+    result = await cache.query("up", 0, 100, 10, recording_fetch)
+    again = await cache.query("up", 0, 100, 10, recording_fetch)
+
+    assert result is fetched[0]
+    assert again == result
+    assert calls == [(0, 100)]
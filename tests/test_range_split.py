@@ -0,0 +1,111 @@
+"""Tests for range query splitting and parallel fan-out."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from prometheus_mcp_server.range_split import fetch_shards, is_retryable, merge_matrices, split_range
+
+
+def test_split_range_on_interval_boundaries():
+    """Test that shards end at interval boundaries without overlapping."""
+    shards = split_range(0, 250, 10, interval=100)
+
+    assert shards == [(0, 90), (100, 190), (200, 250)]
+
+
+def test_split_range_keeps_step_grid():
+    """Test that unaligned starts keep evaluating on the original step grid."""
+    shards = split_range(5, 205, 10, interval=100)
+
+    assert shards == [(5, 95), (105, 195), (205, 205)]
+
+
+def test_split_range_respects_point_limit():
+    """Test that shards never exceed the per-series point limit."""
+    shards = split_range(0, 1000, 1, interval=0, max_points=300)
+
+    for start, end in shards:
+        assert (end - start) + 1 <= 300
+    assert shards[0][0] == 0
+    assert shards[-1][1] == 1000
+
+
+def test_split_range_single_shard():
+    """Test that short ranges are not split."""
+    assert split_range(0, 3600, 15, interval=86400) == [(0, 3600)]
+
+
+def test_merge_matrices_deduplicates_boundaries():
+    """Test that boundary samples returned by two shards are kept once and in order."""
+    merged = merge_matrices([
+        [{"metric": {"job": "a"}, "values": [[0, "1"], [10, "2"]]}],
+        [{"metric": {"job": "a"}, "values": [[10, "2"], [20, "3"]]},
+         {"metric": {"job": "b"}, "values": [[20, "5"]]}],
+    ])
+
+    assert merged == [
+        {"metric": {"job": "a"}, "values": [[0, "1"], [10, "2"], [20, "3"]]},
+        {"metric": {"job": "b"}, "values": [[20, "5"]]},
+    ]
+
+
+def test_is_retryable():
+    """Test that only transient errors are retried."""
+    request = httpx.Request("GET", "http://test:9090/api/v1/query_range")
+    assert is_retryable(httpx.ConnectError("refused"))
+    assert is_retryable(httpx.HTTPStatusError("unavailable", request=request, response=httpx.Response(503)))
+    assert not is_retryable(httpx.HTTPStatusError("bad query", request=request, response=httpx.Response(400)))
+    assert not is_retryable(ValueError("Prometheus API error"))
+
+
+@pytest.mark.asyncio
+async def test_fetch_shards_bounded_concurrency():
+    """Test that no more than the configured number of shards run at once."""
+    running = 0
+    peak = 0
+
+    async def fetch(start, end):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return [{"metric": {"job": "a"}, "values": [[start, "1"]]}]
+
+    result = await fetch_shards([(0, 0), (10, 10), (20, 20), (30, 30), (40, 40)], fetch, concurrency=2)
+
+    assert peak == 2
+    assert [ts for ts, _ in result[0]["values"]] == [0, 10, 20, 30, 40]
+
+
+@pytest.mark.asyncio
+async def test_fetch_shards_retries_transient_failures():
+    """Test that a shard failing with a transient error is retried."""
+    attempts = []
+
+    async def fetch(start, end):
+        attempts.append(start)
+        if start == 10 and attempts.count(10) == 1:
+            raise httpx.ReadTimeout("timed out")
+        return [{"metric": {"job": "a"}, "values": [[start, "1"]]}]
+
+    result = await fetch_shards([(0, 0), (10, 10)], fetch, retries=2, retry_backoff=0)
+
+    assert attempts.count(10) == 2
+    assert [ts for ts, _ in result[0]["values"]] == [0, 10]
+
+
+@pytest.mark.asyncio
+async def test_fetch_shards_does_not_retry_query_errors():
+    """Test that non-transient errors fail immediately."""
+    attempts = []
+
+    async def fetch(start, end):
+        attempts.append(start)
+        raise ValueError("Prometheus API error: parse error")
+
+    with pytest.raises(ValueError):
+        await fetch_shards([(0, 0)], fetch, retries=2, retry_backoff=0)
+    assert attempts == [0]
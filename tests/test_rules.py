@@ -0,0 +1,130 @@
+"""Tests for PromQL normalization, the rule index and alert filtering."""
+
+import pytest
+
+from prometheus_mcp_server.rules import RuleCache, RuleIndex, filter_alerts, normalize_expr, rule_summary
+
+
+def make_groups():
+    """Build a rules response with one recording and one alerting group."""
+    return [
+        {
+            "name": "http",
+            "file": "/etc/prometheus/rules/http.yml",
+            "interval": 30,
+            "rules": [
+                {"type": "recording", "name": "job:http_errors:rate5m", "health": "ok",
+                 "query": 'sum by (job) (rate(http_requests_total{code=~"5.."}[5m]))'},
+                {"type": "recording", "name": "job:http_requests:rate5m:labeled", "health": "ok",
+                 "query": "sum by (job) (rate(http_requests_total[5m]))", "labels": {"team": "web"}},
+                {"type": "recording", "name": "broken", "health": "err", "query": "sum(up)"},
+            ],
+        },
+        {
+            "name": "alerts",
+            "file": "/etc/prometheus/rules/alerts.yml",
+            "interval": 60,
+            "rules": [
+                {"type": "alerting", "name": "InstanceDown", "health": "ok", "state": "firing",
+                 "query": "up == 0", "alerts": [{"labels": {"alertname": "InstanceDown"}, "state": "firing"}]},
+            ],
+        },
+    ]
+
+
+@pytest.mark.parametrize("written, recorded", [
+    ('sum(rate(http_requests_total{job="api", code=~"5.."}[5m])) by (job)',
+     'sum by (job) (rate(http_requests_total{code=~"5..",job="api"}[5m]))'),
+    ("(SUM BY(instance, job)(rate(x[300s])))", "sum by (job, instance) (rate(x[5m]))"),
+    ("rate(x{job='api'}[1h30m]) # comment", 'rate(x{job="api"}[90m])'),
+    ("up{}", "up"),
+])
+def test_normalize_expr_equivalent_expressions(written, recorded):
+    """Test that formatting differences do not change the normalized expression."""
+    assert normalize_expr(written) == normalize_expr(recorded)
+
+
+@pytest.mark.parametrize("first, second", [
+    ("sum by (job) (rate(x[5m]))", "sum by (job) (rate(x[1m]))"),
+    ('up{job="api"}', 'up{job="web"}'),
+    ("a - b", "b - a"),
+])
+def test_normalize_expr_different_expressions(first, second):
+    """Test that expressions with different meaning stay different."""
+    assert normalize_expr(first) != normalize_expr(second)
+
+
+def test_normalize_expr_rejects_unbalanced_brackets():
+    """Test that unbalanced brackets raise ValueError."""
+    with pytest.raises(ValueError):
+        normalize_expr("sum(rate(x[5m])")
+
+
+def test_rule_index_recording_rule_lookup():
+    """Test that only healthy recording rules without extra labels are used for rewrites."""
+    index = RuleIndex(make_groups())
+
+    rule = index.recording_rule('sum(rate(http_requests_total{code=~"5.."}[5m])) by (job)')
+
+    assert rule["name"] == "job:http_errors:rate5m"
+    assert rule["group"] == "http"
+    assert rule["interval"] == 30
+    assert index.recording_rule("sum by (job) (rate(http_requests_total[5m]))") is None
+    assert index.recording_rule("sum(up)") is None
+
+
+def test_rule_index_find():
+    """Test filtering rules by type, name, group, health and state."""
+    index = RuleIndex(make_groups())
+
+    assert [rule["name"] for rule in index.find(rule_type="alerting")] == ["InstanceDown"]
+    assert len(index.find(name="HTTP")) == 2
+    assert len(index.find(group="http", health="ok")) == 2
+    assert [rule["name"] for rule in index.find(state="firing")] == ["InstanceDown"]
+
+
+def test_rule_summary_replaces_alerts_by_count():
+    """Test that the alerts of alerting rules are only counted unless included."""
+    rule = RuleIndex(make_groups()).find(rule_type="alerting")[0]
+
+    assert "alerts" not in rule_summary(rule)
+    assert rule_summary(rule)["alertCount"] == 1
+    assert rule_summary(rule, include_alerts=True) is rule
+
+
+def test_filter_alerts():
+    """Test filtering alerts by state, alert name and labels."""
+    alerts = [
+        {"labels": {"alertname": "InstanceDown", "severity": "critical"}, "state": "firing"},
+        {"labels": {"alertname": "InstanceDown", "severity": "warning"}, "state": "pending"},
+        {"labels": {"alertname": "DiskFull", "severity": "critical"}, "state": "firing"},
+    ]
+
+    assert len(filter_alerts(alerts, state="firing")) == 2
+    assert len(filter_alerts(alerts, name="InstanceDown")) == 2
+    assert filter_alerts(alerts, labels={"severity": "critical"}, name="DiskFull") == [alerts[2]]
+
+
+@pytest.mark.asyncio
+async def test_rule_cache_loads_once_and_refreshes_when_stale():
+    """Test that the rule index is fetched once per backend and refreshed in the background after the TTL."""
+    now = [0.0]
+    calls = []
+
+    async def fetch(endpoint, backend=None):
+        calls.append((endpoint, backend))
+        return {"groups": make_groups()}
+
+    cache = RuleCache(fetch, ttl=60, clock=lambda: now[0])
+
+    first = await cache.index()
+    second = await cache.index()
+    await cache.index("eu")
+    now[0] = 61
+    stale = await cache.index()
+    await cache._refresh_tasks[None]
+
+    assert first is second is stale
+    assert calls == [("rules", None), ("rules", "eu"), ("rules", None)]
+    assert await cache.index() is not first
+    assert cache.stats()["entries"] == 8
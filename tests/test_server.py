@@ -1,84 +1,332 @@
 """Tests for the Prometheus MCP server functionality."""
 
+import asyncio
+import inspect
+import json
+
+import anyio
+import httpx
+import orjson
 import pytest
 from unittest.mock import patch, MagicMock
-from prometheus_mcp_server.server import make_prometheus_request, get_prometheus_auth, config
+from mcp.server.fastmcp import FastMCP
+from mcp.server.lowlevel import NotificationOptions, Server
+from prometheus_mcp_server import server
+from prometheus_mcp_server.backends import ReplicaTracker
+from prometheus_mcp_server.cache import ResultCache
+from prometheus_mcp_server.server import make_prometheus_request, get_prometheus_auth, config, mcp
+
+def make_response(payload):
+    """Create a mock streaming response whose body is the JSON-encoded payload."""
+    mock = MagicMock()
+    mock.raise_for_status = MagicMock()
+    mock.headers = {}
+    body = orjson.dumps(payload)
+    mock.num_bytes_downloaded = len(body)
+
+    async def aiter_bytes():
+        yield body[:10]
+        yield body[10:]
+
+    mock.aiter_bytes = aiter_bytes
+    return mock
 
 @pytest.fixture
 def mock_response():
     """Create a mock response object for requests."""
-    mock = MagicMock()
-    mock.raise_for_status = MagicMock()
-    mock.json.return_value = {
+    return make_response({
         "status": "success", 
         "data": {
             "resultType": "vector",
             "result": []
         }
-    }
-    return mock
+    })
+
+@pytest.fixture
+def mock_stream(mock_response):
+    """Mock the streaming GET of the shared HTTP client."""
+    client = MagicMock()
+    client.stream.return_value.__aenter__.return_value = mock_response
+    with patch("prometheus_mcp_server.server.get_http_client", return_value=client):
+        yield client.stream
 
-@patch("prometheus_mcp_server.server.requests.get")
-def test_make_prometheus_request_no_auth(mock_get, mock_response):
+@pytest.mark.asyncio
+async def test_make_prometheus_request_no_auth(mock_stream, mock_response):
     """Test making a request to Prometheus with no authentication."""
     # Setup
-    mock_get.return_value = mock_response
     config.url = "http://test:9090"
     config.username = ""
     config.password = ""
     config.token = ""
 
     # Execute
-    result = make_prometheus_request("query", {"query": "up"})
+    result = await make_prometheus_request("query", {"query": "up"})
 
     # Verify
-    mock_get.assert_called_once()
+    mock_stream.assert_called_once()
     assert result == {"resultType": "vector", "result": []}
 
-@patch("prometheus_mcp_server.server.requests.get")
-def test_make_prometheus_request_with_basic_auth(mock_get, mock_response):
+@pytest.mark.asyncio
+async def test_make_prometheus_request_with_basic_auth(mock_stream, mock_response):
     """Test making a request to Prometheus with basic authentication."""
     # Setup
-    mock_get.return_value = mock_response
     config.url = "http://test:9090"
     config.username = "user"
     config.password = "pass"
     config.token = ""
 
     # Execute
-    result = make_prometheus_request("query", {"query": "up"})
+    result = await make_prometheus_request("query", {"query": "up"})
 
     # Verify
-    mock_get.assert_called_once()
+    mock_stream.assert_called_once()
     assert result == {"resultType": "vector", "result": []}
 
-@patch("prometheus_mcp_server.server.requests.get")
-def test_make_prometheus_request_with_token_auth(mock_get, mock_response):
+@pytest.mark.asyncio
+async def test_make_prometheus_request_with_token_auth(mock_stream, mock_response):
     """Test making a request to Prometheus with token authentication."""
     # Setup
-    mock_get.return_value = mock_response
     config.url = "http://test:9090"
     config.username = ""
     config.password = ""
     config.token = "token123"
 
     # Execute
-    result = make_prometheus_request("query", {"query": "up"})
+    result = await make_prometheus_request("query", {"query": "up"})
 
     # Verify
-    mock_get.assert_called_once()
+    mock_stream.assert_called_once()
     assert result == {"resultType": "vector", "result": []}
 
-@patch("prometheus_mcp_server.server.requests.get")
-def test_make_prometheus_request_error(mock_get):
+@pytest.mark.asyncio
+async def test_make_prometheus_request_error(mock_stream):
     """Test handling of an error response from Prometheus."""
     # Setup
-    mock_response = MagicMock()
-    mock_response.raise_for_status = MagicMock()
-    mock_response.json.return_value = {"status": "error", "error": "Test error"}
-    mock_get.return_value = mock_response
+    mock_stream.return_value.__aenter__.return_value = make_response({"status": "error", "error": "Test error"})
     config.url = "http://test:9090"
 
     # Execute and verify
     with pytest.raises(ValueError, match="Prometheus API error: Test error"):
-        make_prometheus_request("query", {"query": "up"})
+        await make_prometheus_request("query", {"query": "up"})
+
+@pytest.mark.asyncio
+async def test_make_prometheus_request_http_error(mock_stream):
+    """Test that transport errors from the HTTP client are propagated."""
+    # Setup
+    mock_stream.return_value.__aenter__.side_effect = httpx.ConnectError("connection refused")
+    config.url = "http://test:9090"
+
+    # Execute and verify
+    with pytest.raises(httpx.ConnectError):
+        await make_prometheus_request("query", {"query": "up"})
+
+def test_get_prometheus_auth_basic():
+    """Test that basic auth credentials produce an httpx auth object."""
+    config.username = "user"
+    config.password = "pass"
+    config.token = ""
+
+    assert isinstance(get_prometheus_auth(), httpx.BasicAuth)
+
+@pytest.mark.asyncio
+async def test_make_prometheus_request_invalid_json(mock_stream):
+    """Test that an invalid JSON body is reported as a ValueError."""
+    # Setup
+    response = make_response({})
+    async def aiter_bytes():
+        yield b"not json"
+    response.aiter_bytes = aiter_bytes
+    mock_stream.return_value.__aenter__.return_value = response
+    config.url = "http://test:9090"
+
+    # Execute and verify
+    with pytest.raises(ValueError, match="Invalid JSON response"):
+        await make_prometheus_request("query", {"query": "up"})
+
+@pytest.mark.asyncio
+async def test_call_tool_encodes_structured_result():
+    """Test that dict tool results are returned as a single JSON text content."""
+    # Setup
+    data = {"resultType": "vector", "result": [{"metric": {"__name__": "up"}, "value": [1700000000, "1"]}]}
+
+    with patch("prometheus_mcp_server.server.make_prometheus_request", return_value=data):
+        # Execute
+        content = await mcp.call_tool("execute_query", {"query": "up", "use_cache": False})
+
+    # Verify
+    assert len(content) == 1
+    assert json.loads(content[0].text) == data
+
+def test_fastmcp_overrides_match_sdk():
+    """Test that the SDK methods PrometheusMCP overrides or wraps keep the signatures it was written against.
+
+    Later SDK releases return structured output from call_tool and take more
+    arguments in add_tool; this fails before the overrides silently break.
+    """
+    call_tool = inspect.signature(FastMCP.call_tool)
+    assert list(call_tool.parameters) == ["self", "name", "arguments"]
+    assert "dict" not in str(call_tool.return_annotation)
+    assert list(inspect.signature(FastMCP.add_tool).parameters) == ["self", "fn", "name", "description"]
+    assert list(inspect.signature(Server.get_capabilities).parameters) == [
+        "self", "notification_options", "experimental_capabilities"
+    ]
+    assert mcp._mcp_server.get_capabilities(NotificationOptions(), {}).resources.subscribe is True
+
+@pytest.mark.asyncio
+async def test_make_prometheus_request_coalesces_identical_requests(mock_stream):
+    """Test that concurrent identical requests share one upstream request."""
+    # Setup
+    config.url = "http://test:9090"
+    config.username = ""
+    config.password = ""
+    config.token = ""
+
+    # Execute
+    results = await asyncio.gather(
+        make_prometheus_request("query", {"query": "up"}),
+        make_prometheus_request("query", {"query": "up"}),
+        make_prometheus_request("query", {"query": "down"}),
+    )
+
+    # Verify
+    assert mock_stream.call_count == 2
+    assert results[0] == results[1] == {"resultType": "vector", "result": []}
+
+@pytest.mark.asyncio
+async def test_cached_request_is_sized_from_response(mock_stream, mock_response):
+    """Test that cached results are sized from the response body, and estimated when they were not fetched."""
+    # Setup
+    config.url = "http://test:9090"
+    config.username = ""
+    config.password = ""
+    config.token = ""
+    body_size = mock_response.num_bytes_downloaded
+    cache = ResultCache(max_bytes=1 << 20)
+
+    # Execute
+    with patch("prometheus_mcp_server.server.result_cache", cache), patch.object(config, "cache_enabled", True):
+        await server.cached_prometheus_request("query", {"query": "up"}, 60)
+        await server.cached_prometheus_request(
+            "query", {"query": "down"}, 60, fetch=lambda: asyncio.sleep(0, {"resultType": "vector", "result": []}),
+        )
+
+    # Verify
+    assert cache.stats()["bytes"] == body_size + len('{"resultType":"vector","result":[]}')
+
+@pytest.mark.asyncio
+async def test_make_prometheus_request_fails_over_to_next_replica(mock_response):
+    """Test that a request moves on to the next HA replica when one is unreachable."""
+    # Setup
+    config.url = "http://replica-a:9090,http://replica-b:9090"
+    config.username = ""
+    config.password = ""
+    config.token = ""
+    client = MagicMock()
+    calls = []
+
+    def stream(method, url, **kwargs):
+        calls.append(url)
+        context = MagicMock()
+        if url.startswith("http://replica-a"):
+            context.__aenter__.side_effect = httpx.ConnectError("connection refused")
+        else:
+            context.__aenter__.return_value = mock_response
+        return context
+    client.stream.side_effect = stream
+
+    # Execute
+    try:
+        with patch("prometheus_mcp_server.server.get_http_client", return_value=client), \
+             patch("prometheus_mcp_server.server.replica_tracker", ReplicaTracker()) as tracker:
+            result = await make_prometheus_request("query", {"query": "up"})
+    finally:
+        config.url = "http://test:9090"
+
+    # Verify
+    assert result == {"resultType": "vector", "result": []}
+    assert calls == ["http://replica-a:9090/api/v1/query", "http://replica-b:9090/api/v1/query"]
+    assert tracker.stats()["http://replica-a:9090"]["healthy"] is False
+
+@pytest.mark.asyncio
+async def test_make_prometheus_request_retries_transient_errors(mock_response):
+    """Test that a 503 response is retried with backoff before succeeding."""
+    # Setup
+    config.url = "http://test:9090"
+    config.username = ""
+    config.password = ""
+    config.token = ""
+    client = MagicMock()
+    request = httpx.Request("GET", "http://test:9090/api/v1/query")
+    unavailable = MagicMock()
+    unavailable.raise_for_status.side_effect = httpx.HTTPStatusError(
+        "unavailable", request=request, response=httpx.Response(503, request=request)
+    )
+    contexts = [MagicMock(), MagicMock()]
+    contexts[0].__aenter__.return_value = unavailable
+    contexts[1].__aenter__.return_value = mock_response
+    client.stream.side_effect = contexts
+
+    # Execute
+    with patch("prometheus_mcp_server.server.get_http_client", return_value=client), \
+         patch.object(config, "retry_backoff", 0.001), \
+         patch("prometheus_mcp_server.server.limiters", {}) as limiters:
+        result = await make_prometheus_request("query", {"query": "up"})
+
+    # Verify
+    assert result == {"resultType": "vector", "result": []}
+    assert client.stream.call_count == 2
+    assert limiters[None].stats()["retries"] == 1
+    assert limiters[None].stats()["overloads"] == 1
+
+@pytest.mark.asyncio
+async def test_call_tool_records_metrics():
+    """Test that tool calls record latency, errors and result sizes."""
+    # Setup
+    data = {"resultType": "vector", "result": [{"metric": {"__name__": "up"}, "value": [1700000000, "1"]}]}
+    calls = server.tool_duration.count(("execute_query",))
+    samples = server.result_samples.count(("execute_query",))
+    errors = server.tool_errors.value(("execute_query", "ValueError"))
+
+    with patch("prometheus_mcp_server.server.make_prometheus_request", return_value=data):
+        # Execute
+        await mcp.call_tool("execute_query", {"query": "up", "use_cache": False})
+        with pytest.raises(Exception):
+            await mcp.call_tool("execute_query", {"query": "up", "output": "unknown"})
+
+    # Verify
+    assert server.tool_duration.count(("execute_query",)) == calls + 2
+    assert server.result_samples.count(("execute_query",)) == samples + 1
+    assert server.tool_errors.value(("execute_query", "ValueError")) == errors + 1
+    assert server.tool_in_flight.value(("execute_query",)) == 0
+    assert "prometheus_mcp_tool_duration_seconds_bucket" in server.registry.render()
+
+@pytest.mark.asyncio
+async def test_watch_resource_subscription_notifies_session():
+    """Test that a session subscribed to a watch resource is notified of changes and reads them."""
+    from mcp.shared.memory import create_connected_server_and_client_session
+
+    # Setup
+    values = iter(["1", "2"])
+
+    async def evaluate(endpoint, params=None, backend=None):
+        if endpoint != "query":
+            return []
+        value = next(values, "2")
+        return {"resultType": "vector", "result": [{"metric": {"job": "api"}, "value": [1700000000, value]}]}
+
+    with patch("prometheus_mcp_server.server.make_prometheus_request", side_effect=evaluate), \
+            patch.object(config, "watch_min_interval", 0.01):
+        async with create_connected_server_and_client_session(mcp._mcp_server) as session:
+            # Execute
+            content = await session.call_tool("watch_query", {"query": "up", "interval": "20ms"})
+            uri = json.loads(content.content[0].text)["uri"]
+            await session.subscribe_resource(uri)
+            with anyio.fail_after(2):
+                notification = await session.incoming_messages.receive()
+            update = await session.read_resource(uri)
+
+    await server.watch_registry.close()
+
+    # Verify
+    assert str(notification.root.params.uri) == uri
+    assert json.loads(update.contents[0].text)["changed"][0]["previous"] == "1"
@@ -0,0 +1,99 @@
+"""Tests for single-flight request coalescing."""
+
+import asyncio
+
+import pytest
+
+from prometheus_mcp_server.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    """Test that concurrent calls with the same key run once and share the result."""
+    flight = SingleFlight()
+    release = asyncio.Event()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await release.wait()
+        return {"value": 1}
+
+    tasks = [asyncio.create_task(flight.do("key", fetch)) for _ in range(5)]
+    await asyncio.sleep(0)
+    assert flight.stats()["in_flight"] == 1
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {"executed": 1, "coalesced": 4, "in_flight": 0}
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_and_not_cached():
+    """Test that every waiter sees the error and a later call runs again."""
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def failing():
+        await release.wait()
+        raise ValueError("boom")
+
+    tasks = [asyncio.create_task(flight.do("key", failing)) for _ in range(2)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+    async def succeeding():
+        return "ok"
+
+    assert await flight.do("key", succeeding) == "ok"
+    assert flight.stats()["executed"] == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_shared_call():
+    """Test that cancelling one caller leaves the call running for the others."""
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def fetch():
+        await release.wait()
+        return "done"
+
+    first = asyncio.create_task(flight.do("key", fetch))
+    second = asyncio.create_task(flight.do("key", fetch))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await second == "done"
+    assert first.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_last_cancelled_waiter_cancels_call():
+    """Test that the shared call is cancelled once nobody waits for it."""
+    flight = SingleFlight()
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def fetch():
+        started.set()
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    task = asyncio.create_task(flight.do("key", fetch))
+    await started.wait()
+    task.cancel()
+
+    await asyncio.wait_for(cancelled.wait(), 1)
+    await asyncio.sleep(0)
+    assert flight.stats()["in_flight"] == 0
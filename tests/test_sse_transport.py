@@ -0,0 +1,146 @@
+"""Tests for the multi-client SSE transport."""
+
+import asyncio
+import socket
+from contextlib import asynccontextmanager
+
+import httpx
+import pytest
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+
+from prometheus_mcp_server.sse_transport import SessionManager, ToolCallLimiter, create_sse_app, serve_sse
+
+
+@asynccontextmanager
+async def no_lifespan(app):
+    yield
+
+
+@pytest.mark.asyncio
+async def test_tool_call_limiter_bounds_concurrency():
+    """Test that no more than max_concurrency calls hold a slot at once."""
+    limiter = ToolCallLimiter(2)
+    running = []
+    peak = 0
+
+    async def call():
+        nonlocal peak
+        async with limiter.slot():
+            running.append(1)
+            peak = max(peak, len(running))
+            await asyncio.sleep(0.01)
+            running.pop()
+
+    await asyncio.gather(*(call() for _ in range(6)))
+
+    assert peak == 2
+    assert limiter.active == 0
+
+
+@pytest.mark.asyncio
+async def test_wait_idle_returns_when_calls_finish():
+    """Test that wait_idle waits for running calls and times out on stuck ones."""
+    limiter = ToolCallLimiter()
+    release = asyncio.Event()
+
+    async def call():
+        async with limiter.slot():
+            await release.wait()
+
+    task = asyncio.create_task(call())
+    await asyncio.sleep(0)
+    assert await limiter.wait_idle(0.01) is False
+
+    release.set()
+    assert await limiter.wait_idle(1) is True
+    await task
+
+
+def test_session_manager_admission():
+    """Test that sessions are rejected at the limit and while draining."""
+    sessions = SessionManager(max_sessions=1, drain_timeout=1, calls=ToolCallLimiter())
+
+    assert sessions.admit() is True
+    assert sessions.admit() is False
+    sessions.release()
+    sessions.draining = True
+    assert sessions.admit() is False
+
+
+@pytest.mark.asyncio
+async def test_drain_waits_for_tool_calls():
+    """Test that draining waits for running tool calls before closing sessions."""
+    calls = ToolCallLimiter()
+    sessions = SessionManager(max_sessions=0, drain_timeout=5, calls=calls)
+    release = asyncio.Event()
+    finished = []
+
+    async def call():
+        async with calls.slot():
+            await release.wait()
+            finished.append(1)
+
+    task = asyncio.create_task(call())
+    await asyncio.sleep(0)
+    drain = asyncio.create_task(sessions.drain())
+    await asyncio.sleep(0.01)
+    assert sessions.draining
+    assert not drain.done()
+
+    release.set()
+    await asyncio.wait_for(drain, 1)
+    await asyncio.wait_for(sessions.wait_drained(), 1)
+    assert finished == [1]
+    await task
+
+
+@pytest.mark.asyncio
+async def test_sse_rejected_when_at_capacity():
+    """Test that a new SSE connection gets 503 when the session limit is reached."""
+    sessions = SessionManager(max_sessions=1, drain_timeout=1, calls=ToolCallLimiter())
+    sessions.admit()
+    app = create_sse_app(lambda read, write: None, sessions, no_lifespan)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/sse")
+        health = await client.get("/healthz")
+
+    assert response.status_code == 503
+    assert "session limit" in response.text
+    assert health.status_code == 200
+    assert health.json()["sessions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_sse_clients():
+    """Test that several clients are served at the same time over one SSE server."""
+    from prometheus_mcp_server import server
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    sessions = SessionManager(max_sessions=10, drain_timeout=1, calls=ToolCallLimiter(4))
+    app = create_sse_app(server.mcp.run_session, sessions, no_lifespan)
+    serving = asyncio.create_task(serve_sse(app, sessions, "127.0.0.1", port, "warning"))
+
+    async def list_tools():
+        async with sse_client(f"http://127.0.0.1:{port}/sse") as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                return await session.list_tools()
+
+    try:
+        for _ in range(50):
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=0.1):
+                    break
+            except OSError:
+                await asyncio.sleep(0.05)
+        results = await asyncio.wait_for(asyncio.gather(*(list_tools() for _ in range(3))), 10)
+    finally:
+        serving.cancel()
+        await asyncio.gather(serving, return_exceptions=True)
+
+    assert all(any(tool.name == "execute_query" for tool in result.tools) for result in results)
@@ -0,0 +1,140 @@
+"""Tests for downsampling and summarized output modes."""
+
+import numpy as np
+import pytest
+
+from prometheus_mcp_server.summarize import (
+    downsample_matrix,
+    lttb_indices,
+    matrix_arrays,
+    matrix_stats,
+    minmax_indices,
+    summarize_result,
+)
+
+
+def make_matrix(*series_values):
+    """Build a matrix result with one series per list of values."""
+    return [
+        {"metric": {"instance": f"host-{i}"}, "values": [[1700000000 + 15 * j, str(v)] for j, v in enumerate(values)]}
+        for i, values in enumerate(series_values)
+    ]
+
+
+def test_matrix_arrays_pads_ragged_series():
+    """Test that series of different lengths are padded with NaN."""
+    values, lengths = matrix_arrays(make_matrix([1, 2, 3], [4]))
+
+    assert lengths.tolist() == [3, 1]
+    assert values[0].tolist() == [1.0, 2.0, 3.0]
+    assert values[1, 0] == 4.0
+    assert np.isnan(values[1, 1:]).all()
+
+
+def test_matrix_stats():
+    """Test per-series statistics including NaN samples."""
+    values, lengths = matrix_arrays(make_matrix([1, 2, 3, "NaN"], [5, 7]))
+    stats = matrix_stats(values, lengths)
+
+    assert stats["min"].tolist() == [1.0, 5.0]
+    assert stats["max"].tolist() == [3.0, 7.0]
+    assert stats["avg"].tolist() == [2.0, 6.0]
+    assert np.isnan(stats["last"][0])
+    assert stats["last"][1] == 7.0
+    assert stats["count"].tolist() == [3, 2]
+
+
+def test_lttb_keeps_endpoints_and_peaks():
+    """Test that LTTB keeps the first and last samples and the extreme spike."""
+    timestamps = np.arange(1000, dtype=np.float64)
+    values = np.zeros(1000)
+    values[500] = 100.0
+
+    indices = lttb_indices(timestamps, values, 20)
+
+    assert len(indices) == 20
+    assert indices[0] == 0
+    assert indices[-1] == 999
+    assert 500 in indices.tolist()
+    assert (np.diff(indices) > 0).all()
+
+
+def test_minmax_keeps_extremes():
+    """Test that min-max downsampling keeps each bucket's extremes."""
+    values = np.sin(np.linspace(0, 20, 1000))
+    values[123] = -5.0
+    values[456] = 5.0
+
+    indices = minmax_indices(values, 50)
+
+    assert len(indices) <= 50
+    assert 123 in indices.tolist()
+    assert 456 in indices.tolist()
+
+
+def test_downsample_matrix_limits_points():
+    """Test that downsampled series keep original samples and respect max_points."""
+    matrix = make_matrix(list(range(500)), [1, 2])
+
+    downsampled = downsample_matrix(matrix, 50, "lttb")
+
+    assert len(downsampled[0]["values"]) == 50
+    assert downsampled[0]["values"][0] == matrix[0]["values"][0]
+    assert downsampled[1] is matrix[1]
+
+
+def test_summarize_stats_mode():
+    """Test that stats mode replaces samples with per-series statistics."""
+    data = {"resultType": "matrix", "result": make_matrix([1, 2, 3], [10, 20])}
+
+    summary = summarize_result(data, output="stats")
+
+    assert summary["output"] == "stats"
+    assert summary["seriesCount"] == 2
+    assert summary["result"][1]["stats"]["max"] == 20.0
+    assert "values" not in summary["result"][0]
+
+
+def test_summarize_topk_mode():
+    """Test that topk mode returns the series ranked by the chosen statistic."""
+    data = {"resultType": "matrix", "result": make_matrix([1, 1], [9, 9], [5, 5])}
+
+    summary = summarize_result(data, output="topk", topk=2, stat="max")
+
+    assert [series["metric"]["instance"] for series in summary["result"]] == ["host-1", "host-2"]
+    assert summary["result"][0]["stats"]["max"] == 9.0
+
+
+def test_summarize_vector_modes():
+    """Test topk and stats output for instant vectors."""
+    result = [
+        {"metric": {"instance": "a"}, "value": [1700000000, "3"]},
+        {"metric": {"instance": "b"}, "value": [1700000000, "7"]},
+    ]
+    data = {"resultType": "vector", "result": result}
+
+    assert summarize_result(data, output="topk", topk=1)["result"] == [result[1]]
+    assert summarize_result(data, output="stats")["result"]["stats"]["avg"] == 5.0
+
+
+def test_summarize_raw_and_scalar_untouched():
+    """Test that raw output and scalar results are returned unchanged."""
+    scalar = {"resultType": "scalar", "result": [1700000000, "1"]}
+
+    assert summarize_result(scalar, output="stats") == scalar
+    assert summarize_result({"resultType": "vector", "result": []}) == {"resultType": "vector", "result": []}
+
+
+@pytest.mark.parametrize("options", [
+    {"output": "everything"},
+    {"output": "downsample", "method": "random"},
+    {"output": "topk", "stat": "median"},
+    {"output": "topk", "topk": 0},
+    {"output": "topk", "topk": -2},
+    {"output": "downsample", "max_points": 1},
+    {"output": "downsample", "max_points": -5},
+])
+def test_summarize_invalid_options(options):
+    """Test that unknown output options and out-of-range limits are rejected."""
+    with pytest.raises(ValueError):
+        summarize_result({"resultType": "matrix", "result": []}, **options)
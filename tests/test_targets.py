@@ -0,0 +1,43 @@
+"""Tests for scrape target filtering, projection and pagination."""
+
+import pytest
+
+from prometheus_mcp_server.targets import filter_targets, paginate, project, target_job
+
+
+def test_target_job_falls_back_to_scrape_pool():
+    """Test that targets without a job label are grouped by scrape pool or discovered job."""
+    assert target_job({"labels": {"job": "node"}, "scrapePool": "pool"}) == "node"
+    assert target_job({"labels": {}, "scrapePool": "pool"}) == "pool"
+    assert target_job({"discoveredLabels": {"job": "api"}}) == "api"
+
+
+def test_filter_targets_by_health():
+    """Test that dropped targets, which have no health, never match a health filter."""
+    targets = [{"health": "up"}, {"health": "down"}, {"discoveredLabels": {}}]
+
+    assert filter_targets(targets, health="down") == [{"health": "down"}]
+    assert filter_targets(targets) is targets
+
+
+def test_project_skips_missing_fields():
+    """Test that projection copies only present fields and labels."""
+    target = {"health": "up", "labels": {"instance": "a"}, "discoveredLabels": {"__address__": "a"}}
+
+    assert project(target, ["health", "labels.instance", "labels.missing", "lastError"]) == {
+        "health": "up",
+        "labels": {"instance": "a"},
+    }
+
+
+@pytest.mark.parametrize("limit, cursor, message", [
+    (0, None, "limit must be at least 1"),
+    (-3, None, "limit must be at least 1"),
+    (10, "-1", "Invalid cursor: '-1'"),
+    (10, "abc", "Invalid cursor: 'abc'"),
+    (None, "1.5", "Invalid cursor: '1.5'"),
+])
+def test_paginate_rejects_invalid_limit_and_cursor(limit, cursor, message):
+    """Test that pages need a positive limit and a cursor that is a non-negative offset."""
+    with pytest.raises(ValueError, match=message):
+        paginate([], [], limit, cursor)
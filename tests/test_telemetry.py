@@ -0,0 +1,96 @@
+"""Tests for the server's own metrics."""
+
+import httpx
+import pytest
+
+from prometheus_mcp_server.telemetry import Registry, cache_metrics, serve_metrics
+
+
+def test_render_counter_and_gauge():
+    """Test the text exposition of counters and gauges with labels."""
+    registry = Registry()
+    counter = registry.counter("requests_total", "Requests", ("endpoint",))
+    gauge = registry.gauge("in_flight", "In flight")
+
+    counter.inc(("query",))
+    counter.inc(("query",), 2)
+    counter.inc(('say "hi"',))
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+
+    text = registry.render()
+
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{endpoint="query"} 3' in text
+    assert 'requests_total{endpoint="say \\"hi\\""} 1' in text
+    assert "in_flight 1" in text
+
+
+@pytest.mark.parametrize("value, rendered", [
+    (float("inf"), "+Inf"),
+    (float("-inf"), "-Inf"),
+    (float("nan"), "NaN"),
+    (2.0, "2"),
+    (0.25, "0.25"),
+])
+def test_render_non_finite_values(value, rendered):
+    """Test that infinite and NaN gauge values render instead of breaking the scrape."""
+    registry = Registry()
+    registry.gauge("level", "Level").set(value)
+
+    assert f"level {rendered}" in registry.render()
+
+
+def test_render_histogram_buckets_are_cumulative():
+    """Test that histogram buckets, sum and count are rendered cumulatively."""
+    registry = Registry()
+    histogram = registry.histogram("latency_seconds", "Latency", ("tool",), buckets=(0.1, 1.0))
+
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, ("query",))
+
+    lines = registry.render().splitlines()
+
+    assert 'latency_seconds_bucket{tool="query",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{tool="query",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{tool="query",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{tool="query"} 4.25' in lines
+    assert 'latency_seconds_count{tool="query"} 4' in lines
+
+
+def test_cache_metrics_from_stats():
+    """Test that cache statistics become counters and occupancy gauges at render time."""
+    registry = Registry()
+    registry.add_collector(lambda: cache_metrics({
+        "result": lambda: {"hits": 4, "misses": 1, "entries": 2, "bytes": 100},
+        "metadata": lambda: {"hits": 7, "age_seconds": None},
+    }))
+
+    text = registry.render()
+
+    assert 'prometheus_mcp_cache_hits_total{cache="result"} 4' in text
+    assert 'prometheus_mcp_cache_hits_total{cache="metadata"} 7' in text
+    assert 'prometheus_mcp_cache_entries{cache="result"} 2' in text
+    assert "age_seconds" not in text
+
+
+@pytest.mark.asyncio
+async def test_serve_metrics():
+    """Test that the registry is served at /metrics and other paths are not found."""
+    registry = Registry()
+    registry.counter("up_total", "Up").inc()
+    server = await serve_metrics(registry, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        async with httpx.AsyncClient() as client:
+            response = await client.get(f"http://127.0.0.1:{port}/metrics")
+            missing = await client.get(f"http://127.0.0.1:{port}/other")
+    finally:
+        server.close()
+        await server.wait_closed()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "up_total 1" in response.text
+    assert missing.status_code == 404
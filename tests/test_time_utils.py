@@ -0,0 +1,52 @@
+"""Tests for Prometheus timestamp and duration helpers."""
+
+import pytest
+
+from prometheus_mcp_server.time_utils import align_range, format_timestamp, parse_duration, parse_timestamp
+
+
+def test_parse_timestamp_formats():
+    """Test parsing of Unix and RFC3339 timestamps."""
+    assert parse_timestamp("1700000000") == 1700000000.0
+    assert parse_timestamp("1700000000.5") == 1700000000.5
+    assert parse_timestamp("2023-01-01T00:00:00Z") == 1672531200.0
+    assert parse_timestamp("2023-01-01T01:00:00+01:00") == 1672531200.0
+
+
+def test_parse_timestamp_invalid():
+    """Test that invalid timestamps raise ValueError."""
+    with pytest.raises(ValueError):
+        parse_timestamp("yesterday")
+
+
+@pytest.mark.parametrize("value,expected", [
+    ("15s", 15),
+    ("1m", 60),
+    ("1h30m", 5400),
+    ("500ms", 0.5),
+    ("1d", 86400),
+    ("30", 30),
+    ("2.5", 2.5),
+])
+def test_parse_duration(value, expected):
+    """Test parsing of Prometheus durations and float seconds."""
+    assert parse_duration(value) == expected
+
+
+@pytest.mark.parametrize("value", ["", "abc", "0", "-5", "1x"])
+def test_parse_duration_invalid(value):
+    """Test that invalid durations raise ValueError."""
+    with pytest.raises(ValueError):
+        parse_duration(value)
+
+
+def test_align_range():
+    """Test that start and end are aligned down to the step."""
+    assert align_range("1700000003", "1700000063", "15s") == (1699999995.0, 1700000055.0, 15.0)
+    assert align_range("now", "1700000063", "15s") is None
+
+
+def test_format_timestamp():
+    """Test that timestamps are formatted without float noise."""
+    assert format_timestamp(1700000000.0) == "1700000000"
+    assert format_timestamp(1700000000.25) == "1700000000.25"
@@ -1,8 +1,32 @@
 """Tests for the MCP tools functionality."""
 
+import time
+
 import pytest
-from unittest.mock import patch, MagicMock
-from prometheus_mcp_server.server import execute_query, execute_range_query, list_metrics, get_metric_metadata, get_targets
+from unittest.mock import patch
+from prometheus_mcp_server import server
+from prometheus_mcp_server.backends import Backend
+from prometheus_mcp_server.disk_cache import DiskCache
+from prometheus_mcp_server.server import execute_query, execute_queries, execute_range_query, list_metrics, get_metric_metadata, get_metrics_metadata, get_targets, get_cache_stats, list_backends, analyze_cardinality, search_metrics, get_rules, get_alerts, watch_query, get_watch_updates, unwatch_query, config, result_cache, range_cache, metric_index, metadata_cache, cardinality_cache, rule_cache, watch_registry
+
+@pytest.fixture(autouse=True)
+def clear_result_cache():
+    """Start every test with empty query caches, metric index, metadata, cardinality and rule caches, and no watches."""
+    result_cache.clear()
+    range_cache.clear()
+    metric_index.clear()
+    metadata_cache.clear()
+    cardinality_cache.clear()
+    rule_cache.clear()
+    watch_registry.clear()
+    yield
+    result_cache.clear()
+    range_cache.clear()
+    metric_index.clear()
+    metadata_cache.clear()
+    cardinality_cache.clear()
+    rule_cache.clear()
+    watch_registry.clear()
 
 @pytest.fixture
 def mock_make_request():
@@ -23,10 +47,41 @@ async def test_execute_query(mock_make_request):
     result = await execute_query("up")
 
     # Verify
-    mock_make_request.assert_called_once_with("query", params={"query": "up"})
+    mock_make_request.assert_called_once_with("query", params={"query": "up"}, backend=None)
     assert result["resultType"] == "vector"
     assert len(result["result"]) == 1
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize("data", [
+    {"resultType": "scalar", "result": [1617898448.214, "42"]},
+    {"resultType": "string", "result": [1617898448.214, "hello"]},
+])
+async def test_execute_query_scalar_and_string_results(mock_make_request, data):
+    """Test that scalar and string results are returned and counted as one series and one sample."""
+    # Setup
+    mock_make_request.return_value = data
+    samples = server.result_samples.count(("execute_query",))
+
+    # Execute
+    result = await execute_query("scalar(up)")
+
+    # Verify
+    assert result == data
+    assert server.result_samples.count(("execute_query",)) == samples + 1
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("options, message", [
+    ({"output": "topk", "topk": 0}, "Invalid topk 0"),
+    ({"output": "topk", "topk": -2}, "Invalid topk -2"),
+    ({"output": "downsample", "max_points": 1}, "Invalid max_points 1"),
+])
+async def test_execute_query_rejects_invalid_output_limits(mock_make_request, options, message):
+    """Test that topk and max_points out of range are rejected before the query is sent."""
+    # Execute / Verify
+    with pytest.raises(ValueError, match=message):
+        await execute_query("up", **options)
+    mock_make_request.assert_not_called()
+
 @pytest.mark.asyncio
 async def test_execute_query_with_time(mock_make_request):
     """Test the execute_query tool with a specified time."""
@@ -40,7 +95,7 @@ async def test_execute_query_with_time(mock_make_request):
     result = await execute_query("up", time="2023-01-01T00:00:00Z")
 
     # Verify
-    mock_make_request.assert_called_once_with("query", params={"query": "up", "time": "2023-01-01T00:00:00Z"})
+    mock_make_request.assert_called_once_with("query", params={"query": "up", "time": "2023-01-01T00:00:00Z"}, backend=None)
     assert result["resultType"] == "vector"
 
 @pytest.mark.asyncio
@@ -52,8 +107,8 @@ async def test_execute_range_query(mock_make_request):
         "result": [{
             "metric": {"__name__": "up"},
             "values": [
-                [1617898400, "1"],
-                [1617898415, "1"]
+                [1672531200, "1"],
+                [1672531215, "1"]
             ]
         }]
     }
@@ -72,11 +127,323 @@ async def test_execute_range_query(mock_make_request):
         "start": "2023-01-01T00:00:00Z",
         "end": "2023-01-01T01:00:00Z",
         "step": "15s"
-    })
+    }, backend=None)
     assert result["resultType"] == "matrix"
     assert len(result["result"]) == 1
     assert len(result["result"][0]["values"]) == 2
 
+@pytest.fixture
+def named_backends():
+    """Configure two named backends besides the default one."""
+    backends = {
+        "eu": Backend(name="eu", url="http://eu-a:9090,http://eu-b:9090"),
+        "us": Backend(name="us", url="http://us:9090", org_id="tenant-1"),
+    }
+    with patch.object(config, "url", "http://test:9090"), patch.object(config, "backends", backends):
+        yield backends
+
+@pytest.mark.asyncio
+async def test_execute_query_all_backends(mock_make_request, named_backends):
+    """Test that backend='all' fans out to every backend and labels merged series."""
+    # Setup
+    def respond(endpoint, params=None, backend=None):
+        if backend == "us":
+            raise ValueError("Prometheus API error: unavailable")
+        return {"resultType": "vector", "result": [{"metric": {"__name__": "up"}, "value": [1617898448.214, "1"]}]}
+    mock_make_request.side_effect = respond
+
+    # Execute
+    result = await execute_query("up", backend="all")
+
+    # Verify
+    assert {call.kwargs["backend"] for call in mock_make_request.call_args_list} == {None, "eu", "us"}
+    assert [series["metric"]["backend"] for series in result["result"]] == ["default", "eu"]
+    assert result["failedBackends"] == {"us": "Prometheus API error: unavailable"}
+
+@pytest.mark.asyncio
+async def test_execute_query_named_backend_uses_own_cache_key(mock_make_request, named_backends):
+    """Test that the same query on different backends is cached separately."""
+    # Setup
+    mock_make_request.return_value = {"resultType": "vector", "result": []}
+
+    # Execute
+    await execute_query("up", time="1700000000")
+    await execute_query("up", time="1700000000", backend="eu")
+    await execute_query("up", time="1700000000", backend="eu")
+
+    # Verify
+    assert [call.kwargs["backend"] for call in mock_make_request.call_args_list] == [None, "eu"]
+
+@pytest.mark.asyncio
+async def test_execute_query_unknown_backend():
+    """Test that an unknown backend name is rejected."""
+    with pytest.raises(ValueError, match="Unknown backend"):
+        await execute_query("up", backend="mars")
+
+@pytest.mark.asyncio
+async def test_execute_query_projects_labels_and_limits_series(mock_make_request):
+    """Test that keep_labels, sort and limit shrink the result and report the truncation."""
+    # Setup
+    mock_make_request.return_value = {
+        "resultType": "vector",
+        "result": [
+            {"metric": {"__name__": "up", "job": "node", "instance": f"host-{i}"}, "value": [1617898448.214, str(i)]}
+            for i in range(5)
+        ]
+    }
+
+    # Execute
+    result = await execute_query("up", keep_labels=["instance"], sort="desc", limit=2)
+    cached = await execute_query("up")
+
+    # Verify
+    assert result["result"] == [
+        {"metric": {"instance": "host-4"}, "value": [1617898448.214, "4"]},
+        {"metric": {"instance": "host-3"}, "value": [1617898448.214, "3"]},
+    ]
+    assert result["truncated"]["totalSeries"] == 5
+    assert len(cached["result"]) == 5
+    assert cached["result"][0]["metric"]["job"] == "node"
+    assert "truncated" not in cached
+
+@pytest.mark.asyncio
+async def test_execute_range_query_sample_limit(mock_make_request):
+    """Test that sample_limit caps the samples of a range query result."""
+    # Setup
+    mock_make_request.return_value = {
+        "resultType": "matrix",
+        "result": [
+            {"metric": {"instance": f"host-{i}"}, "values": [[1672531200 + 15 * j, "1"] for j in range(4)]}
+            for i in range(3)
+        ]
+    }
+
+    # Execute
+    result = await execute_range_query("up", start="1672531200", end="1672531245", step="15s",
+                                       sample_limit=6, output="stats")
+
+    # Verify
+    assert [series["stats"]["count"] for series in result["result"]] == [4, 2]
+    assert result["truncated"] == {"returnedSeries": 2, "totalSeries": 3, "returnedSamples": 6, "totalSamples": 12}
+
+@pytest.mark.asyncio
+async def test_execute_query_keep_labels_all_backends_keeps_backend_label(mock_make_request, named_backends):
+    """Test that merged results keep the backend label when labels are projected."""
+    # Setup
+    mock_make_request.return_value = {
+        "resultType": "vector", "result": [{"metric": {"__name__": "up", "job": "node"}, "value": [1617898448.214, "1"]}]
+    }
+
+    # Execute
+    result = await execute_query("up", keep_labels=["job"], backend="all")
+
+    # Verify
+    assert {series["metric"]["backend"] for series in result["result"]} == {"default", "eu", "us"}
+    assert all(set(series["metric"]) == {"job", "backend"} for series in result["result"])
+
+@pytest.mark.asyncio
+async def test_execute_query_rejects_invalid_projection(mock_make_request):
+    """Test that invalid projection options fail before a query is sent."""
+    with pytest.raises(ValueError, match="cannot be combined"):
+        await execute_query("up", keep_labels=["job"], drop_labels=["instance"])
+    mock_make_request.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_list_backends(named_backends):
+    """Test listing backends with their replicas."""
+    # Execute
+    result = await list_backends()
+
+    # Verify
+    assert [backend["name"] for backend in result] == ["default", "eu", "us"]
+    assert [replica["url"] for replica in result[1]["replicas"]] == ["http://eu-a:9090", "http://eu-b:9090"]
+    assert result[2]["orgId"] == "tenant-1"
+
+@pytest.mark.asyncio
+async def test_analyze_cardinality_overview(mock_make_request):
+    """Test the TSDB overview without a selector."""
+    # Setup
+    mock_make_request.return_value = {
+        "headStats": {"numSeries": 42},
+        "seriesCountByMetricName": [{"name": "up", "value": 42}],
+    }
+
+    # Execute
+    result = await analyze_cardinality()
+
+    # Verify
+    mock_make_request.assert_called_once_with("status/tsdb", params={"limit": 50}, backend=None)
+    assert result["totalSeries"] == 42
+    assert result["topMetrics"] == [{"metric": "up", "series": 42}]
+
+@pytest.mark.asyncio
+async def test_analyze_cardinality_selector(mock_make_request):
+    """Test the series analysis of a selector."""
+    # Setup
+    mock_make_request.return_value = [
+        {"__name__": "up", "job": "node", "instance": "a"},
+        {"__name__": "up", "job": "node", "instance": "b"},
+    ]
+
+    # Execute
+    result = await analyze_cardinality(selector='up{job="node"}', start="1617898400", end="1617898448", topk=1)
+
+    # Verify
+    endpoint, = mock_make_request.call_args.args
+    params = mock_make_request.call_args.kwargs["params"]
+    assert endpoint == "series"
+    assert (params["start"], params["end"]) == ("1617898400", "1617898448")
+    assert result["series"] == 2
+    assert result["labels"] == [{"label": "instance", "values": 2, "topValues": [{"value": "a", "series": 1}]}]
+
+@pytest.mark.asyncio
+async def test_analyze_cardinality_label(mock_make_request):
+    """Test counting the values of a label on the series matching a selector."""
+    # Setup
+    mock_make_request.return_value = ["a", "b", "c"]
+
+    # Execute
+    result = await analyze_cardinality(selector="up", label="instance", topk=2)
+
+    # Verify
+    mock_make_request.assert_called_once_with("label/instance/values", params={"match[]": "up"}, backend=None)
+    assert result == {"label": "instance", "selector": "up", "values": 3, "sampleValues": ["a", "b"]}
+
+@pytest.mark.asyncio
+async def test_analyze_cardinality_rejects_all_backends():
+    """Test that cardinality cannot be analyzed across all backends at once."""
+    with pytest.raises(ValueError, match="single backend"):
+        await analyze_cardinality(backend="all")
+
+@pytest.fixture
+def query_budget():
+    """Enable the pre-flight check with a budget of 10000 samples."""
+    with patch.object(config, "query_max_samples", 10000), patch.object(config, "query_guard", "adjust"):
+        yield
+
+def respond_with_cardinality(endpoint, params=None, backend=None):
+    if endpoint == "status/tsdb":
+        return {"headStats": {"numSeries": 5000}, "seriesCountByMetricName": [{"name": "up", "value": 100}]}
+    if endpoint == "series":
+        return [{"__name__": "up", "instance": str(i)} for i in range(100)]
+    return {"resultType": "matrix", "result": []}
+
+@pytest.mark.asyncio
+async def test_execute_range_query_step_widened_over_budget(mock_make_request, query_budget):
+    """Test that a range query over its sample budget runs with a wider step."""
+    # Setup
+    mock_make_request.side_effect = respond_with_cardinality
+
+    # Execute: 100 series * 3601 evaluations at a 1s step
+    result = await execute_range_query("up", start="0", end="3600", step="1s", use_cache=False)
+
+    # Verify
+    query_call = mock_make_request.call_args_list[-1]
+    assert query_call.args[0] == "query_range"
+    assert query_call.kwargs["params"]["step"] == "60s"
+    assert result["preflight"] == {"step": {"requested": "1s", "used": "60s"}, "evaluations": 61}
+
+@pytest.mark.asyncio
+async def test_execute_query_rejected_over_budget(mock_make_request, query_budget):
+    """Test that an instant query over its sample budget never reaches Prometheus."""
+    # Setup
+    mock_make_request.side_effect = respond_with_cardinality
+
+    # Execute: 100 series * 240 samples in 1h at a 15s scrape interval
+    with pytest.raises(ValueError, match="over the budget of 10000"):
+        await execute_query("rate(up[1h])", use_cache=False)
+
+    # Verify
+    assert "query" not in [call.args[0] for call in mock_make_request.call_args_list]
+
+@pytest.mark.asyncio
+async def test_execute_query_within_budget_uses_cached_status(mock_make_request, query_budget):
+    """Test that a query within budget only costs the cached TSDB status request."""
+    # Setup
+    mock_make_request.side_effect = respond_with_cardinality
+
+    # Execute
+    await execute_query("up", use_cache=False)
+    await execute_query("up", use_cache=False)
+
+    # Verify
+    endpoints = [call.args[0] for call in mock_make_request.call_args_list]
+    assert endpoints == ["status/tsdb", "query", "query"]
+
+@pytest.mark.asyncio
+async def test_preflight_default_backend_name_shares_cached_status(mock_make_request, query_budget):
+    """Test that backend='default' and no backend share the default backend's cached TSDB status."""
+    # Setup
+    mock_make_request.side_effect = respond_with_cardinality
+
+    # Execute
+    await execute_query("up", use_cache=False)
+    await execute_query("up", use_cache=False, backend="default")
+
+    # Verify
+    status_calls = [call for call in mock_make_request.call_args_list if call.args[0] == "status/tsdb"]
+    assert len(status_calls) == 1
+    assert status_calls[0].kwargs["backend"] is None
+
+@pytest.mark.asyncio
+async def test_preflight_applies_named_backend_budget(mock_make_request, named_backends):
+    """Test that a named backend's own sample budget rejects queries over it."""
+    # Setup
+    mock_make_request.side_effect = respond_with_cardinality
+    named_backends["eu"].max_samples = 10
+
+    # Execute / Verify
+    with pytest.raises(ValueError, match="over the budget of 10"):
+        await execute_query("up", use_cache=False, backend="eu")
+
+@pytest.mark.asyncio
+async def test_execute_queries(mock_make_request):
+    """Test that a batch runs each distinct query once and reports per-query errors."""
+    # Setup
+    def respond(endpoint, params=None, backend=None):
+        if params["query"] == "bad(":
+            raise ValueError("Prometheus API error: parse error")
+        return {"resultType": "vector", "result": [{"metric": {}, "value": [1617898448.214, "1"]}]}
+    mock_make_request.side_effect = respond
+
+    # Execute
+    result = await execute_queries(["up", "bad(", "up"], time="1617898448", use_cache=False)
+
+    # Verify
+    assert mock_make_request.call_count == 2
+    assert list(result["results"]) == ["up", "bad("]
+    assert result["results"]["up"]["status"] == "success"
+    assert result["results"]["up"]["data"]["resultType"] == "vector"
+    assert result["results"]["bad("] == {
+        "status": "error",
+        "error": "Prometheus API error: parse error",
+        "errorType": "ValueError",
+        "durationMs": result["results"]["bad("]["durationMs"],
+    }
+    assert result["durationMs"] >= 0
+
+@pytest.mark.asyncio
+async def test_execute_queries_range(mock_make_request):
+    """Test that a batch with start, end and step runs range queries."""
+    # Setup
+    mock_make_request.return_value = {"resultType": "matrix", "result": []}
+
+    # Execute
+    result = await execute_queries(
+        ["up", "rate(http_requests_total[5m])"],
+        start="2023-01-01T00:00:00Z", end="2023-01-01T01:00:00Z", step="15s", use_cache=False,
+    )
+
+    # Verify
+    assert {call.args[0] for call in mock_make_request.call_args_list} == {"query_range"}
+    assert all(outcome["status"] == "success" for outcome in result["results"].values())
+
+@pytest.mark.asyncio
+async def test_execute_queries_incomplete_range():
+    """Test that partial range parameters are rejected."""
+    with pytest.raises(ValueError):
+        await execute_queries(["up"], start="2023-01-01T00:00:00Z")
+
 @pytest.mark.asyncio
 async def test_list_metrics(mock_make_request):
     """Test the list_metrics tool."""
@@ -94,18 +461,38 @@ async def test_list_metrics(mock_make_request):
 async def test_get_metric_metadata(mock_make_request):
     """Test the get_metric_metadata tool."""
     # Setup
-    mock_make_request.return_value = {"metadata": [
-        {"metric": "up", "type": "gauge", "help": "Up indicates if the scrape was successful", "unit": ""}
+    mock_make_request.return_value = {"up": [
+        {"type": "gauge", "help": "Up indicates if the scrape was successful", "unit": ""}
     ]}
 
     # Execute
     result = await get_metric_metadata("up")
+    missing = await get_metric_metadata("not_a_metric")
 
     # Verify
-    mock_make_request.assert_called_once_with("metadata", params={"metric": "up"})
+    mock_make_request.assert_called_once_with("metadata")
     assert len(result) == 1
-    assert result[0]["metric"] == "up"
     assert result[0]["type"] == "gauge"
+    assert missing == []
+
+@pytest.mark.asyncio
+async def test_get_metrics_metadata(mock_make_request):
+    """Test that batch metadata lookups are answered from one bulk request."""
+    # Setup
+    mock_make_request.return_value = {
+        "up": [{"type": "gauge", "help": "Scrape health", "unit": ""}],
+        "http_requests_total": [{"type": "counter", "help": "Total HTTP requests", "unit": ""}],
+    }
+
+    # Execute
+    first = await get_metrics_metadata(["up", "http_requests_total", "missing"])
+    second = await get_metrics_metadata(["up"])
+
+    # Verify
+    mock_make_request.assert_called_once_with("metadata")
+    assert first["http_requests_total"][0]["type"] == "counter"
+    assert first["missing"] == []
+    assert second == {"up": [{"type": "gauge", "help": "Scrape health", "unit": ""}]}
 
 @pytest.mark.asyncio
 async def test_get_targets(mock_make_request):
@@ -122,7 +509,522 @@ async def test_get_targets(mock_make_request):
     result = await get_targets()
 
     # Verify
-    mock_make_request.assert_called_once_with("targets")
+    mock_make_request.assert_called_once_with("targets", params=None, backend=None)
     assert len(result["activeTargets"]) == 1
     assert result["activeTargets"][0]["health"] == "up"
     assert len(result["droppedTargets"]) == 0
+
+TARGETS = {
+    "activeTargets": [
+        {"labels": {"job": "node", "instance": "a:9100"}, "scrapeUrl": "http://a:9100/metrics", "health": "up",
+         "lastError": "", "discoveredLabels": {"__address__": "a:9100"}},
+        {"labels": {"job": "node", "instance": "b:9100"}, "scrapeUrl": "http://b:9100/metrics", "health": "down",
+         "lastError": "connection refused", "discoveredLabels": {"__address__": "b:9100"}},
+        {"labels": {"job": "api", "instance": "c:80"}, "scrapeUrl": "http://c:80/metrics", "health": "up",
+         "lastError": "", "discoveredLabels": {"__address__": "c:80"}},
+    ],
+    "droppedTargets": [{"discoveredLabels": {"__address__": "d:80", "job": "api"}}],
+}
+
+@pytest.mark.asyncio
+async def test_get_targets_state_filters_and_projection(mock_make_request):
+    """Test that the state is passed to Prometheus and targets are filtered and projected."""
+    # Setup
+    mock_make_request.return_value = {"activeTargets": TARGETS["activeTargets"], "droppedTargets": []}
+
+    # Execute
+    result = await get_targets(state="active", job="node", fields=["scrapeUrl", "health", "labels.instance"])
+
+    # Verify
+    mock_make_request.assert_called_once_with("targets", params={"state": "active"}, backend=None)
+    assert result == {
+        "activeTargets": [
+            {"scrapeUrl": "http://a:9100/metrics", "health": "up", "labels": {"instance": "a:9100"}},
+            {"scrapeUrl": "http://b:9100/metrics", "health": "down", "labels": {"instance": "b:9100"}},
+        ],
+        "droppedTargets": [],
+    }
+
+@pytest.mark.asyncio
+async def test_get_targets_pagination(mock_make_request):
+    """Test that pages run through active then dropped targets from one cached response."""
+    # Setup
+    mock_make_request.return_value = TARGETS
+
+    # Execute
+    first = await get_targets(limit=2)
+    second = await get_targets(limit=2, cursor=first["nextCursor"])
+
+    # Verify
+    mock_make_request.assert_called_once()
+    assert len(first["activeTargets"]) == 2
+    assert first["total"] == {"active": 3, "dropped": 1}
+    assert first["nextCursor"] == "2"
+    assert [target["labels"]["job"] for target in second["activeTargets"]] == ["api"]
+    assert second["droppedTargets"] == TARGETS["droppedTargets"]
+    assert second["nextCursor"] is None
+
+@pytest.mark.asyncio
+async def test_get_targets_rejects_malformed_cursor(mock_make_request):
+    """Test that a cursor that is not an offset gives a clear error."""
+    # Setup
+    mock_make_request.return_value = TARGETS
+
+    # Execute / Verify
+    with pytest.raises(ValueError, match="Invalid cursor: 'abc'"):
+        await get_targets(limit=2, cursor="abc")
+
+@pytest.mark.asyncio
+async def test_get_targets_summary(mock_make_request):
+    """Test that summary mode counts targets per job and health and lists only the unhealthy ones."""
+    # Setup
+    mock_make_request.return_value = TARGETS
+
+    # Execute
+    result = await get_targets(summary=True)
+
+    # Verify
+    assert result["total"] == {"up": 2, "down": 1, "unknown": 0, "active": 3, "dropped": 1}
+    assert result["jobs"] == [{"job": "api", "up": 1, "down": 0, "unknown": 0},
+                              {"job": "node", "up": 1, "down": 1, "unknown": 0}]
+    assert result["unhealthy"] == [{"scrapeUrl": "http://b:9100/metrics", "labels": {"instance": "b:9100"},
+                                    "health": "down", "lastError": "connection refused"}]
+    assert result["unhealthyTruncated"] is False
+
+@pytest.mark.asyncio
+async def test_get_targets_invalid_state():
+    """Test that an unknown state is rejected."""
+    with pytest.raises(ValueError, match="Invalid state"):
+        await get_targets(state="up")
+
+RULES_RESPONSE = {
+    "groups": [
+        {
+            "name": "http",
+            "file": "http.yml",
+            "interval": 30,
+            "rules": [
+                {"type": "recording", "name": "job:http_errors:rate5m", "health": "ok",
+                 "query": 'sum by (job) (rate(http_requests_total{code=~"5.."}[5m]))'},
+                {"type": "alerting", "name": "HighErrorRate", "health": "ok", "state": "pending",
+                 "query": "job:http_errors:rate5m > 1", "alerts": [{"state": "pending"}]},
+            ],
+        }
+    ]
+}
+
+@pytest.mark.asyncio
+async def test_get_rules(mock_make_request):
+    """Test listing rules from the cached rule index."""
+    # Setup
+    mock_make_request.return_value = RULES_RESPONSE
+
+    # Execute
+    recording = await get_rules(rule_type="recording")
+    alerting = await get_rules(state="pending", limit=1)
+
+    # Verify
+    mock_make_request.assert_called_once_with("rules", backend=None)
+    assert [rule["name"] for rule in recording["rules"]] == ["job:http_errors:rate5m"]
+    assert alerting["rules"][0]["alertCount"] == 1
+    assert "alerts" not in alerting["rules"][0]
+    assert alerting["total"] == 1
+    assert alerting["nextCursor"] is None
+
+@pytest.mark.asyncio
+async def test_get_rules_invalid_type():
+    """Test that an unknown rule type is rejected."""
+    with pytest.raises(ValueError, match="Invalid rule type"):
+        await get_rules(rule_type="alert")
+
+@pytest.mark.asyncio
+async def test_get_alerts(mock_make_request):
+    """Test filtering active alerts and counting them by state."""
+    # Setup
+    mock_make_request.return_value = {"alerts": [
+        {"labels": {"alertname": "InstanceDown", "severity": "critical"}, "state": "firing"},
+        {"labels": {"alertname": "InstanceDown", "severity": "warning"}, "state": "pending"},
+        {"labels": {"alertname": "DiskFull", "severity": "critical"}, "state": "firing"},
+    ]}
+
+    # Execute
+    result = await get_alerts(labels={"severity": "critical"}, limit=1)
+    cached = await get_alerts(name="InstanceDown")
+
+    # Verify
+    mock_make_request.assert_called_once_with("alerts", params=None, backend=None)
+    assert result["total"] == 2
+    assert result["firing"] == 2
+    assert len(result["alerts"]) == 1
+    assert cached["firing"] == 1
+    assert cached["pending"] == 1
+
+@pytest.mark.asyncio
+async def test_execute_query_rewritten_to_recording_rule(mock_make_request):
+    """Test that a query matching a recording rule's expression queries the recorded series."""
+    # Setup
+    def respond(endpoint, params=None, backend=None):
+        if endpoint == "rules":
+            return RULES_RESPONSE
+        return {"resultType": "vector", "result": [{"metric": {"job": "api"}, "value": [1617898448.214, "0.5"]}]}
+    mock_make_request.side_effect = respond
+
+    # Execute
+    with patch.object(config, "query_rewrite", True):
+        result = await execute_query('sum(rate(http_requests_total{code=~"5.."}[5m])) by (job)')
+    original = await execute_query('sum(rate(http_requests_total{code=~"5.."}[5m])) by (job)')
+
+    # Verify
+    assert mock_make_request.call_args_list[1].kwargs["params"] == {"query": "job:http_errors:rate5m"}
+    assert result["rewrite"]["recordingRule"] == "job:http_errors:rate5m"
+    assert result["rewrite"]["interval"] == 30
+    assert "rewrite" not in original
+
+@pytest.mark.asyncio
+async def test_execute_query_rewrite_fails_open(mock_make_request):
+    """Test that the original query runs when the rules cannot be loaded."""
+    # Setup
+    def respond(endpoint, params=None, backend=None):
+        if endpoint == "rules":
+            raise ValueError("Prometheus API error: unavailable")
+        return {"resultType": "vector", "result": []}
+    mock_make_request.side_effect = respond
+
+    # Execute
+    result = await execute_query("sum(up)", rewrite=True)
+
+    # Verify
+    assert mock_make_request.call_args_list[-1].kwargs["params"] == {"query": "sum(up)"}
+    assert "rewrite" not in result
+
+@pytest.mark.asyncio
+async def test_execute_query_uses_cache(mock_make_request):
+    """Test that repeated instant queries are served from the cache."""
+    # Setup
+    mock_make_request.return_value = {"resultType": "vector", "result": []}
+
+    # Execute
+    first = await execute_query("up", time="1700000000")
+    second = await execute_query("up", time="1700000000")
+
+    # Verify
+    mock_make_request.assert_called_once()
+    assert first == second
+
+@pytest.mark.asyncio
+async def test_execute_query_bypasses_cache(mock_make_request):
+    """Test that use_cache=False always queries Prometheus."""
+    # Setup
+    mock_make_request.return_value = {"resultType": "vector", "result": []}
+
+    # Execute
+    await execute_query("up", use_cache=False)
+    await execute_query("up", use_cache=False)
+
+    # Verify
+    assert mock_make_request.call_count == 2
+
+@pytest.mark.asyncio
+async def test_execute_range_query_step_aligned_cache(mock_make_request):
+    """Test that range queries aligned to the same step grid share a cache entry."""
+    # Setup
+    mock_make_request.return_value = {"resultType": "matrix", "result": []}
+
+    # Execute
+    await execute_range_query("up", start="1700000003", end="1700000063", step="15s")
+    await execute_range_query("up", start="1700000001", end="1700000061", step="15")
+
+    # Verify
+    mock_make_request.assert_called_once_with("query_range", params={
+        "query": "up",
+        "start": "1699999995",
+        "end": "1700000055",
+        "step": "15s"
+    }, backend=None)
+
+@pytest.mark.asyncio
+async def test_get_cache_stats(mock_make_request):
+    """Test that cache statistics reflect hits and misses."""
+    # Setup
+    mock_make_request.return_value = {"resultType": "vector", "result": []}
+    before = (await get_cache_stats())["result_cache"]
+
+    # Execute
+    await execute_query("up", time="1700000000")
+    await execute_query("up", time="1700000000")
+    after = (await get_cache_stats())["result_cache"]
+
+    # Verify
+    assert after["hits"] == before["hits"] + 1
+    assert after["misses"] == before["misses"] + 1
+    assert after["entries"] == 1
+
+@pytest.mark.asyncio
+async def test_execute_range_query_fetches_only_missing_window(mock_make_request):
+    """Test that a sliding range query only fetches the window that is not cached yet."""
+    # Setup
+    def respond(endpoint, params, backend=None):
+        start, end = int(params["start"]), int(params["end"])
+        return {"resultType": "matrix", "result": [{
+            "metric": {"__name__": "up"},
+            "values": [[ts, "1"] for ts in range(start, end + 1, 60)]
+        }]}
+    mock_make_request.side_effect = respond
+
+    # Execute
+    await execute_range_query("up", start="1700000040", end="1700003640", step="60")
+    result_cache.clear()
+    result = await execute_range_query("up", start="1700000640", end="1700004240", step="60")
+
+    # Verify
+    assert mock_make_request.call_count == 2
+    assert mock_make_request.call_args.kwargs["params"]["start"] == "1700003700"
+    assert mock_make_request.call_args.kwargs["params"]["end"] == "1700004240"
+    values = result["result"][0]["values"]
+    assert values[0][0] == 1700000640
+    assert values[-1][0] == 1700004240
+    assert len(values) == 61
+
+@pytest.mark.asyncio
+async def test_execute_range_query_splits_long_ranges(mock_make_request):
+    """Test that long range queries are split into shards and stitched back together."""
+    # Setup
+    def respond(endpoint, params, backend=None):
+        start, end = int(params["start"]), int(params["end"])
+        return {"resultType": "matrix", "result": [{
+            "metric": {"__name__": "up"},
+            "values": [[ts, "1"] for ts in range(start, end + 1, 3600)]
+        }]}
+    mock_make_request.side_effect = respond
+
+    # Execute
+    result = await execute_range_query("up", start="1699920000", end="1700179200", step="1h", use_cache=False)
+
+    # Verify
+    assert mock_make_request.call_count == 4
+    timestamps = [ts for ts, _ in result["result"][0]["values"]]
+    assert timestamps == list(range(1699920000, 1700179200 + 1, 3600))
+
+@pytest.mark.asyncio
+async def test_execute_range_query_stats_output(mock_make_request):
+    """Test that the stats output mode summarizes each series."""
+    # Setup
+    mock_make_request.return_value = {
+        "resultType": "matrix",
+        "result": [{"metric": {"__name__": "up"}, "values": [[1672531200, "1"], [1672531215, "3"]]}]
+    }
+
+    # Execute
+    result = await execute_range_query(
+        "up", start="2023-01-01T00:00:00Z", end="2023-01-01T00:00:15Z", step="15s", output="stats"
+    )
+
+    # Verify
+    assert result["output"] == "stats"
+    assert result["result"][0]["stats"]["avg"] == 2.0
+
+@pytest.mark.asyncio
+async def test_execute_range_query_export_csv(mock_make_request, tmp_path):
+    """Test that an exported range query writes the samples to a file and returns only its summary."""
+    # Setup
+    mock_make_request.return_value = {
+        "resultType": "matrix",
+        "result": [{"metric": {"__name__": "up", "job": "node"}, "values": [[1672531200, "1"], [1672531215, "3"]]}]
+    }
+
+    # Execute
+    with patch.object(config, "export_dir", str(tmp_path)):
+        result = await execute_range_query(
+            "up", start="2023-01-01T00:00:00Z", end="2023-01-01T00:00:15Z", step="15s", export="csv"
+        )
+
+    # Verify
+    assert "result" not in result
+    summary = result["export"]
+    assert summary["uri"].startswith("file://")
+    assert summary["series"] == 1 and summary["samples"] == 2
+    lines = (tmp_path / summary["path"].rsplit("/", 1)[1]).read_text().splitlines()
+    assert lines == ["timestamp,value,__name__,job", "1672531200,1,up,node", "1672531215,3,up,node"]
+
+@pytest.mark.asyncio
+async def test_execute_range_query_export_keeps_bounded_files(mock_make_request, tmp_path):
+    """Test that re-exports replace their file and exports beyond the maximum count are pruned."""
+    # Setup
+    mock_make_request.return_value = {
+        "resultType": "matrix", "result": [{"metric": {"__name__": "up"}, "values": [[1672531200, "1"]]}]
+    }
+
+    # Execute
+    with patch.object(config, "export_dir", str(tmp_path)), patch.object(config, "export_max_files", 2):
+        for query in ("up", "up", "down", "sum(up)"):
+            await execute_range_query(query, start="2023-01-01T00:00:00Z", end="2023-01-01T00:00:15Z", step="15s",
+                                      export="csv", use_cache=False)
+
+    # Verify
+    assert len(list(tmp_path.iterdir())) == 2
+
+@pytest.mark.asyncio
+async def test_execute_range_query_invalid_export_format(mock_make_request):
+    """Test that an unknown export format is rejected before querying Prometheus."""
+    with pytest.raises(ValueError, match="Unknown export format"):
+        await execute_range_query("up", start="2023-01-01T00:00:00Z", end="2023-01-01T00:00:15Z", step="15s",
+                                  export="xlsx")
+
+    mock_make_request.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_execute_query_invalid_output(mock_make_request):
+    """Test that an unknown output mode is rejected before querying Prometheus."""
+    with pytest.raises(ValueError, match="Unknown output mode"):
+        await execute_query("up", output="everything")
+
+    mock_make_request.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_watch_query_returns_deltas(mock_make_request):
+    """Test that a watched query returns its series once and then only the changes."""
+    # Setup
+    mock_make_request.return_value = {
+        "resultType": "vector",
+        "result": [{"metric": {"job": "api"}, "value": [1700000000, "1"]}]
+    }
+
+    # Execute
+    first = await watch_query("up", interval="1m")
+    update = await get_watch_updates(first["watch"])
+    removed = await unwatch_query(first["watch"])
+
+    # Verify
+    mock_make_request.assert_called_once_with("query", params={"query": "up"}, backend=None)
+    assert first["added"] == [{"metric": {"job": "api"}, "value": [1700000000, "1"]}]
+    assert first["uri"] == f"prometheus://watch/{first['watch']}"
+    assert update["added"] == update["changed"] == [] and update["unchanged"] == 1
+    assert removed == {"watch": first["watch"], "removed": True}
+    with pytest.raises(ValueError, match="Unknown watch"):
+        await get_watch_updates(first["watch"])
+
+@pytest.mark.asyncio
+async def test_watch_query_interval_too_short(mock_make_request):
+    """Test that watches cannot be evaluated more often than the minimum interval."""
+    with pytest.raises(ValueError, match="interval must be at least"):
+        await watch_query("up", interval="1s")
+
+    mock_make_request.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_list_metrics_served_from_index(mock_make_request):
+    """Test that repeated list_metrics calls do not query Prometheus again."""
+    # Setup
+    mock_make_request.return_value = ["up", "go_goroutines"]
+
+    # Execute
+    await list_metrics()
+    result = await list_metrics()
+
+    # Verify
+    mock_make_request.assert_called_once_with("label/__name__/values")
+    assert result == ["up", "go_goroutines"]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kwargs, message", [
+    ({"limit": 0}, "limit must be at least 1"),
+    ({"limit": -1}, "limit must be at least 1"),
+    ({"cursor": "abc"}, "Invalid cursor"),
+    ({"cursor": "-5"}, "Invalid cursor"),
+])
+async def test_search_metrics_rejects_bad_pages(mock_make_request, kwargs, message):
+    """Test that a limit below 1 or a cursor that is not a non-negative offset is rejected."""
+    # Execute / Verify
+    with pytest.raises(ValueError, match=message):
+        await search_metrics("http", **kwargs)
+    mock_make_request.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_search_metrics_paginates(mock_make_request):
+    """Test searching the metric index with pagination and metadata."""
+    # Setup
+    def respond(endpoint, params=None):
+        if endpoint == "label/__name__/values":
+            return ["http_requests_total", "http_request_duration_seconds", "up", "process_cpu_seconds_total"]
+        if endpoint == "metadata":
+            return {"http_requests_total": [{"type": "counter", "help": "Total HTTP requests", "unit": ""}]}
+        if endpoint == "labels":
+            return ["__name__", "job", "code"]
+    mock_make_request.side_effect = respond
+
+    # Execute
+    first = await search_metrics("http_req", limit=1, include_labels=True)
+    second = await search_metrics("http_req", limit=1, cursor=first["nextCursor"])
+
+    # Verify
+    assert first["total"] == 2
+    assert first["metrics"] == [{"name": "http_request_duration_seconds", "labels": ["job", "code"]}]
+    assert second["metrics"][0]["name"] == "http_requests_total"
+    assert second["metrics"][0]["type"] == "counter"
+    assert second["nextCursor"] is None
+
+@pytest.fixture
+def disk_cache(tmp_path):
+    """Enable the disk cache with a file in a temporary directory."""
+    cache = DiskCache(str(tmp_path / "prometheus.db"), max_bytes=1 << 20)
+    with patch("prometheus_mcp_server.server.disk_cache", cache):
+        yield cache
+    cache.close()
+
+@pytest.mark.asyncio
+async def test_settled_range_query_is_served_from_disk(mock_make_request, disk_cache):
+    """Test that a range query ending before the settle window is kept on disk without expiry."""
+    # Setup
+    mock_make_request.return_value = {
+        "resultType": "matrix",
+        "result": [{"metric": {"__name__": "up"}, "values": [[1672531200, "1"], [1672531215, "1"]]}],
+    }
+
+    # Execute: the second call comes from a new session, with empty in-memory caches
+    first = await execute_range_query("up", start="2023-01-01T00:00:00Z", end="2023-01-01T01:00:00Z", step="15s")
+    result_cache.clear()
+    range_cache.clear()
+    second = await execute_range_query("up", start="2023-01-01T00:00:00Z", end="2023-01-01T01:00:00Z", step="15s")
+
+    # Verify
+    mock_make_request.assert_called_once()
+    assert second == first
+    assert disk_cache.stats()["hits"] == 1
+
+@pytest.mark.asyncio
+async def test_recent_range_query_is_not_stored_on_disk(mock_make_request, disk_cache):
+    """Test that range queries whose end is within the settle window are not kept on disk."""
+    # Setup
+    mock_make_request.return_value = {"resultType": "matrix", "result": []}
+    end = int(time.time())
+
+    # Execute
+    await execute_range_query("up", start=str(end - 600), end=str(end), step="60s")
+
+    # Verify
+    assert disk_cache.stats()["entries"] == 0
+
+@pytest.mark.asyncio
+async def test_metadata_and_targets_warm_start_from_disk(mock_make_request, disk_cache):
+    """Test that metadata and targets loaded by one session are reused by the next one."""
+    # Setup
+    def respond(endpoint, params=None, backend=None):
+        if endpoint == "metadata":
+            return {"up": [{"type": "gauge", "help": "Scrape health", "unit": ""}]}
+        return {"activeTargets": [{"labels": {"job": "node"}, "health": "up"}], "droppedTargets": []}
+    mock_make_request.side_effect = respond
+
+    # Execute
+    await get_metric_metadata("up")
+    await get_targets()
+    metadata_cache.clear()
+    result_cache.clear()
+    metadata = await get_metric_metadata("up")
+    targets = await get_targets()
+    stats = await get_cache_stats()
+
+    # Verify
+    assert [call.args[0] for call in mock_make_request.call_args_list] == ["metadata", "targets"]
+    assert metadata[0]["type"] == "gauge"
+    assert targets["activeTargets"][0]["labels"] == {"job": "node"}
+    assert stats["disk_cache"]["entries"] == 2
@@ -0,0 +1,231 @@
+"""Tests for watched queries and their delta updates."""
+
+import asyncio
+
+import pytest
+
+from prometheus_mcp_server.watch import (
+    WatchRegistry,
+    diff_snapshot,
+    has_changes,
+    take_snapshot,
+    value_changed,
+    watch_id_from_uri,
+)
+
+
+def vector(*samples):
+    """Build a vector result of (instance, value) samples."""
+    return {"resultType": "vector",
+            "result": [{"metric": {"instance": instance}, "value": [1700000000, value]} for instance, value in samples]}
+
+
+class FakeEvaluate:
+    """Evaluation function returning queued results and counting calls."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    async def __call__(self, query, backend):
+        self.calls += 1
+        result = self.results[0] if len(self.results) == 1 else self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class FakeSession:
+    """Listener recording resource updated notifications."""
+
+    def __init__(self, fail=False):
+        self.updated = []
+        self.fail = fail
+
+    async def send_resource_updated(self, uri):
+        if self.fail:
+            raise ConnectionError("session closed")
+        self.updated.append(uri)
+
+
+async def wait_for(condition, timeout=1.0):
+    """Wait until a condition holds, failing after a timeout."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.005)
+
+
+def test_diff_snapshot_reports_added_removed_and_changed():
+    """Test that a diff lists new, gone and moved series against the delivered values."""
+    snapshot = take_snapshot(vector(("a", "1"), ("b", "5"), ("c", "3")))
+    seen = {(("instance", "a"),): "1", (("instance", "b"),): "2", (("instance", "d"),): "7"}
+
+    delta = diff_snapshot(seen, snapshot, threshold=0)
+
+    assert [item["metric"] for item in delta["added"]] == [{"instance": "c"}]
+    assert delta["removed"] == [{"metric": {"instance": "d"}}]
+    assert delta["changed"] == [{"metric": {"instance": "b"}, "value": [1700000000, "5"], "previous": "2"}]
+    assert delta["unchanged"] == 1
+    assert has_changes(seen, snapshot, 0)
+
+
+@pytest.mark.parametrize("previous, current, threshold, changed", [
+    ("1", "1.5", 0, True),
+    ("1", "1.5", 0.5, False),
+    ("1", "1.6", 0.5, True),
+    ("NaN", "NaN", 0, False),
+    ("NaN", "1", 0, True),
+    ("+Inf", "+Inf", 0, False),
+])
+def test_value_changed(previous, current, threshold, changed):
+    """Test that values only change by more than the threshold, and NaN equals NaN."""
+    assert value_changed(previous, current, threshold) is changed
+
+
+def test_take_snapshot_rejects_matrices():
+    """Test that only vectors and scalars can be watched."""
+    assert take_snapshot({"resultType": "scalar", "result": [1700000000, "4"]}) == {(): ({}, [1700000000, "4"])}
+    with pytest.raises(ValueError, match="Only instant vector"):
+        take_snapshot({"resultType": "matrix", "result": []})
+
+
+def test_watch_id_from_uri():
+    """Test that watch IDs are taken from watch resource URIs only."""
+    assert watch_id_from_uri("prometheus://watch/abc") == "abc"
+    with pytest.raises(ValueError):
+        watch_id_from_uri("prometheus://other/abc")
+
+
+@pytest.mark.asyncio
+async def test_watch_returns_full_result_then_deltas():
+    """Test that the first update has every series and later polls only the changes."""
+    evaluate = FakeEvaluate(vector(("a", "1"), ("b", "2")), vector(("a", "1"), ("b", "3"), ("c", "1")))
+    registry = WatchRegistry(evaluate)
+    try:
+        first = await registry.watch("up", interval=0.01)
+        assert len(first["added"]) == 2 and first["evaluations"] == 1
+        await wait_for(lambda: evaluate.calls >= 2)
+
+        update = registry.poll(first["watch"])
+        assert [item["metric"] for item in update["added"]] == [{"instance": "c"}]
+        assert update["changed"][0]["previous"] == "2"
+        assert update["unchanged"] == 1
+
+        again = registry.poll(first["watch"])
+        assert again["added"] == again["changed"] == again["removed"] == []
+    finally:
+        await registry.close()
+
+
+@pytest.mark.asyncio
+async def test_equal_queries_share_one_evaluation():
+    """Test that subscribers of equivalent expressions share one evaluation loop."""
+    evaluate = FakeEvaluate(vector(("a", "1")))
+    registry = WatchRegistry(evaluate)
+    try:
+        first, second = await asyncio.gather(
+            registry.watch("sum(up) by (job)", interval=60),
+            registry.watch("sum by (job) (up)", interval=60),
+        )
+        assert first["watch"] != second["watch"]
+        assert evaluate.calls == 1
+        assert registry.stats()["watches"] == 1 and registry.stats()["entries"] == 2
+
+        await registry.unwatch(first["watch"])
+        assert registry.stats()["watches"] == 1
+        await registry.unwatch(second["watch"])
+        assert registry.stats()["watches"] == 0
+    finally:
+        await registry.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_first_evaluation_is_raised():
+    """Test that a query failing its first evaluation is not watched."""
+    registry = WatchRegistry(FakeEvaluate(ValueError("parse error")))
+
+    with pytest.raises(ValueError, match="parse error"):
+        await registry.watch("up{", interval=60)
+
+    assert registry.stats()["watches"] == 0
+
+
+@pytest.mark.asyncio
+async def test_later_failures_keep_last_snapshot():
+    """Test that a failed evaluation is reported while the last snapshot is kept."""
+    evaluate = FakeEvaluate(vector(("a", "1")), RuntimeError("timeout"))
+    registry = WatchRegistry(evaluate)
+    try:
+        first = await registry.watch("up", interval=0.01)
+        await wait_for(lambda: evaluate.calls >= 2)
+
+        update = registry.poll(first["watch"])
+        assert update["error"] == "timeout"
+        assert update["unchanged"] == 1
+    finally:
+        await registry.close()
+
+
+@pytest.mark.asyncio
+async def test_watch_limit():
+    """Test that the number of watched queries is bounded."""
+    registry = WatchRegistry(FakeEvaluate(vector(("a", "1"))), max_watches=1)
+    try:
+        await registry.watch("up", interval=60)
+        with pytest.raises(ValueError, match="Too many watched queries"):
+            await registry.watch("down", interval=60)
+    finally:
+        await registry.close()
+
+
+@pytest.mark.asyncio
+async def test_listeners_are_notified_once_until_read():
+    """Test that listeners get one notification per batch of unread changes."""
+    evaluate = FakeEvaluate(vector(("a", "1")), vector(("a", "2")))
+    registry = WatchRegistry(evaluate)
+    session = FakeSession()
+    try:
+        first = await registry.watch("up", interval=0.01)
+        registry.add_listener(first["watch"], session)
+        await wait_for(lambda: evaluate.calls >= 4)
+
+        assert session.updated == [first["uri"]]
+        registry.poll(first["watch"])
+        assert registry.stats()["notifications"] == 1
+    finally:
+        await registry.close()
+
+
+@pytest.mark.asyncio
+async def test_failing_listener_is_dropped():
+    """Test that listeners whose session is gone stop being notified."""
+    evaluate = FakeEvaluate(vector(("a", "1")), vector(("a", "2")))
+    registry = WatchRegistry(evaluate)
+    try:
+        first = await registry.watch("up", interval=0.01)
+        registry.add_listener(first["watch"], FakeSession(fail=True))
+        await wait_for(lambda: evaluate.calls >= 2)
+        await asyncio.sleep(0.02)
+
+        assert registry._subscriptions[first["watch"]].listeners == set()
+    finally:
+        await registry.close()
+
+
+@pytest.mark.asyncio
+async def test_idle_subscriptions_expire():
+    """Test that subscriptions nobody polls expire and stop their evaluation."""
+    now = [0.0]
+    evaluate = FakeEvaluate(vector(("a", "1")))
+    registry = WatchRegistry(evaluate, idle_timeout=10, clock=lambda: now[0])
+    try:
+        first = await registry.watch("up", interval=0.01)
+        now[0] = 11.0
+        await wait_for(lambda: registry.stats()["watches"] == 0)
+
+        assert registry.stats()["expired"] == 1
+        with pytest.raises(ValueError, match="Unknown watch"):
+            registry.poll(first["watch"])
+    finally:
+        await registry.close()